@@ -1,9 +1,14 @@
 import os
-from flask import Flask, request, render_template, flash, redirect, url_for
+import click
+from flask import Flask, Response, request, render_template, flash, redirect, url_for, jsonify
 from app.flask_config import Config 
 from app.models import db
 from flask_migrate import Migrate
 from app.utils import * 
+from app.background_runs import background_runs
+from app.metrics import pipeline_metrics
+from app.query_registry import queries
+from app.run_coordinator import run_coordinator, time_slot
 from flask_apscheduler import APScheduler
 import logging
 
@@ -17,6 +22,7 @@ scheduler = APScheduler()
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config())
+    queries.load()
     
     scheduler.init_app(app)
     scheduler.start()
@@ -34,8 +40,9 @@ def create_app():
     @app.route('/', methods=['GET'])
     def index():
         
-        total_count, spids_by_date = get_spids_count_by_gdprdate()     
-        return render_template("index.html", total_count=total_count, spids_by_date=spids_by_date, app_data=app_data)
+        total_count, spids_by_date = get_cached_spids_count_by_gdprdate()     
+        return render_template("index.html", total_count=total_count, spids_by_date=spids_by_date, app_data=app_data,
+                               run_id=request.args.get('run_id'))
     
     @app.route('/execute_deletions', methods=['POST'])
     def execute_deletions():
@@ -47,13 +54,39 @@ def create_app():
                 return redirect(url_for('index'))
 
             deletion_date = datetime.strptime(deletion_date_str, '%Y-%m-%d').date()
+            if request.form.get('background', '').lower() == 'true':
+                run_id = background_runs.start(
+                    app, deletion_date, lambda progress: execute_gdpr_deletions_cdp(deletion_date, progress=progress)
+                )
+                if request.accept_mimetypes.best == 'application/json':
+                    return jsonify(run_id=run_id, status_url=url_for('run_status', run_id=run_id)), 202
+                flash(f"Started deletions for {deletion_date} in the background.", "info")
+                return redirect(url_for('index', run_id=run_id))
             execute_gdpr_deletions_cdp(deletion_date, flash=flash)
         except Exception as e:
             logger.error(f"Error executing deletions: {e}")
             flash(f"An error occurred while executing deletions: {str(e)}", "danger")
         return redirect(url_for('index'))
+
+    @app.route('/runs/<run_id>', methods=['GET'])
+    def run_status(run_id):
+        progress = background_runs.get(run_id)
+        if progress is None:
+            return jsonify(error=f"Unknown run {run_id}"), 404
+        return jsonify(progress.to_dict())
                 
 
+    @app.cli.command('apply-ddl')
+    @click.argument('name')
+    def apply_ddl_command(name):
+        """Apply a one-off DDL statement from app/ddl, e.g. gdpr_deletion_jobs_add_status."""
+        apply_ddl(name)
+        click.echo(f"Applied {name}.")
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(pipeline_metrics.render(), mimetype='text/plain; version=0.0.4')
+
     db.init_app(app)
     migrate = Migrate(app, db)
     return app
@@ -67,7 +100,38 @@ def scheduled_task():
     with app.app_context():
         try:
             delete_date = date.today()
-            auto_execute_gdpr_deletions_cdp(delete_date)
-            logger.info("Scheduled GDPR deletions task completed")
+            # Every process runs the scheduler; the run leases let one process (or one per shard) do the work.
+            def run_shard(shard):
+                run_coordinator.once('daily_gdpr_load', delete_date, profile_store_table_get_gdpr_deletions)
+                auto_execute_gdpr_deletions_cdp(delete_date, shard=shard, load_daily_run=False)
+                logger.info(f"Scheduled GDPR deletions task completed for shard {shard}")
+
+            # One Spark session for the daily-run load and the deletions that follow it.
+            with spark_sessions.run():
+                shards = run_coordinator.run_shards('daily_gdpr_run', delete_date, run_shard)
+            if not shards:
+                logger.info(f"GDPR deletions for {delete_date} are handled by another process")
         except Exception as e:
             logger.error(f"Error executing scheduled deletions: {e}")
+
+
+JOB_POLL_INTERVAL_MINUTES = int(os.environ.get('GDPR_JOB_POLL_INTERVAL_MINUTES', 30))
+# The poll reads the status column that ddl/gdpr_deletion_jobs_add_status.sql adds to gdpr_deletion_jobs
+# (flask --app app.app apply-ddl gdpr_deletion_jobs_add_status), so it stays off until that has been applied.
+JOB_POLL_ENABLED = os.environ.get('GDPR_JOB_POLL_ENABLED', 'false').lower() == 'true'
+
+
+def job_status_poll_task():
+    with app.app_context():
+        try:
+            # Only the first process to fire in each poll interval polls; the others skip it.
+            slot = time_slot(JOB_POLL_INTERVAL_MINUTES)
+            if not run_coordinator.once('gdpr_job_status_poll', slot.isoformat(), poll_gdpr_job_statuses, wait=False):
+                logger.info(f"Privacy job statuses for {slot} are polled by another process")
+        except Exception as e:
+            logger.error(f"Error polling privacy job statuses: {e}")
+
+
+if JOB_POLL_ENABLED:
+    scheduler.task('interval', id='gdpr_job_status_poll', minutes=JOB_POLL_INTERVAL_MINUTES,
+                   max_instances=1, coalesce=True)(job_status_poll_task)
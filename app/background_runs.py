@@ -0,0 +1,213 @@
+import os
+import json
+import math
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from uuid import uuid4
+from app.models import db, DeletionRun
+from app.checkpoints import ensure_checkpoint_tables
+from app.run_coordinator import LeaseLock
+
+
+class RunProgress:
+    """Thread-safe progress of one deletion run, as reported by the progress endpoint.
+
+    With an engine every change is also written to the deletion_runs table, so
+    any worker can report the run, not only the one running it.
+    """
+
+    def __init__(self, delete_date, run_id=None, engine=None):
+        self.run_id = run_id or str(uuid4())
+        self.delete_date = str(delete_date)
+        self.status = 'queued'
+        self.total_chunks = 0
+        self.total_records = 0
+        self.chunks_done = 0
+        self.records_done = 0
+        self.records_submitted = 0
+        self.error_count = 0
+        self.errors = []
+        self.started_at = None
+        self.finished_at = None
+        self._engine = engine
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, run_id):
+        """Return the progress of run_id as last saved by the worker running it, or None."""
+        ensure_checkpoint_tables()
+        row = db.session.get(DeletionRun, run_id)
+        if row is None:
+            return None
+        progress = cls(row.delete_date, run_id=row.run_id)
+        for field in ('status', 'total_chunks', 'total_records', 'chunks_done', 'records_done', 'records_submitted',
+                      'error_count', 'started_at', 'finished_at'):
+            setattr(progress, field, getattr(row, field))
+        progress.errors = json.loads(row.errors)
+        return progress
+
+    def _save(self):
+        if self._engine is None:
+            return
+        table = DeletionRun.__table__
+        values = {
+            'delete_date': date.fromisoformat(self.delete_date),
+            'status': self.status,
+            'total_chunks': self.total_chunks,
+            'chunks_done': self.chunks_done,
+            'total_records': self.total_records,
+            'records_done': self.records_done,
+            'records_submitted': self.records_submitted,
+            'error_count': self.error_count,
+            'errors': json.dumps(self.errors[-10:]),
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        try:
+            # Chunk callbacks run on the chunk workers, so write through the engine rather than the session.
+            with self._engine.begin() as connection:
+                if not connection.execute(table.update().where(table.c.run_id == self.run_id).values(**values)).rowcount:
+                    connection.execute(table.insert().values(run_id=self.run_id, **values))
+        except Exception as e:
+            logging.warning(f"Could not save progress of run {self.run_id}: {e}")
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def start(self, total_chunks, total_records):
+        with self._lock:
+            self.total_chunks = total_chunks
+            self.total_records = total_records
+            self._save()
+
+    def chunk_done(self, result):
+        with self._lock:
+            self.chunks_done += 1
+            self.records_done += result.end - result.start
+            if result.request_id:
+                self.records_submitted += result.end - result.start
+            if not result.success:
+                self.error_count += 1
+                self.errors.append(result.error or f"Chunk {result.start}-{result.end} failed with status {result.status_code}")
+            self._save()
+
+    def add_error(self, message):
+        with self._lock:
+            self.error_count += 1
+            self.errors.append(message)
+            self._save()
+
+    def mark_running(self):
+        with self._lock:
+            self.status = 'running'
+            self.started_at = time.time()
+            self._save()
+
+    def mark_finished(self, error=None):
+        with self._lock:
+            if error is not None:
+                self.error_count += 1
+                self.errors.append(error)
+            self.status = 'failed' if self.error_count else 'completed'
+            self.finished_at = time.time()
+            self._save()
+
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+    def to_dict(self):
+        with self._lock:
+            eta_seconds = None
+            # Chunk sizes can change during a run, so estimate from records rather than chunks.
+            if self.status == 'running' and self.records_done and self.total_records:
+                elapsed = time.time() - self.started_at
+                eta_seconds = math.ceil(elapsed / self.records_done * (self.total_records - self.records_done))
+            return {
+                'run_id': self.run_id,
+                'delete_date': self.delete_date,
+                'status': self.status,
+                'total_chunks': self.total_chunks,
+                'chunks_done': self.chunks_done,
+                'total_records': self.total_records,
+                'records_submitted': self.records_submitted,
+                'error_count': self.error_count,
+                'errors': self.errors[-10:],
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'eta_seconds': eta_seconds,
+            }
+
+
+class BackgroundRuns:
+    """Runs deletion dates on a small worker pool and keeps their progress for polling.
+
+    Progress is kept in the deletion_runs table, and a run holds a lease on its
+    date in run_leases while queued or running, so every worker and replica
+    sees the same runs and a date only has one active run.
+    """
+
+    def __init__(self, max_workers=None, max_history=50):
+        self.max_workers = max_workers or int(os.environ.get('GDPR_BACKGROUND_WORKERS', 1))
+        self.max_history = max_history
+        self._executor = None
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='gdpr-run')
+        return self._executor
+
+    def _run(self, app, progress, target, lease):
+        progress.mark_running()
+        try:
+            with app.app_context():
+                try:
+                    target(progress)
+                finally:
+                    lease.stop_heartbeat()
+                    lease.release()
+        except Exception as e:
+            logging.error(f"Background deletion run {progress.run_id} failed: {e}", exc_info=True)
+            progress.mark_finished(error=str(e))
+            return
+        progress.mark_finished()
+
+    def start(self, app, delete_date, target):
+        """Queue target(progress) for delete_date and return its run id.
+
+        If a run for the same date is still queued or running, in this or any
+        other process, its id is returned instead.
+        """
+        ensure_checkpoint_tables()
+        progress = RunProgress(delete_date, engine=db.engine)
+        lease = LeaseLock(f"deletion_run:{delete_date}", owner=progress.run_id)
+        if not lease.acquire():
+            active_run_id = lease.holder()
+            if active_run_id is not None:
+                return active_run_id
+            raise RuntimeError(f"Could not start a deletion run for {delete_date}; try again.")
+
+        progress.save()
+        lease.start_heartbeat()
+        with self._lock:
+            self._runs[progress.run_id] = progress
+            finished = [run_id for run_id, run in self._runs.items() if not run.is_active()]
+            for run_id in finished[:max(len(self._runs) - self.max_history, 0)]:
+                del self._runs[run_id]
+        self._get_executor().submit(self._run, app, progress, target, lease)
+        logging.info(f"Queued background deletion run {progress.run_id} for {delete_date}")
+        return progress.run_id
+
+    def get(self, run_id):
+        """Return the progress of run_id, live if this process runs it, else as saved."""
+        with self._lock:
+            progress = self._runs.get(run_id)
+        return progress if progress is not None else RunProgress.load(run_id)
+
+
+background_runs = BackgroundRuns()
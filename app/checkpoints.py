@@ -0,0 +1,67 @@
+import json
+import threading
+import weakref
+import logging
+from datetime import date
+from flask import has_app_context
+from app.models import db, CacheGeneration, DeletionChunk, DeletionJob, DeletionRun, DeletionRunLedger, RunLease
+
+ACCEPTED = 'accepted'
+FAILED = 'failed'
+
+_tables_ready = weakref.WeakSet()
+_tables_lock = threading.Lock()
+
+
+def ensure_checkpoint_tables():
+    engine = db.engine
+    with _tables_lock:
+        if engine in _tables_ready:
+            return
+        for model in (DeletionChunk, DeletionJob, DeletionRun, DeletionRunLedger, RunLease, CacheGeneration):
+            model.__table__.create(engine, checkfirst=True)
+        _tables_ready.add(engine)
+
+
+class CheckpointStore:
+    """Records the outcome of every submitted chunk of a deletion date in the app database."""
+
+    def __init__(self, delete_date):
+        if isinstance(delete_date, str):
+            delete_date = date.fromisoformat(delete_date)
+        self.delete_date = delete_date
+        ensure_checkpoint_tables()
+
+    @classmethod
+    def for_date(cls, delete_date):
+        """Return a store for delete_date, or None outside an application context."""
+        if not has_app_context():
+            return None
+        return cls(delete_date)
+
+    def record(self, chunk, result):
+        # A chunk is acknowledged once the privacy service has given it a request id,
+        # even if a later step such as the Delta write failed.
+        status = ACCEPTED if result.request_id else FAILED
+        spids = chunk['singl_profl_id'].tolist() if 'singl_profl_id' in chunk else chunk['key'].tolist()
+        try:
+            db.session.add(DeletionChunk(
+                delete_date=self.delete_date,
+                chunk_start=result.start,
+                chunk_end=result.end,
+                spids=json.dumps(spids),
+                request_id=result.request_id,
+                status=status,
+                status_code=result.status_code,
+                elapsed=result.elapsed,
+            ))
+            # One executemany for the chunk's jobs; ORM objects cost more than the insert itself.
+            jobs = [{'user_key': job['customer']['user']['key'], 'job_id': job['jobId'], 'request_id': result.request_id}
+                    for job in result.jobs or []]
+            if jobs:
+                db.session.execute(DeletionJob.__table__.insert(), jobs)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logging.info(f"Checkpointed chunk {result.start}-{result.end} for {self.delete_date} as {status}.")
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from flask import current_app, has_app_context
+
+
+class TokenBucket:
+    """Blocking token bucket allowing `rate` acquisitions per second on average."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# The Privacy Service accepts at most this many users in one job request.
+PRIVACY_API_MAX_USERS = 1000
+
+
+class AdaptiveChunkSizer:
+    """Additive-increase / multiplicative-decrease chunk size for privacy API submissions.
+
+    The size grows by step after each chunk that succeeds within target_latency
+    seconds and is multiplied by backoff after a 429, a 5xx, a request that
+    failed without a response (timeouts, connection errors), or a request that
+    only got through after the HTTP client retried one of those. It always stays
+    between minimum and maximum, and maximum never exceeds PRIVACY_API_MAX_USERS.
+    """
+
+    def __init__(self, initial=None, minimum=None, maximum=None, step=None, backoff=0.5, target_latency=None):
+        self.maximum = min(maximum or int(os.environ.get('GDPR_CHUNK_MAX_SIZE', PRIVACY_API_MAX_USERS)), PRIVACY_API_MAX_USERS)
+        self.minimum = min(minimum or int(os.environ.get('GDPR_CHUNK_MIN_SIZE', 50)), self.maximum)
+        self.step = step or int(os.environ.get('GDPR_CHUNK_SIZE_STEP', 100))
+        self.backoff = backoff
+        self.target_latency = target_latency or float(os.environ.get('GDPR_CHUNK_TARGET_LATENCY', 10))
+        initial = initial or int(os.environ.get('GDPR_CHUNK_SIZE', 800))
+        self.size = max(self.minimum, min(initial, self.maximum))
+        self._lock = threading.Lock()
+
+    def next_size(self):
+        with self._lock:
+            return self.size
+
+    def observe(self, result):
+        """Adjust the size from a finished chunk's outcome and log size and latency."""
+        with self._lock:
+            if result.retried or result.status_code == 429 or (result.status_code or 0) >= 500 or (not result.success and result.status_code is None):
+                self.size = max(self.minimum, int(self.size * self.backoff))
+            elif result.success and result.elapsed <= self.target_latency:
+                self.size = min(self.maximum, self.size + self.step)
+            next_size = self.size
+
+        users = result.end - result.start
+        throughput = users / result.elapsed if result.elapsed else 0
+        logging.info(f"Chunk {result.start}-{result.end}: {users} users in {result.elapsed:.2f}s "
+                     f"({throughput:.0f} users/s), status {result.status_code}; next chunk size {next_size}.")
+
+
+@dataclass
+class ChunkResult:
+    start: int
+    end: int
+    success: bool = False
+    skipped: bool = False
+    status_code: int = None
+    request_id: str = None
+    retried: bool = False
+    elapsed: float = 0.0
+    error: str = None
+    jobs: list = None
+
+
+def submit_deletion_chunks(df, submit, chunk_size=800, workers=None, rate=None, stop_on_failure=False, on_result=None,
+                           deadline=None):
+    """Call submit(chunk, result=ChunkResult) for each slice of df and return every chunk's result.
+
+    chunk_size is either a fixed number of rows or an AdaptiveChunkSizer, which
+    picks the size of each slice as it is taken from the rest of df.
+    With stop_on_failure, chunks not yet started when one fails are returned with skipped=True,
+    as are chunks not started by deadline (a time.monotonic() value).
+    on_result(chunk, result) is called from the worker after each submitted chunk.
+    """
+    if workers is None:
+        workers = int(os.environ.get('GDPR_CHUNK_WORKERS', 1))
+    if rate is None:
+        rate = float(os.environ.get('GDPR_PRIVACY_API_RATE', 0))
+    bucket = TokenBucket(rate) if rate > 0 else None
+    sizer = chunk_size if isinstance(chunk_size, AdaptiveChunkSizer) else None
+    stop = threading.Event()
+    app = current_app._get_current_object() if has_app_context() else None
+    next_start = 0
+    bounds_lock = threading.Lock()
+
+    def next_bounds():
+        nonlocal next_start
+        with bounds_lock:
+            if next_start >= len(df):
+                return None
+            start = next_start
+            next_start = min(start + (sizer.next_size() if sizer else chunk_size), len(df))
+            return start, next_start
+
+    def run_chunks():
+        results = []
+        bounds = next_bounds()
+        while bounds is not None:
+            results.append(run_chunk(*bounds))
+            bounds = next_bounds()
+        return results
+
+    def run_chunk(start, end):
+        result = ChunkResult(start=start, end=end)
+        if bucket and not stop.is_set():
+            bucket.acquire()
+        if deadline is not None and time.monotonic() >= deadline:
+            stop.set()
+        if stop.is_set():
+            result.skipped = True
+            return result
+
+        if app is not None and not has_app_context():
+            with app.app_context():
+                process_chunk(result)
+        else:
+            process_chunk(result)
+
+        if not result.success and stop_on_failure:
+            stop.set()
+        return result
+
+    def process_chunk(result):
+        chunk = df.iloc[result.start:result.end]
+        start_time = time.time()
+        try:
+            result.success = bool(submit(chunk, result=result))
+        except Exception as e:
+            logging.error(f"Chunk {result.start}-{result.end} raised: {e}", exc_info=True)
+            result.error = str(e)
+        result.elapsed = time.time() - start_time
+        if sizer is not None:
+            sizer.observe(result)
+
+        if on_result is not None:
+            try:
+                on_result(chunk, result)
+            except Exception as e:
+                logging.error(f"Error recording chunk {result.start}-{result.end}: {e}", exc_info=True)
+
+    if workers <= 1:
+        return run_chunks()
+
+    logging.info(f"Submitting {len(df)} rows with {workers} workers at {rate or 'unlimited'} requests/second.")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gdpr-chunk') as executor:
+        futures = [executor.submit(run_chunks) for _ in range(workers)]
+        results = [result for future in futures for result in future.result()]
+    return sorted(results, key=lambda result: result.start)
@@ -0,0 +1,19 @@
+import os
+
+
+def iter_arrow_batches(cursor, batch_size=None):
+    """Yield the cursor's pending result as pyarrow Tables of at most batch_size rows."""
+    batch_size = batch_size or int(os.environ.get('DATABRICKS_FETCH_BATCH_SIZE', 10000))
+    while True:
+        table = cursor.fetchmany_arrow(batch_size)
+        if table.num_rows == 0:
+            break
+        yield table
+
+
+def fetch_dataframe(cursor, columns=None):
+    """Fetch the whole pending result into pandas via Arrow, without per-row Python objects."""
+    table = cursor.fetchall_arrow()
+    if columns:
+        table = table.select(columns)
+    return table.to_pandas()
@@ -0,0 +1 @@
+ALTER TABLE custanwo.customer_transformation.gdpr_deletion_jobs ADD COLUMNS (status STRING, status_updated_at TIMESTAMP)
\ No newline at end of file
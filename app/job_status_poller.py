@@ -0,0 +1,70 @@
+import os
+import time
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from app.metrics import pipeline_metrics
+from app.platform_client import platform_client
+
+# Privacy Service job states after which a job no longer changes.
+TERMINAL_STATUSES = ('complete', 'error')
+
+
+class JobStatusPoller:
+    """Looks up the status of submitted privacy jobs concurrently.
+
+    One cycle uses a single access token for all its requests, sent through the
+    shared pooled Platform HTTP client, and returns only the jobs whose status changed.
+    """
+
+    def __init__(self, token, url=None, workers=None, timeout=None):
+        self.token = token
+        self.url = url or os.getenv('PRIVACY_END_POINT')
+        self.workers = workers or int(os.environ.get('GDPR_JOB_POLL_WORKERS', 8))
+        self.timeout = timeout or float(os.environ.get('GDPR_JOB_POLL_TIMEOUT', 30))
+
+    def _headers(self):
+        return {
+            'Accept': 'application/json',
+            'Authorization': f'Bearer {self.token()}',
+            'x-api-key': os.environ.get('GDRP_API_KEY'),
+            'x-gw-ims-org-id': os.environ.get('IMS_ORG')
+        }
+
+    def fetch_status(self, headers, job_id):
+        """Return the job's current status, or None if it could not be fetched."""
+        try:
+            response = platform_client.request('GET', f"{self.url.rstrip('/')}/{job_id}", headers=headers,
+                                               timeout=self.timeout)
+            if response.status_code != 200:
+                logging.warning(f"Status lookup for job {job_id} failed. Status code: {response.status_code}")
+                return None
+            return response.json().get('status')
+        except Exception as e:
+            logging.warning(f"Status lookup for job {job_id} failed: {e}")
+            return None
+
+    def poll(self, pending):
+        """Fetch statuses for the jobId/status rows in pending and return the changed rows."""
+        if pending.empty:
+            return pd.DataFrame(columns=['jobId', 'status', 'status_updated_at'])
+
+        started = time.monotonic()
+        headers = self._headers()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                pipeline_metrics.timed('privacy_status_poll', rows=len(pending)) as timing:
+            statuses = list(executor.map(lambda job_id: self.fetch_status(headers, job_id), pending['jobId']))
+            timing.error = any(status is None for status in statuses)
+
+        polled = pending.assign(new_status=statuses)
+        changed = polled[polled['new_status'].notna() & (polled['new_status'] != polled['status'])]
+        failed = int(polled['new_status'].isna().sum())
+        logging.info(f"Polled {len(polled)} jobs in {time.monotonic() - started:.2f}s: "
+                     f"{len(changed)} changed, {failed} lookups failed.")
+
+        return pd.DataFrame({
+            'jobId': changed['jobId'].tolist(),
+            'status': changed['new_status'].tolist(),
+            'status_updated_at': datetime.now()
+        })
@@ -0,0 +1,117 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency bucket upper bounds in seconds, spanning token fetches to whole-table MERGEs.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class StageTiming:
+    """Handed to the body of PipelineMetrics.timed so it can report rows and errors."""
+
+    def __init__(self, rows=0):
+        self.rows = rows
+        self.error = False
+
+
+class _StageStats:
+
+    def __init__(self, buckets):
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.duration_sum = 0.0
+        self.count = 0
+        self.rows = 0
+        self.errors = 0
+
+
+class PipelineMetrics:
+    """Per-stage latency histograms, row counters and error counters for the GDPR pipeline.
+
+    Recording is a lock and a bisect per observation, so it can stay on in
+    production. render() returns the Prometheus text exposition format.
+    """
+
+    def __init__(self, prefix='gdpr_stage', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, rows=0, error=False):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats(self.buckets)
+            stats.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+            stats.duration_sum += seconds
+            stats.count += 1
+            stats.rows += rows
+            if error:
+                stats.errors += 1
+
+    @contextmanager
+    def timed(self, stage, rows=0):
+        """Time the with-block as one observation of stage; an exception counts as an error."""
+        timing = StageTiming(rows)
+        start = time.perf_counter()
+        try:
+            yield timing
+        except Exception:
+            timing.error = True
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, rows=timing.rows, error=timing.error)
+
+    def timed_iter(self, stage, iterable):
+        """Yield from iterable, timing each step as one observation of stage with len(item) rows.
+
+        Only the time spent producing items is recorded, not the time the caller
+        spends on them between steps.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.timed(stage) as timing:
+                item = next(iterator, None)
+                if item is None:
+                    return
+                timing.rows = len(item)
+            yield item
+
+    def snapshot(self):
+        """Return {stage: {'count', 'seconds', 'rows', 'errors'}} totals recorded so far."""
+        with self._lock:
+            return {stage: {'count': stats.count, 'seconds': stats.duration_sum, 'rows': stats.rows, 'errors': stats.errors}
+                    for stage, stats in self._stages.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def render(self):
+        with self._lock:
+            stages = {stage: (list(stats.bucket_counts), stats.duration_sum, stats.count, stats.rows, stats.errors)
+                      for stage, stats in sorted(self._stages.items())}
+
+        name = f'{self.prefix}_duration_seconds'
+        lines = [f'# HELP {name} Time spent in each pipeline stage.', f'# TYPE {name} histogram']
+        for stage, (bucket_counts, duration_sum, count, _, _) in stages.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {duration_sum}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        for suffix, index, help_text in (('rows_total', 3, 'Rows processed by each pipeline stage.'),
+                                         ('errors_total', 4, 'Failed calls of each pipeline stage.')):
+            name = f'{self.prefix}_{suffix}'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for stage, values in stages.items():
+                lines.append(f'{name}{{stage="{stage}"}} {values[index]}')
+        return '\n'.join(lines) + '\n'
+
+
+pipeline_metrics = PipelineMetrics()
@@ -16,7 +16,7 @@ class CddCustLoyaltyAcct(db.Model):
 class DeletionJob(db.Model):
     __tablename__ = 'deletion_jobs'
     id = db.Column(db.String, primary_key=True, default=lambda: str(uuid4()))
-    user_key = db.Column(db.String(50), nullable=False)
+    user_key = db.Column(db.String(50), nullable=False, index=True)
     job_id = db.Column(db.String(50), nullable=False)
     request_id = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
@@ -45,3 +45,83 @@ class ProfileExportSnapshot(db.Model):
 
     def __repr__(self):
         return f"<ProfileExportSnapshot singl_profl_id={self.singl_profl_id}>"
+
+class DeletionChunk(db.Model):
+    __tablename__ = 'deletion_chunks'
+    id = db.Column(db.String, primary_key=True, default=lambda: str(uuid4()))
+    delete_date = db.Column(db.Date, nullable=False, index=True)
+    chunk_start = db.Column(db.Integer, nullable=False)
+    chunk_end = db.Column(db.Integer, nullable=False)
+    spids = db.Column(db.Text, nullable=False)
+    request_id = db.Column(db.String(50), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    status_code = db.Column(db.Integer, nullable=True)
+    elapsed = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f"<DeletionChunk delete_date={self.delete_date}, chunk={self.chunk_start}-{self.chunk_end}, status={self.status}>"
+
+
+class DeletionRun(db.Model):
+    __tablename__ = 'deletion_runs'
+    run_id = db.Column(db.String(36), primary_key=True)
+    delete_date = db.Column(db.Date, nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False)
+    total_chunks = db.Column(db.Integer, nullable=False, default=0)
+    chunks_done = db.Column(db.Integer, nullable=False, default=0)
+    total_records = db.Column(db.Integer, nullable=False, default=0)
+    records_done = db.Column(db.Integer, nullable=False, default=0)
+    records_submitted = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text, nullable=False, default='[]')
+    started_at = db.Column(db.Float, nullable=True)
+    finished_at = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f"<DeletionRun run_id={self.run_id}, delete_date={self.delete_date}, status={self.status}>"
+
+
+class DeletionRunLedger(db.Model):
+    __tablename__ = 'deletion_run_ledger'
+    id = db.Column(db.String, primary_key=True, default=lambda: str(uuid4()))
+    run_id = db.Column(db.String(36), nullable=False, index=True)
+    run_date = db.Column(db.Date, nullable=False, index=True)
+    delete_date = db.Column(db.Date, nullable=False)
+    record_budget = db.Column(db.Integer, nullable=True)
+    time_budget_seconds = db.Column(db.Float, nullable=True)
+    records_pending = db.Column(db.Integer, nullable=False, default=0)
+    records_submitted = db.Column(db.Integer, nullable=False, default=0)
+    records_failed = db.Column(db.Integer, nullable=False, default=0)
+    records_carried_over = db.Column(db.Integer, nullable=False, default=0)
+    shard = db.Column(db.String(20), nullable=True)
+    status = db.Column(db.String(20), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<DeletionRunLedger run_date={self.run_date}, delete_date={self.delete_date}, status={self.status}>"
+
+
+class CacheGeneration(db.Model):
+    __tablename__ = 'cache_generations'
+    name = db.Column(db.String(100), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    def __repr__(self):
+        return f"<CacheGeneration name={self.name}, generation={self.generation}>"
+
+
+class RunLease(db.Model):
+    __tablename__ = 'run_leases'
+    name = db.Column(db.String(200), primary_key=True)
+    owner = db.Column(db.String(200), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<RunLease name={self.name}, owner={self.owner}, expires_at={self.expires_at}>"
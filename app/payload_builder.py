@@ -0,0 +1,77 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+COMPANY_CONTEXTS = [
+    {"namespace": "imsOrgID", "value": "B9CB1CFE53309CAD0A490D45@AdobeOrg"}
+]
+INCLUDE = ["profileService", "aepDataLake", "identity"]
+REGULATION = "gdpr"
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'))
+
+
+# The request body is {"companyContexts": ..., "users": [...], "include": ..., "regulation": ...};
+# everything around the users array is the same for every request, so it is serialized once.
+_PAYLOAD_PREFIX = '{"companyContexts":' + dumps(COMPANY_CONTEXTS) + ',"users":'
+_PAYLOAD_SUFFIX = ',"include":' + dumps(INCLUDE) + ',"regulation":' + dumps(REGULATION) + '}'
+
+
+def build_users(spids, action='delete', namespace='SPID', id_type='custom'):
+    """Build the users array for SPIDs that each carry a single identity."""
+    actions = [action]
+    return [
+        {"key": spid, "action": actions, "userIDs": [{"namespace": namespace, "value": spid, "type": id_type}]}
+        for spid in sorted(spids)
+    ]
+
+
+def _build_grouped_users(chunk):
+    grouped = {}
+    for key, action, namespace, value, id_type in zip(
+        chunk['key'], chunk['action'], chunk['namespace'], chunk['value'], chunk['type']
+    ):
+        user = grouped.get(key)
+        if user is None:
+            user = grouped[key] = {"key": key, "action": [], "userIDs": []}
+        user['action'].append(action)
+        user['userIDs'].append({"namespace": namespace, "value": value, "type": id_type})
+    return [grouped[key] for key in sorted(grouped)]
+
+
+def build_users_from_chunk(chunk):
+    """Build the users array for a chunk with key/action/namespace/value/type columns.
+
+    Chunks where every key has one identity and the action, namespace and type are
+    constant take the fast path; anything else is grouped per key like before.
+    """
+    if chunk.empty:
+        return []
+    keys = chunk['key']
+    constant = (
+        keys.is_unique
+        and keys.equals(chunk['value'])
+        and chunk['action'].nunique() == 1
+        and chunk['namespace'].nunique() == 1
+        and chunk['type'].nunique() == 1
+    )
+    if constant:
+        return build_users(
+            keys.tolist(),
+            action=chunk['action'].iat[0],
+            namespace=chunk['namespace'].iat[0],
+            id_type=chunk['type'].iat[0],
+        )
+    return _build_grouped_users(chunk)
+
+
+def build_privacy_payload(users):
+    return _PAYLOAD_PREFIX + dumps(users) + _PAYLOAD_SUFFIX
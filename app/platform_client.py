@@ -0,0 +1,125 @@
+import os
+import gzip
+import time
+import threading
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Methods that may be resent after the server received the request but did not answer in time.
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+def retry_after_seconds(response):
+    """Return the delay asked for by the response's Retry-After header, or None."""
+    value = response.headers.get('Retry-After') if response.headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class PlatformHttpClient:
+    """Shared HTTP client for Adobe IMS and Experience Platform calls.
+
+    All calls go through one keep-alive session with a connection pool sized
+    for the chunk and poll workers. Every request has a (connect, read)
+    timeout, and 429/5xx responses and connection errors are retried up to
+    retries times, waiting for Retry-After when the server sends one and
+    exponential backoff otherwise. Read timeouts are only retried for
+    idempotent methods, so a slow POST is never submitted twice.
+    Request bodies are gzipped when compress is set; an endpoint that answers
+    415 gets the plain body and is not sent compressed bodies again.
+    """
+
+    def __init__(self, pool_size=None, connect_timeout=None, read_timeout=None, retries=None, backoff=None,
+                 max_retry_after=None, compress_min_bytes=None):
+        self.pool_size = pool_size or int(os.environ.get('PLATFORM_HTTP_POOL_SIZE', 16))
+        self.connect_timeout = connect_timeout or float(os.environ.get('PLATFORM_HTTP_CONNECT_TIMEOUT', 10))
+        self.read_timeout = read_timeout or float(os.environ.get('PLATFORM_HTTP_READ_TIMEOUT', 60))
+        self.retries = retries if retries is not None else int(os.environ.get('PLATFORM_HTTP_RETRIES', 3))
+        self.backoff = backoff if backoff is not None else float(os.environ.get('PLATFORM_HTTP_BACKOFF', 1))
+        self.max_retry_after = max_retry_after or float(os.environ.get('PLATFORM_HTTP_MAX_RETRY_AFTER', 120))
+        self.compress_min_bytes = compress_min_bytes if compress_min_bytes is not None else \
+            int(os.environ.get('PLATFORM_HTTP_GZIP_MIN_BYTES', 1024))
+        self._session = None
+        self._uncompressed_urls = set()
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def _delay(self, attempt, response=None):
+        delay = retry_after_seconds(response) if response is not None else None
+        if delay is None:
+            delay = self.backoff * 2 ** attempt
+        return min(delay, self.max_retry_after)
+
+    def _encode(self, url, headers, data, compress):
+        if not compress or data is None or url in self._uncompressed_urls:
+            return headers, data, False
+        body = data.encode('utf-8') if isinstance(data, str) else data
+        if len(body) < self.compress_min_bytes:
+            return headers, data, False
+        return {**headers, 'Content-Encoding': 'gzip'}, gzip.compress(body, compresslevel=5), True
+
+    def request(self, method, url, headers=None, data=None, timeout=None, compress=False,
+                retry_statuses=RETRY_STATUSES, on_retry=None, **kwargs):
+        """Send the request and return the final response.
+
+        on_retry(status_code, delay), if given, is called before each retry;
+        status_code is None when the retry follows a connection error or timeout.
+        """
+        headers = dict(headers or {})
+        timeout = timeout or (self.connect_timeout, self.read_timeout)
+        attempt = 0
+        while True:
+            send_headers, body, compressed = self._encode(url, headers, data, compress)
+            try:
+                response = self.session.request(method, url, headers=send_headers, data=body, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                retryable = not isinstance(e, requests.exceptions.ReadTimeout) or method.upper() in IDEMPOTENT_METHODS
+                if not retryable or attempt >= self.retries:
+                    raise
+                delay, status_code = self._delay(attempt), None
+                logging.warning(f"{method} {url} failed: {e}; retrying in {delay:.1f}s.")
+            else:
+                if compressed and response.status_code == 415:
+                    logging.info(f"{url} does not accept gzip request bodies; sending them uncompressed.")
+                    self._uncompressed_urls.add(url)
+                    continue
+                if response.status_code not in retry_statuses or attempt >= self.retries:
+                    return response
+                delay, status_code = self._delay(attempt, response), response.status_code
+                logging.warning(f"{method} {url} returned {status_code}; retrying in {delay:.1f}s.")
+
+            if on_retry is not None:
+                on_retry(status_code, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+platform_client = PlatformHttpClient()
@@ -0,0 +1,110 @@
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+from app.metrics import pipeline_metrics
+from app.query_registry import queries
+
+
+def iter_query_batches(connection, query, params=None, itersize=None, server_side=None):
+    """Yield query results as lists of row tuples, at most itersize rows at a time.
+
+    With server_side the rows come from a named cursor, so Postgres keeps the result
+    set and psycopg2 only holds one batch in memory instead of the whole result.
+    """
+    itersize = itersize or int(os.environ.get('QUERY_SERVICE_ITERSIZE', 2000))
+    if server_side is None:
+        server_side = os.environ.get('QUERY_SERVICE_SERVER_SIDE_CURSOR', 'true').lower() == 'true'
+    cursor_name = f'gdpr_{uuid4().hex}' if server_side else None
+
+    with connection.cursor(name=cursor_name) as cursor:
+        cursor.itersize = itersize
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(itersize)
+            if not rows:
+                break
+            yield rows
+
+
+class ProfileStoreLookup:
+    """Looks up which SPIDs exist in the profile snapshot, in parameterized batches.
+
+    Batches run in parallel, each on a connection borrowed from a small pool
+    built with the supplied connect callable.
+    """
+
+    def __init__(self, connect, batch_size=None, workers=None):
+        self.connect = connect
+        self.batch_size = batch_size or int(os.environ.get('PROFILE_STORE_LOOKUP_BATCH_SIZE', 1000))
+        self.workers = workers or int(os.environ.get('PROFILE_STORE_LOOKUP_WORKERS', 2))
+        self.query = queries['profile_store_table'].sql()
+        self._idle = queue.LifoQueue()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _borrow(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            connection = self.connect()
+            with self._lock:
+                self._connections.append(connection)
+            return connection
+
+    def _discard(self, connection):
+        with self._lock:
+            self._connections.remove(connection)
+        try:
+            connection.close()
+        except Exception as e:
+            logging.warning(f"Error closing profile store connection: {e}")
+
+    def _lookup_batch(self, batch_number, batch):
+        start_time = time.time()
+        connection = self._borrow()
+        try:
+            with pipeline_metrics.timed('query_service_lookup', rows=len(batch)):
+                found = []
+                for rows in iter_query_batches(connection, self.query, {'spids': tuple(batch)}):
+                    found.extend(row[0] for row in rows)
+                # End the read transaction so the server can release the cursor's resources.
+                connection.rollback()
+        except Exception:
+            self._discard(connection)
+            raise
+        self._idle.put(connection)
+        logging.info(f"Profile store batch {batch_number}: {len(found)} of {len(batch)} SPIDs found in {time.time() - start_time:.3f} seconds")
+        return found
+
+    def lookup(self, spids):
+        spids = list(dict.fromkeys(spids))
+        batches = [spids[start:start + self.batch_size] for start in range(0, len(spids), self.batch_size)]
+        if self.workers <= 1 or len(batches) <= 1:
+            results = [self._lookup_batch(number, batch) for number, batch in enumerate(batches, 1)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches)), thread_name_prefix='profile-lookup') as executor:
+                results = list(executor.map(self._lookup_batch, range(1, len(batches) + 1), batches))
+
+        found = []
+        for batch_found in results:
+            found.extend(batch_found)
+        return found
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as e:
+                logging.warning(f"Error closing profile store connection: {e}")
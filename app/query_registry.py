@@ -0,0 +1,95 @@
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+QUERY_DIRECTORY = Path(__file__).resolve().parent / 'sql_queries'
+
+# Databricks SQL named parameter markers (:name) and psycopg2 pyformat markers (%(name)s).
+NAMED_PARAMETER = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+PYFORMAT_PARAMETER = re.compile(r"%\(([A-Za-z_]\w*)\)s")
+# {NAME} placeholders are for identifiers such as dataset names, which drivers cannot bind.
+IDENTIFIER_PLACEHOLDER = re.compile(r"\{([A-Z_][A-Z0-9_]*)\}")
+
+
+@dataclass(frozen=True)
+class Query:
+    name: str
+    text: str
+    paramstyle: str
+    parameters: tuple
+    identifiers: tuple
+
+    def sql(self):
+        """Return the statement with identifier placeholders filled from the environment."""
+        if not self.identifiers:
+            return self.text
+        values = {}
+        for identifier in self.identifiers:
+            value = os.environ.get(identifier)
+            if not value:
+                raise EnvironmentError(f"Query '{self.name}' needs the {identifier} environment variable.")
+            values[identifier] = value
+        return IDENTIFIER_PLACEHOLDER.sub(lambda match: values[match.group(1)], self.text)
+
+    def bind(self, **params):
+        """Return (statement, parameters) for cursor.execute, checking the parameter names."""
+        missing = set(self.parameters) - params.keys()
+        unexpected = params.keys() - set(self.parameters)
+        if missing or unexpected:
+            raise ValueError(f"Query '{self.name}' takes parameters {sorted(self.parameters)}, "
+                             f"got {sorted(params)}.")
+        return self.sql(), (params or None)
+
+
+class QueryRegistry:
+    """Loads the .sql templates once and hands out named, parameterized queries.
+
+    A template uses either Databricks named markers (:name) or psycopg2 markers
+    (%(name)s), never both; the style is detected from the text.
+    """
+
+    def __init__(self, directory=QUERY_DIRECTORY):
+        self.directory = Path(directory)
+        self._queries = None
+
+    def _parse(self, name, text):
+        text = text.strip()
+        named = tuple(dict.fromkeys(NAMED_PARAMETER.findall(text)))
+        pyformat = tuple(dict.fromkeys(PYFORMAT_PARAMETER.findall(text)))
+        if named and pyformat:
+            raise ValueError(f"Query '{name}' mixes :name and %(name)s parameter markers.")
+        identifiers = tuple(dict.fromkeys(IDENTIFIER_PLACEHOLDER.findall(text)))
+        leftover = IDENTIFIER_PLACEHOLDER.sub('', text)
+        if re.search(r"\{[^}]*\}", leftover):
+            raise ValueError(f"Query '{name}' has str.format placeholders; use bound parameters instead.")
+        return Query(
+            name=name,
+            text=text,
+            paramstyle='pyformat' if pyformat else 'named',
+            parameters=pyformat or named,
+            identifiers=identifiers,
+        )
+
+    def load(self):
+        """Read and validate every template; called at app startup and on first use."""
+        self._queries = {path.stem: self._parse(path.stem, path.read_text())
+                         for path in sorted(self.directory.glob('*.sql'))}
+        return self._queries
+
+    def get(self, name):
+        queries = self._queries if self._queries is not None else self.load()
+        try:
+            return queries[name]
+        except KeyError:
+            raise KeyError(f"No query named '{name}' in {self.directory}") from None
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def names(self):
+        queries = self._queries if self._queries is not None else self.load()
+        return sorted(queries)
+
+
+queries = QueryRegistry()
@@ -0,0 +1,223 @@
+import os
+import time
+import socket
+import threading
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+import numpy as np
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app.models import db, RunLease
+from app.checkpoints import ensure_checkpoint_tables
+from app.submitted_index import hash_spids
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def time_slot(minutes, now=None):
+    """Start of the UTC interval of the given length that now falls in, e.g. 10:30 for 10:47 with 30 minutes."""
+    now = now or utcnow()
+    seconds = int(minutes * 60)
+    return datetime.fromtimestamp(int(now.replace(tzinfo=timezone.utc).timestamp()) // seconds * seconds,
+                                  timezone.utc).replace(tzinfo=None)
+
+
+def process_owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class LeaseLock:
+    """Lease on a named run, held in the run_leases table of the app database.
+
+    Acquiring is a single insert or conditional update, so across any number
+    of processes at most one holds the lease at a time. The holder renews it
+    from a heartbeat thread; if the holder dies the lease expires after ttl
+    seconds (GDPR_RUN_LEASE_SECONDS) and another process may take it. A
+    lease released as completed can never be acquired again.
+    """
+
+    def __init__(self, name, owner=None, ttl=None):
+        self.name = name
+        self.owner = owner or process_owner()
+        self.ttl = ttl or float(os.environ.get('GDPR_RUN_LEASE_SECONDS', 900))
+        self._stop = threading.Event()
+        self._heartbeat = None
+        ensure_checkpoint_tables()
+
+    def _update(self, *conditions, **values):
+        table = RunLease.__table__
+        try:
+            result = db.session.execute(table.update().where(table.c.name == self.name, *conditions).values(**values))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return result.rowcount == 1
+
+    def acquire(self):
+        now = utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        try:
+            db.session.add(RunLease(name=self.name, owner=self.owner, acquired_at=now, expires_at=expires_at))
+            db.session.commit()
+            acquired = True
+        except IntegrityError:
+            db.session.rollback()
+            table = RunLease.__table__
+            acquired = self._update(
+                table.c.completed_at.is_(None), or_(table.c.expires_at < now, table.c.owner == self.owner),
+                owner=self.owner, acquired_at=now, expires_at=expires_at
+            )
+        if acquired:
+            logging.info(f"{self.owner} acquired run lease {self.name} until {expires_at}.")
+        return acquired
+
+    def renew(self):
+        table = RunLease.__table__
+        return self._update(table.c.owner == self.owner, expires_at=utcnow() + timedelta(seconds=self.ttl))
+
+    def release(self, completed=False):
+        """Give the lease up; a completed run stays recorded so no other process repeats it."""
+        table = RunLease.__table__
+        now = utcnow()
+        values = {'completed_at': now} if completed else {'expires_at': now}
+        self._update(table.c.owner == self.owner, **values)
+        logging.info(f"{self.owner} released run lease {self.name}{' as completed' if completed else ''}.")
+
+    def holder(self):
+        """Return the owner of the lease if it is held and not yet expired or completed, else None."""
+        owner = db.session.query(RunLease.owner).filter(
+            RunLease.name == self.name, RunLease.completed_at.is_(None), RunLease.expires_at >= utcnow()
+        ).scalar()
+        db.session.rollback()
+        return owner
+
+    def completed(self):
+        completed_at = db.session.query(RunLease.completed_at).filter_by(name=self.name).scalar()
+        # End the read transaction so the next poll sees other processes' commits.
+        db.session.rollback()
+        return completed_at is not None
+
+    def start_heartbeat(self):
+        app = current_app._get_current_object()
+
+        def beat():
+            with app.app_context():
+                while not self._stop.wait(self.ttl / 3):
+                    try:
+                        if not self.renew():
+                            logging.error(f"{self.owner} lost run lease {self.name}.")
+                            return
+                    except Exception as e:
+                        logging.warning(f"Could not renew run lease {self.name}: {e}")
+                    finally:
+                        db.session.remove()
+
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=beat, name=f'lease-{self.name}', daemon=True)
+        self._heartbeat.start()
+
+    def stop_heartbeat(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of count disjoint slices of a date's SPIDs, picked by SPID hash."""
+    index: int
+    count: int
+
+    def select(self, df, column='singl_profl_id'):
+        if self.count <= 1 or df.empty:
+            return df
+        in_shard = hash_spids(df[column]) % np.uint64(self.count) == self.index
+        return df[in_shard].reset_index(drop=True)
+
+    def __str__(self):
+        return f"{self.index + 1}/{self.count}"
+
+
+class RunCoordinator:
+    """Makes sure each scheduled run happens once across every process running the scheduler.
+
+    With shard_count (GDPR_SHARD_COUNT) above 1, up to that many processes each
+    work on one shard of the run at a time and submit its SPIDs in parallel.
+    """
+
+    def __init__(self, shard_count=None, ttl=None, wait_timeout=None, poll_interval=None):
+        self.shard_count = shard_count or int(os.environ.get('GDPR_SHARD_COUNT', 1))
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout or float(os.environ.get('GDPR_RUN_WAIT_SECONDS', 3600))
+        self.poll_interval = poll_interval or float(os.environ.get('GDPR_RUN_WAIT_POLL_SECONDS', 15))
+
+    @staticmethod
+    def _run_held(lock, step):
+        lock.start_heartbeat()
+        completed = False
+        try:
+            step()
+            completed = True
+        finally:
+            lock.stop_heartbeat()
+            lock.release(completed=completed)
+
+    def run_shards(self, run_name, run_date, work):
+        """Call work(shard) for each shard of the run this process claims, until every shard is done.
+
+        A process keeps claiming shards that nobody holds or whose owner's lease
+        expired, so a run still finishes with fewer processes than shards or when
+        an owner dies. Shards held by live processes are waited for, at most
+        wait_timeout seconds without progress. Returns the number of shards run here.
+        """
+        locks = [LeaseLock(f"{run_name}:{run_date}:shard-{index + 1}-of-{self.shard_count}", ttl=self.ttl)
+                 for index in range(self.shard_count)]
+        ran = 0
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            pending = [index for index, lock in enumerate(locks) if not lock.completed()]
+            if not pending:
+                return ran
+            for index in pending:
+                if locks[index].acquire():
+                    shard = Shard(index, self.shard_count)
+                    self._run_held(locks[index], lambda: work(shard))
+                    ran += 1
+                    deadline = time.monotonic() + self.wait_timeout
+                    break
+            else:
+                if time.monotonic() >= deadline:
+                    logging.warning(f"Stopped waiting for {len(pending)} shards of {run_name} for {run_date} "
+                                    f"held by other processes after {self.wait_timeout} seconds.")
+                    return ran
+                time.sleep(self.poll_interval)
+
+    def once(self, step_name, run_date, step, wait=True):
+        """Run step() in one process for run_date while the others wait for it to finish.
+
+        Returns True in the process that ran it. If that process fails or dies
+        before finishing, a waiting process takes the step over. Without wait
+        the other processes return False straight away instead.
+        """
+        lock = LeaseLock(f"{step_name}:{run_date}", ttl=self.ttl)
+        deadline = time.monotonic() + self.wait_timeout
+        while not lock.completed():
+            if lock.acquire():
+                self._run_held(lock, step)
+                return True
+            if not wait:
+                return False
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out after {self.wait_timeout} seconds waiting for {step_name} for {run_date}.")
+            time.sleep(self.poll_interval)
+        return False
+
+
+run_coordinator = RunCoordinator()
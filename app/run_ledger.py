@@ -0,0 +1,83 @@
+import logging
+from datetime import date, datetime
+from uuid import uuid4
+from flask import has_app_context
+from app.models import db, DeletionRunLedger
+from app.checkpoints import ensure_checkpoint_tables
+
+COMPLETED = 'completed'
+PARTIAL = 'partial'
+FAILED = 'failed'
+
+
+def summarize_results(results):
+    """Count the records of a date's chunk results that were accepted, failed or not started.
+
+    A chunk the privacy service gave a request id counts as submitted even if a later
+    step such as the Delta write failed, the same way checkpoints treat it.
+    """
+    summary = {'submitted': 0, 'failed': 0, 'skipped': 0}
+    for result in results:
+        records = result.end - result.start
+        if result.success or result.request_id:
+            summary['submitted'] += records
+        elif result.skipped:
+            summary['skipped'] += records
+        else:
+            summary['failed'] += records
+    return summary
+
+
+def run_status(records_pending, summary):
+    if summary['failed']:
+        return FAILED
+    if records_pending - summary['submitted']:
+        return PARTIAL
+    return COMPLETED
+
+
+class RunLedger:
+    """Writes one deletion_run_ledger row per date a budgeted nightly run works on."""
+
+    def __init__(self, record_budget=None, time_budget=None, shard=None):
+        self.run_id = str(uuid4())
+        self.run_date = date.today()
+        self.record_budget = record_budget
+        self.time_budget = time_budget
+        self.shard = shard
+        ensure_checkpoint_tables()
+
+    @classmethod
+    def start(cls, record_budget=None, time_budget=None, shard=None):
+        """Return a ledger for a new run, or None outside an application context."""
+        if not has_app_context():
+            return None
+        return cls(record_budget, time_budget, shard)
+
+    def record(self, delete_date, records_pending, summary, started_at):
+        if isinstance(delete_date, datetime):
+            delete_date = delete_date.date()
+        elif isinstance(delete_date, str):
+            delete_date = date.fromisoformat(delete_date)
+        status = run_status(records_pending, summary)
+        try:
+            db.session.add(DeletionRunLedger(
+                run_id=self.run_id,
+                run_date=self.run_date,
+                delete_date=delete_date,
+                record_budget=self.record_budget,
+                time_budget_seconds=self.time_budget,
+                records_pending=records_pending,
+                records_submitted=summary['submitted'],
+                records_failed=summary['failed'],
+                records_carried_over=records_pending - summary['submitted'],
+                shard=self.shard,
+                status=status,
+                started_at=started_at,
+                finished_at=datetime.now(),
+            ))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error writing run ledger for {delete_date}: {e}", exc_info=True)
+        return status
@@ -0,0 +1,128 @@
+import os
+import atexit
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+
+def __getattr__(name):
+    # databricks-connect brings in pyspark and the Databricks SDK, so it is only
+    # imported when a session is first built rather than when the app starts.
+    if name == 'DatabricksSession':
+        from databricks.connect import DatabricksSession
+        return DatabricksSession
+    if name == 'DatabricksConfig':
+        from databricks.sdk.core import Config as DatabricksConfig
+        return DatabricksConfig
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class SparkSessionManager:
+    """Shares one Databricks Connect session across the writes of a run.
+
+    Outside a run every caller gets its own session that is stopped afterwards,
+    which is the behaviour the write helpers always had.
+    """
+
+    def __init__(self, health_check_interval=None):
+        if health_check_interval is None:
+            health_check_interval = float(os.environ.get('SPARK_SESSION_HEALTH_CHECK_INTERVAL', 60))
+        self.health_check_interval = health_check_interval
+        self._spark = None
+        self._last_checked = 0
+        self._active_runs = 0
+        self._lock = threading.RLock()
+        self.stats = {
+            'acquisitions': 0,
+            'reconnects': 0,
+            'last_acquisition_seconds': 0.0,
+            'total_acquisition_seconds': 0.0,
+        }
+
+    def _build(self):
+        from databricks.connect import DatabricksSession
+        from databricks.sdk.core import Config as DatabricksConfig
+
+        start_time = time.time()
+        config = DatabricksConfig(
+            host=f'https://{os.environ.get("DATABRICKS_SERVER_HOSTNAME")}',
+            token=os.environ.get("DATABRICKS_TOKEN"),
+            cluster_id=os.environ.get('DATABRICKS_CLUSTER_ID')
+        )
+        spark = DatabricksSession.builder.sdkConfig(config).getOrCreate()
+        elapsed = time.time() - start_time
+
+        with self._lock:
+            self.stats['acquisitions'] += 1
+            self.stats['last_acquisition_seconds'] = elapsed
+            self.stats['total_acquisition_seconds'] += elapsed
+        logging.info(f"Spark session acquired in {elapsed:.3f} seconds.")
+        return spark
+
+    def _is_alive(self, spark):
+        try:
+            spark.sql("SELECT 1").collect()
+            return True
+        except Exception as e:
+            logging.warning(f"Spark session health check failed: {e}")
+            return False
+
+    def get(self):
+        """Return the shared session, reconnecting if the cluster dropped it."""
+        with self._lock:
+            if self._spark is None:
+                self._spark = self._build()
+                self._last_checked = time.monotonic()
+            elif time.monotonic() - self._last_checked >= self.health_check_interval:
+                if not self._is_alive(self._spark):
+                    logging.info("Reconnecting Spark session.")
+                    self._stop_session(self._spark)
+                    self._spark = self._build()
+                    self.stats['reconnects'] += 1
+                self._last_checked = time.monotonic()
+            return self._spark
+
+    @contextmanager
+    def run(self):
+        """Keep one shared session open until the outermost run exits."""
+        with self._lock:
+            self._active_runs += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._active_runs -= 1
+                if self._active_runs == 0:
+                    self.stop()
+
+    @contextmanager
+    def session(self):
+        with self._lock:
+            in_run = self._active_runs > 0
+        if in_run:
+            yield self.get()
+            return
+
+        spark = self._build()
+        try:
+            yield spark
+        finally:
+            self._stop_session(spark)
+
+    def _stop_session(self, spark):
+        try:
+            spark.stop()
+        except Exception as e:
+            logging.warning(f"Error stopping Spark session: {e}")
+
+    def stop(self):
+        with self._lock:
+            spark, self._spark = self._spark, None
+        if spark is not None:
+            self._stop_session(spark)
+            logging.info(f"Spark session stopped. Session stats: {self.stats}")
+
+
+spark_sessions = SparkSessionManager()
+atexit.register(spark_sessions.stop)
@@ -0,0 +1,72 @@
+import os
+import time
+import logging
+import resource
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from app.metrics import pipeline_metrics
+
+MB = 1024 * 1024
+ARROW_STRINGS = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}
+
+
+def rss_bytes():
+    """Current resident set size of the process, or the peak where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def log_memory(label):
+    logging.info(f"{label}: RSS {rss_bytes() / MB:.1f} MB, Arrow {pa.total_allocated_bytes() / MB:.1f} MB")
+
+
+@contextmanager
+def memory_stage(stage, rows=0):
+    """Time a stage like pipeline_metrics.timed and log its RSS and Arrow memory use."""
+    rss_before = rss_bytes()
+    start_time = time.perf_counter()
+    with pipeline_metrics.timed(stage, rows=rows) as timing:
+        yield timing
+    rss_after = rss_bytes()
+    logging.info(f"Stage {stage}: {timing.rows} rows in {time.perf_counter() - start_time:.3f}s, "
+                 f"RSS {rss_after / MB:.1f} MB ({(rss_after - rss_before) / MB:+.1f} MB), "
+                 f"Arrow {pa.total_allocated_bytes() / MB:.1f} MB")
+
+
+def to_arrow(daily_run):
+    """Return the daily run as an Arrow table; its strings live in one buffer instead of one object each."""
+    if isinstance(daily_run, pa.Table):
+        return daily_run
+    return pa.Table.from_pandas(daily_run, preserve_index=False)
+
+
+def unique_spids(daily_run):
+    return pc.unique(to_arrow(daily_run).column('singl_profl_id')).to_pylist()
+
+
+def user_deletion_rows(profile_spids, daily_run, execution_date):
+    """Return the daily-run rows whose SPID is among profile_spids, shaped for gdpr_user_deletions.
+
+    Membership is a hash-set lookup of the daily run's SPID column against the
+    found SPIDs, done in Arrow. The string columns of the result stay Arrow-backed
+    (string[pyarrow]) rather than becoming one Python object per value.
+    """
+    daily_run = to_arrow(daily_run)
+    with memory_stage('spid_join', rows=daily_run.num_rows):
+        found = profile_spids if isinstance(profile_spids, pa.Array) else pa.array(profile_spids, pa.string())
+        matches = daily_run.filter(pc.is_in(daily_run.column('singl_profl_id'), value_set=found))
+        dates = pa.array(np.full(matches.num_rows, execution_date, dtype='datetime64[D]'), pa.date32())
+        user_deletion = pa.table({
+            'singl_profl_id': matches.column('singl_profl_id'),
+            'execution_date': dates,
+            'wallet_id': matches.column('wallet_id'),
+            'deletion_date': dates,
+            'deletion_flag': np.zeros(matches.num_rows, dtype=bool),
+        }).to_pandas(types_mapper=ARROW_STRINGS.get)
+    return user_deletion
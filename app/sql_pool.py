@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+
+def __getattr__(name):
+    # The SQL connector is imported on the first connection, not at app start.
+    if name == 'sql':
+        from databricks import sql
+        return sql
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class DatabricksSqlPool:
+    """Bounded pool of databricks.sql connections shared by the query helpers."""
+
+    def __init__(self, max_size=None, idle_timeout=None, acquire_timeout=None, ping_after=None):
+        self.max_size = max_size or int(os.environ.get('DATABRICKS_SQL_POOL_MAX_SIZE', 4))
+        self.idle_timeout = idle_timeout or float(os.environ.get('DATABRICKS_SQL_POOL_IDLE_TIMEOUT', 300))
+        self.acquire_timeout = acquire_timeout or float(os.environ.get('DATABRICKS_SQL_POOL_ACQUIRE_TIMEOUT', 30))
+        # Connections idle for longer than this are pinged before being handed out.
+        self.ping_after = ping_after or float(os.environ.get('DATABRICKS_SQL_POOL_PING_AFTER', 60))
+        self._idle = []
+        self._open = 0
+        self._condition = threading.Condition()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'wait_seconds': 0.0}
+
+    def _connect(self):
+        from databricks import sql
+
+        return sql.connect(
+            server_hostname=os.environ.get("DATABRICKS_SERVER_HOSTNAME"),
+            http_path=os.environ.get("DATABRICKS_HTTP_PATH"),
+            access_token=os.environ.get("DATABRICKS_TOKEN")
+        )
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception as e:
+            logging.warning(f"Error closing Databricks SQL connection: {e}")
+
+    def _is_healthy(self, connection, idle_for):
+        if not getattr(connection, 'open', True):
+            return False
+        if idle_for < self.ping_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            return True
+        except Exception as e:
+            logging.warning(f"Databricks SQL connection failed health check: {e}")
+            return False
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        expired = [item for item in self._idle if now - item[1] >= self.idle_timeout]
+        self._idle = [item for item in self._idle if now - item[1] < self.idle_timeout]
+        for connection, _ in expired:
+            self._open -= 1
+            self._stats['evictions'] += 1
+            self._close(connection)
+
+    def _acquire(self):
+        start_time = time.monotonic()
+        deadline = start_time + self.acquire_timeout
+        while True:
+            candidate = None
+            with self._condition:
+                self._evict_idle()
+                if self._idle:
+                    candidate = self._idle.pop()
+                elif self._open < self.max_size:
+                    self._open += 1
+                    self._stats['misses'] += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Timed out waiting for a Databricks SQL connection after {self.acquire_timeout} seconds.")
+                    self._condition.wait(remaining)
+                    continue
+
+            if candidate is None:
+                break
+
+            # Health checks run outside the lock so a slow ping doesn't block other callers.
+            connection, last_used = candidate
+            if self._is_healthy(connection, time.monotonic() - last_used):
+                with self._condition:
+                    self._stats['hits'] += 1
+                    self._stats['wait_seconds'] += time.monotonic() - start_time
+                return connection
+            self._release(connection, discard=True)
+
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._stats['wait_seconds'] += time.monotonic() - start_time
+        return connection
+
+    def _release(self, connection, discard=False):
+        with self._condition:
+            if discard:
+                self._open -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+        if discard:
+            self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded instead of returned if the caller raises."""
+        connection = self._acquire()
+        try:
+            yield connection
+        except BaseException:
+            self._release(connection, discard=True)
+            raise
+        self._release(connection)
+
+    def stats(self):
+        with self._condition:
+            return dict(self._stats, open=self._open, idle=len(self._idle), max_size=self.max_size)
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            self._close(connection)
+
+
+databricks_sql_pool = DatabricksSqlPool()
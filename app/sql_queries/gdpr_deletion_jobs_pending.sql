@@ -0,0 +1 @@
+SELECT jobId, status FROM custanwo.customer_transformation.gdpr_deletion_jobs WHERE status IS NULL OR status NOT IN ('complete', 'error') ORDER BY execution_date LIMIT :limit
\ No newline at end of file
@@ -0,0 +1 @@
+SELECT execution_date, COUNT(singl_profl_id) AS cnt FROM custanwo.customer_transformation.gdpr_user_deletions WHERE deletion_flag = false AND execution_date <= :delete_date GROUP BY execution_date ORDER BY execution_date
\ No newline at end of file
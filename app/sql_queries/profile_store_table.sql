@@ -1 +1 @@
-SELECT DISTINCT _WALMARTASDA.SINGLEPROFILEID singl_profl_id FROM {PROFILE_SNAPSHOT_DATASET} WHERE  _WALMARTASDA.SINGLEPROFILEID IN ({SINGLEPROFILEID_LIST}) 
\ No newline at end of file
+SELECT DISTINCT _WALMARTASDA.SINGLEPROFILEID singl_profl_id FROM {PROFILE_SNAPSHOT_DATASET} WHERE  _WALMARTASDA.SINGLEPROFILEID IN %(spids)s 
\ No newline at end of file
@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import logging
+from datetime import date, datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yaml
+from app.sql_pool import databricks_sql_pool
+from app.metrics import pipeline_metrics
+
+SPARK = 'spark'
+SQL = 'sql'
+BACKENDS_CONFIG = Path(__file__).resolve().parent / 'configs' / 'delta_write_backends.yml'
+IDENTIFIER = re.compile(r"^[A-Za-z_]\w*$")
+
+
+def quote_identifier(name):
+    """Backtick-quote a (possibly dotted) table or column name, rejecting anything but word characters."""
+    parts = str(name).split('.')
+    if not all(IDENTIFIER.match(part) for part in parts):
+        raise ValueError(f"'{name}' is not a valid table or column name.")
+    return '.'.join(f'`{part}`' for part in parts)
+
+
+def to_parameter(value):
+    """Convert a pandas cell into a value the SQL connector can bind."""
+    if isinstance(value, (dict, list, tuple, set, np.ndarray)):
+        raise TypeError(f"Nested value {value!r} cannot be bound as a SQL parameter; use the spark backend.")
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class WriteBackends:
+    """Which write path each Delta table uses, read from configs/delta_write_backends.yml.
+
+    A table maps either to one backend or to a backend per operation
+    (write, merge). Tables not listed use DELTA_WRITE_BACKEND, spark by default.
+    """
+
+    def __init__(self, path=BACKENDS_CONFIG, default=None):
+        self.path = Path(path)
+        self.default = default or os.environ.get('DELTA_WRITE_BACKEND', SPARK)
+        self._tables = None
+
+    def load(self):
+        tables = yaml.safe_load(self.path.read_text()) if self.path.exists() else None
+        self._tables = tables or {}
+        return self._tables
+
+    def backend(self, table_name, operation):
+        tables = self._tables if self._tables is not None else self.load()
+        backend = tables.get(table_name, self.default)
+        if isinstance(backend, dict):
+            backend = backend.get(operation, self.default)
+        if backend not in (SPARK, SQL):
+            raise ValueError(f"Unknown write backend '{backend}' for table '{table_name}'.")
+        return backend
+
+
+def column_type(series):
+    """Spark SQL type of a pandas column, for the schema the rows are parsed with."""
+    if pd.api.types.is_bool_dtype(series):
+        return 'BOOLEAN'
+    if pd.api.types.is_integer_dtype(series):
+        return 'BIGINT'
+    if pd.api.types.is_float_dtype(series):
+        return 'DOUBLE'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'TIMESTAMP'
+    value = next((value for value in series if to_parameter(value) is not None), None)
+    if isinstance(value, (bool, np.bool_)):
+        return 'BOOLEAN'
+    if isinstance(value, (int, np.integer)):
+        return 'BIGINT'
+    if isinstance(value, (float, np.floating)):
+        return 'DOUBLE'
+    if isinstance(value, datetime):
+        return 'TIMESTAMP'
+    if isinstance(value, date):
+        return 'DATE'
+    return 'STRING'
+
+
+class SqlWarehouseWriter:
+    """Appends and merges pandas DataFrames into Delta tables over the databricks.sql connector.
+
+    Each write is one INSERT or MERGE statement, so no Spark session is needed
+    and the write is atomic. The rows travel as a single JSON parameter that the
+    statement expands with inline(from_json(...)), so the row count is not bound
+    by the warehouse's limit on the number of parameters. The JSON is at most
+    max_payload_bytes (DATABRICKS_SQL_MAX_PAYLOAD_BYTES); check fits() and send
+    bigger DataFrames through Spark.
+    """
+
+    def __init__(self, pool=databricks_sql_pool, max_payload_bytes=None):
+        self.pool = pool
+        self.max_payload_bytes = max_payload_bytes or int(os.environ.get('DATABRICKS_SQL_MAX_PAYLOAD_BYTES', 4 * 1024 * 1024))
+
+    @staticmethod
+    def _payload(dataframe):
+        rows = [[to_parameter(value) for value in row] for row in dataframe.astype(object).itertuples(index=False, name=None)]
+        return json.dumps([dict(zip(dataframe.columns, row)) for row in rows], separators=(',', ':'),
+                          default=lambda value: value.isoformat())
+
+    def fits(self, dataframe):
+        """Whether the rows of dataframe can be sent in a single statement."""
+        try:
+            return len(self._payload(dataframe).encode('utf-8')) <= self.max_payload_bytes
+        except TypeError:
+            return False
+
+    def _rows(self, dataframe):
+        """Return a SELECT of dataframe's rows and its parameters."""
+        payload = self._payload(dataframe)
+        if len(payload.encode('utf-8')) > self.max_payload_bytes:
+            raise ValueError(f"{len(dataframe)} rows do not fit in one statement of {self.max_payload_bytes} bytes.")
+        schema = ', '.join(f"{quote_identifier(column)}: {column_type(dataframe[column])}" for column in dataframe.columns)
+        return f"SELECT inline(from_json(:rows, 'ARRAY<STRUCT<{schema}>>'))", {'rows': payload}
+
+    def _execute(self, statement, params):
+        with self.pool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute(statement, params)
+
+    def insert_statement(self, dataframe, table_name):
+        columns = ', '.join(quote_identifier(column) for column in dataframe.columns)
+        rows, params = self._rows(dataframe)
+        return f"INSERT INTO {quote_identifier(table_name)} ({columns}) {rows}", params
+
+    def merge_statement(self, dataframe, table_name, match_column, update_columns):
+        # MERGE fails if a target row matches more than one source row.
+        dataframe = dataframe[[match_column, *update_columns]].drop_duplicates(match_column, keep='last')
+        match = quote_identifier(match_column)
+        updates = ', '.join(f"tgt.{quote_identifier(column)} = src.{quote_identifier(column)}" for column in update_columns)
+        rows, params = self._rows(dataframe)
+        return (f"MERGE INTO {quote_identifier(table_name)} AS tgt USING ({rows}) AS src "
+                f"ON tgt.{match} = src.{match} WHEN MATCHED THEN UPDATE SET {updates}"), params
+
+    def write(self, dataframe, table_name):
+        with pipeline_metrics.timed('delta_write', rows=len(dataframe)) as timing:
+            try:
+                self._execute(*self.insert_statement(dataframe, table_name))
+                logging.info(f"Data successfully written to table '{table_name}' over SQL.")
+                return True
+            except Exception as e:
+                logging.error(f"Error writing data to table '{table_name}' over SQL: {str(e)}")
+                timing.error = True
+                return False
+
+    def merge(self, dataframe, table_name, match_column, update_columns):
+        with pipeline_metrics.timed('delta_merge', rows=len(dataframe)) as timing:
+            try:
+                self._execute(*self.merge_statement(dataframe, table_name, match_column, update_columns))
+                logging.info(f"Data successfully merged into table '{table_name}' over SQL.")
+                return True
+            except Exception as e:
+                logging.error(f"Error merging data into table '{table_name}' over SQL: {str(e)}")
+                timing.error = True
+                return False
+
+
+write_backends = WriteBackends()
+sql_writer = SqlWarehouseWriter()
@@ -0,0 +1,90 @@
+import os
+import threading
+import weakref
+import logging
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from app.models import db, DeletionChunk, DeletionJob
+from app.checkpoints import ensure_checkpoint_tables
+
+
+def hash_spids(spids):
+    """Stable 64-bit hashes of SPIDs, computed vectorised by pandas."""
+    return pd.util.hash_array(np.asarray(spids, dtype=object))
+
+
+class SubmittedSpidIndex:
+    """Membership index of SPIDs the privacy service has accepted a job for.
+
+    The index is a sorted array of 64-bit SPID hashes, about 8 bytes per SPID,
+    loaded lazily from the deletion_jobs table and topped up with rows added
+    since the last load. Hash matches are confirmed against the table, joined
+    to the chunk checkpoints of the date asked about, before a SPID is treated
+    as submitted, so neither a collision nor a job from another date can skip
+    a deletion.
+    """
+
+    def __init__(self, confirm_batch_size=None):
+        self.confirm_batch_size = confirm_batch_size or int(os.environ.get('GDPR_SUBMITTED_INDEX_CONFIRM_BATCH', 500))
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._watermark = None
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        engine = db.engine
+        if self._engine is None or self._engine() is not engine:
+            ensure_checkpoint_tables()
+            self._hashes = np.empty(0, dtype=np.uint64)
+            self._watermark = None
+            self._engine = weakref.ref(engine)
+
+        query = db.session.query(DeletionJob.user_key, DeletionJob.created_at)
+        if self._watermark is not None:
+            query = query.filter(DeletionJob.created_at >= self._watermark)
+        rows = query.all()
+        if not rows:
+            return
+        user_keys, created = zip(*rows)
+        self._hashes = np.union1d(self._hashes, hash_spids(user_keys))
+        timestamps = [created_at for created_at in created if created_at is not None]
+        if timestamps:
+            # created_at may only have second resolution, so the next load starts a second
+            # early and reads those rows again; the union drops the duplicates.
+            self._watermark = max(timestamps) - timedelta(seconds=1)
+        logging.info(f"Submitted SPID index holds {len(self._hashes)} SPIDs after loading {len(rows)} job rows.")
+
+    def _candidates(self, spids):
+        hashes = hash_spids(spids)
+        positions = np.searchsorted(self._hashes, hashes)
+        found = positions < len(self._hashes)
+        found[found] = self._hashes[positions[found]] == hashes[found]
+        return [spid for spid, hit in zip(spids, found) if hit]
+
+    def submitted(self, spids, delete_date):
+        """Return {spid: request_id} for the SPIDs in spids with a job accepted in a chunk of delete_date."""
+        if isinstance(delete_date, str):
+            delete_date = date.fromisoformat(delete_date)
+        spids = list(spids)
+        with self._lock:
+            self._refresh()
+            candidates = self._candidates(spids)
+
+        submitted = {}
+        for start in range(0, len(candidates), self.confirm_batch_size):
+            batch = candidates[start:start + self.confirm_batch_size]
+            rows = db.session.query(DeletionJob.user_key, DeletionJob.request_id) \
+                .join(DeletionChunk, DeletionChunk.request_id == DeletionJob.request_id) \
+                .filter(DeletionChunk.delete_date == delete_date, DeletionJob.user_key.in_(batch))
+            submitted.update(rows)
+        return submitted
+
+    def reset(self):
+        with self._lock:
+            self._hashes = np.empty(0, dtype=np.uint64)
+            self._watermark = None
+            self._engine = None
+
+
+submitted_spids = SubmittedSpidIndex()
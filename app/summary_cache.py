@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+import logging
+from flask import has_app_context
+from sqlalchemy.exc import IntegrityError
+from app.models import db, CacheGeneration
+from app.checkpoints import ensure_checkpoint_tables
+
+
+class SharedGeneration:
+    """Invalidation counter of a cache, kept in the app database so every process sees invalidations.
+
+    Outside an application context, or if the database cannot be reached, it
+    reports None and caches fall back to their ttl.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def current(self):
+        if not has_app_context():
+            return None
+        table = CacheGeneration.__table__
+        try:
+            ensure_checkpoint_tables()
+            with db.engine.connect() as connection:
+                generation = connection.execute(table.select().with_only_columns(table.c.generation)
+                                                .where(table.c.name == self.name)).scalar()
+        except Exception as e:
+            logging.warning(f"Could not read the generation of {self.name}: {e}")
+            return None
+        return generation or 0
+
+    def bump(self):
+        if not has_app_context():
+            return
+        table = CacheGeneration.__table__
+        try:
+            ensure_checkpoint_tables()
+            with db.engine.begin() as connection:
+                bumped = connection.execute(table.update().where(table.c.name == self.name)
+                                            .values(generation=table.c.generation + 1)).rowcount
+                if not bumped:
+                    connection.execute(table.insert().values(name=self.name, generation=1))
+        except IntegrityError:
+            # Another process inserted the row first; its bump invalidates the cache just the same.
+            pass
+        except Exception as e:
+            logging.warning(f"Could not bump the generation of {self.name}: {e}")
+
+
+class StaleWhileRevalidateCache:
+    """Caches the result of loader() for ttl seconds.
+
+    For a further stale_ttl seconds the old value is still served while one
+    background thread reloads it; after that callers wait for a fresh load.
+    A loader result of None is treated as a failure and never cached.
+    With a SharedGeneration, an invalidation in any process drops the value
+    in all of them on their next get().
+    """
+
+    def __init__(self, loader, ttl=None, stale_ttl=None, name='cache', shared=None):
+        self.loader = loader
+        self.ttl = ttl if ttl is not None else float(os.environ.get('DASHBOARD_CACHE_TTL', 60))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.environ.get('DASHBOARD_CACHE_STALE_TTL', 300))
+        self.name = name
+        self._value = None
+        self._loaded_at = None
+        self._generation = 0
+        self.shared = shared
+        self._shared_generation = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _load(self, shared_generation=None):
+        with self._lock:
+            generation = self._generation
+        value = self.loader()
+        with self._lock:
+            # Don't let a load that started before an invalidation overwrite it.
+            if value is not None and generation == self._generation:
+                self._value = value
+                self._loaded_at = time.monotonic()
+                if shared_generation is not None:
+                    self._shared_generation = shared_generation
+        return value
+
+    def _drop(self):
+        self._generation += 1
+        self._value = None
+        self._loaded_at = None
+
+    def _refresh_in_background(self, shared_generation):
+        try:
+            self._load(shared_generation)
+        except Exception as e:
+            logging.error(f"Background refresh of {self.name} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self):
+        shared_generation = self.shared.current() if self.shared is not None else None
+        with self._lock:
+            if shared_generation is not None and self._loaded_at is not None \
+                    and shared_generation != self._shared_generation:
+                self._drop()
+            age = time.monotonic() - self._loaded_at if self._loaded_at is not None else None
+            if age is not None and age < self.ttl:
+                return self._value
+            if age is not None and age < self.ttl + self.stale_ttl:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_in_background, args=(shared_generation,),
+                                     name=f'{self.name}-refresh', daemon=True).start()
+                return self._value
+
+        with self._load_lock:
+            with self._lock:
+                if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                    return self._value
+            return self._load(shared_generation)
+
+    def invalidate(self):
+        with self._lock:
+            self._drop()
+        if self.shared is not None:
+            self.shared.bump()
+        logging.info(f"Invalidated {self.name}.")
@@ -3,6 +3,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 import requests
 from app.utils import validate_env_vars, generate_access_token, generate_access_token_cdp_gdpr_execution
+from app.token_cache import access_token_cache
 
 class AccessTokensTests(unittest.TestCase):
 
@@ -22,16 +23,17 @@ class AccessTokensTests(unittest.TestCase):
         cls.env_patcher.start()
 
     def setUp(self):
-        """Set up mock requests.Session.post for each test."""
-        self.mock_post_patcher = patch('requests.Session.post')
+        """Set up mock requests.Session.request for each test."""
+        access_token_cache.clear()
+        self.mock_post_patcher = patch('requests.Session.request')
         self.mock_post = self.mock_post_patcher.start()
         self.mock_response = MagicMock()
-        self.mock_response.json.return_value = {'access_token': 'test_token'}
+        self.mock_response.json.return_value = {'access_token': 'test_token', 'expires_in': 86399}
         self.mock_response.raise_for_status.return_value = None
         self.mock_post.return_value = self.mock_response
 
     def tearDown(self):
-        """Stop the patched requests.Session.post after each test."""
+        """Stop the patched requests.Session.request after each test."""
         self.mock_post_patcher.stop()
 
     @classmethod
@@ -70,4 +72,10 @@ class AccessTokensTests(unittest.TestCase):
         self.mock_post.side_effect = requests.exceptions.HTTPError("HTTP Error")
 
         with self.assertRaises(requests.exceptions.HTTPError):
-            generate_access_token_cdp_gdpr_execution()            
+            generate_access_token_cdp_gdpr_execution()
+
+    def test_generate_access_token_is_cached(self):
+        """Test repeated calls reuse the cached token instead of calling IMS again."""
+        self.assertEqual(generate_access_token(), 'test_token')
+        self.assertEqual(generate_access_token(), 'test_token')
+        self.mock_post.assert_called_once()
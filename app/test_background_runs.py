@@ -0,0 +1,133 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from flask import current_app
+from app.models import db
+from app.background_runs import BackgroundRuns, RunProgress
+from app.chunk_executor import ChunkResult
+from app.testing import create_test_app
+
+class TestRunProgress(unittest.TestCase):
+
+    def test_chunk_done_counts_submitted_records_and_errors(self):
+        progress = RunProgress('2024-01-01')
+        progress.start(total_chunks=2, total_records=1200)
+        progress.chunk_done(ChunkResult(0, 800, success=True, request_id='req1'))
+        progress.chunk_done(ChunkResult(800, 1200, status_code=500))
+
+        status = progress.to_dict()
+        self.assertEqual(status['chunks_done'], 2)
+        self.assertEqual(status['records_submitted'], 800)
+        self.assertEqual(status['error_count'], 1)
+        self.assertIn('status 500', status['errors'][0])
+
+    def test_eta_from_average_record_time(self):
+        progress = RunProgress('2024-01-01')
+        progress.start(total_chunks=4, total_records=3200)
+        with patch('app.background_runs.time.time', return_value=1000):
+            progress.mark_running()
+        progress.chunk_done(ChunkResult(0, 800, success=True, request_id='req1'))
+        with patch('app.background_runs.time.time', return_value=1010):
+            self.assertEqual(progress.to_dict()['eta_seconds'], 30)
+
+    def test_finished_status(self):
+        progress = RunProgress('2024-01-01')
+        progress.mark_finished()
+        self.assertEqual(progress.to_dict()['status'], 'completed')
+
+        progress = RunProgress('2024-01-01')
+        progress.add_error('query failed')
+        progress.mark_finished()
+        self.assertEqual(progress.to_dict()['status'], 'failed')
+
+
+class TestBackgroundRuns(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.runs = BackgroundRuns(max_workers=1)
+
+    def tearDown(self):
+        if self.runs._executor is not None:
+            self.runs._executor.shutdown(wait=True)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_run_executes_in_app_context(self):
+        done = threading.Event()
+
+        def target(progress):
+            self.assertIs(current_app._get_current_object(), self.app)
+            progress.start(total_chunks=1, total_records=10)
+            progress.chunk_done(ChunkResult(0, 10, success=True, request_id='req1'))
+            done.set()
+
+        run_id = self.runs.start(self.app, '2024-01-01', target)
+        self.assertTrue(done.wait(1))
+        self.runs._executor.shutdown(wait=True)
+
+        status = self.runs.get(run_id).to_dict()
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(status['records_submitted'], 10)
+
+    def test_exception_marks_run_failed(self):
+        def target(progress):
+            raise RuntimeError('boom')
+
+        run_id = self.runs.start(self.app, '2024-01-01', target)
+        self.runs._executor.shutdown(wait=True)
+
+        status = self.runs.get(run_id).to_dict()
+        self.assertEqual(status['status'], 'failed')
+        self.assertEqual(status['errors'], ['boom'])
+
+    def test_active_run_for_same_date_is_reused(self):
+        release = threading.Event()
+        first = self.runs.start(self.app, '2024-01-01', lambda progress: release.wait(1))
+        second = self.runs.start(self.app, '2024-01-01', lambda progress: None)
+        release.set()
+        self.runs._executor.shutdown(wait=True)
+
+        self.assertEqual(first, second)
+
+    def test_other_workers_see_the_run(self):
+        release = threading.Event()
+        other_worker = BackgroundRuns(max_workers=1)
+
+        def target(progress):
+            progress.start(total_chunks=2, total_records=1600)
+            progress.chunk_done(ChunkResult(0, 800, success=True, request_id='req1'))
+            release.wait(1)
+
+        run_id = self.runs.start(self.app, '2024-01-01', target)
+        try:
+            for _ in range(50):
+                status = other_worker.get(run_id).to_dict()
+                if status['chunks_done']:
+                    break
+                time.sleep(0.02)
+            self.assertEqual((status['status'], status['records_submitted']), ('running', 800))
+            self.assertEqual(other_worker.start(self.app, '2024-01-01', lambda progress: None), run_id)
+        finally:
+            release.set()
+            self.runs._executor.shutdown(wait=True)
+
+        self.assertEqual(other_worker.get(run_id).to_dict()['status'], 'completed')
+        self.assertIsNone(other_worker._executor)
+
+    def test_date_can_be_run_again_once_finished(self):
+        first = self.runs.start(self.app, '2024-01-01', lambda progress: None)
+        self.runs._executor.shutdown(wait=True)
+        self.runs._executor = None
+
+        self.assertNotEqual(self.runs.start(self.app, '2024-01-01', lambda progress: None), first)
+
+    def test_unknown_run(self):
+        self.assertIsNone(self.runs.get('missing'))
+
+if __name__ == '__main__':
+    unittest.main()
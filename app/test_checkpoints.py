@@ -0,0 +1,138 @@
+import json
+import unittest
+from datetime import date
+from unittest.mock import patch
+import pandas as pd
+from app.models import db, DeletionChunk, DeletionJob
+from app.chunk_executor import ChunkResult
+from app.checkpoints import CheckpointStore
+from app.submitted_index import submitted_spids
+from app.utils import submit_user_deletions
+from app.testing import create_test_app
+
+def accepted(start, end, spids, request_id):
+    return ChunkResult(start=start, end=end, success=True, request_id=request_id,
+                       jobs=[{'jobId': f'job-{spid}', 'customer': {'user': {'key': spid}}} for spid in spids])
+
+class TestCheckpointStore(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_for_date_requires_app_context(self):
+        self.app_context.pop()
+        try:
+            self.assertIsNone(CheckpointStore.for_date(date(2023, 1, 1)))
+        finally:
+            self.app_context.push()
+
+    def test_record_accepted_chunk(self):
+        store = CheckpointStore('2023-01-01')
+        chunk = pd.DataFrame({'singl_profl_id': ['user1', 'user2']})
+
+        store.record(chunk, accepted(0, 2, ['user1', 'user2'], 'request-1'))
+
+        checkpoint = DeletionChunk.query.one()
+        self.assertEqual(checkpoint.delete_date, date(2023, 1, 1))
+        self.assertEqual(checkpoint.status, 'accepted')
+        self.assertEqual(checkpoint.request_id, 'request-1')
+        self.assertEqual(json.loads(checkpoint.spids), ['user1', 'user2'])
+        self.assertEqual(sorted(job.user_key for job in DeletionJob.query), ['user1', 'user2'])
+
+    def test_record_failed_chunk(self):
+        store = CheckpointStore(date(2023, 1, 1))
+        chunk = pd.DataFrame({'singl_profl_id': ['user1']})
+
+        store.record(chunk, ChunkResult(start=0, end=1, success=False, status_code=500))
+
+        self.assertEqual(DeletionChunk.query.one().status, 'failed')
+        self.assertEqual(DeletionJob.query.count(), 0)
+
+class TestResumeDeletions(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        submitted_spids.reset()
+
+        self.mock_gdpr_deletions_api_call_patcher = patch('app.utils.gdpr_deletions_api_call')
+        self.mock_gdpr_deletions_api_call = self.mock_gdpr_deletions_api_call_patcher.start()
+
+        self.mock_write_buffer_patcher = patch('app.utils.DeltaWriteBuffer')
+        self.mock_write_buffer_patcher.start()
+
+        self.mock_merge_patcher = patch('app.utils.merge_data_to_databricks_table')
+        self.mock_merge = self.mock_merge_patcher.start()
+
+    def tearDown(self):
+        self.mock_gdpr_deletions_api_call_patcher.stop()
+        self.mock_write_buffer_patcher.stop()
+        self.mock_merge_patcher.stop()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_resume_skips_acknowledged_spids(self):
+        submitted = []
+        def api_call(chunk, result=None, write_buffer=None):
+            spids = chunk['key'].tolist()
+            submitted.append(spids)
+            if 'user3' in spids and len(submitted) <= 2:
+                return False
+            result.request_id = f'request-{len(submitted)}'
+            result.jobs = [{'jobId': f'job-{spid}', 'customer': {'user': {'key': spid}}} for spid in spids]
+            return True
+        self.mock_gdpr_deletions_api_call.side_effect = api_call
+        df = pd.DataFrame({'singl_profl_id': [f'user{i}' for i in range(5)]})
+
+        with patch.dict('os.environ', {'GDPR_CHUNK_WORKERS': '1'}):
+            first = submit_user_deletions(df, date(2023, 1, 1), chunk_size=3)
+            second = submit_user_deletions(df, date(2023, 1, 1), chunk_size=3)
+
+        self.assertEqual([r.success for r in first], [True, False])
+        self.assertEqual([r.success for r in second], [True])
+        self.assertEqual(submitted, [['user0', 'user1', 'user2'], ['user3', 'user4'], ['user3', 'user4']])
+        self.assertEqual(sorted(job.user_key for job in DeletionJob.query), [f'user{i}' for i in range(5)])
+        flagged, table, match_column = self.mock_merge.call_args.args
+        self.assertEqual((table, match_column), ('gdpr_user_deletions', 'singl_profl_id'))
+        self.assertEqual(sorted(flagged['singl_profl_id']), ['user0', 'user1', 'user2'])
+        self.assertTrue(flagged['deletion_flag'].all())
+
+    def test_resume_resubmits_spids_accepted_on_another_date(self):
+        submitted = []
+        def api_call(chunk, result=None, write_buffer=None):
+            spids = chunk['key'].tolist()
+            submitted.append(spids)
+            result.request_id = f'request-{len(submitted)}'
+            result.jobs = [{'jobId': f'job-{spid}', 'customer': {'user': {'key': spid}}} for spid in spids]
+            return True
+        self.mock_gdpr_deletions_api_call.side_effect = api_call
+        df = pd.DataFrame({'singl_profl_id': ['user0', 'user1']})
+
+        submit_user_deletions(df, date(2023, 1, 1))
+        submit_user_deletions(df, date(2023, 1, 2))
+
+        self.assertEqual(submitted, [['user0', 'user1'], ['user0', 'user1']])
+        self.mock_merge.assert_not_called()
+
+    def test_resume_disabled_resubmits_everything(self):
+        submitted = []
+        def api_call(chunk, result=None, write_buffer=None):
+            submitted.append(chunk['key'].tolist())
+            result.request_id = 'request'
+            return True
+        self.mock_gdpr_deletions_api_call.side_effect = api_call
+        df = pd.DataFrame({'singl_profl_id': ['user0', 'user1']})
+
+        submit_user_deletions(df, date(2023, 1, 1))
+        submit_user_deletions(df, date(2023, 1, 1), resume=False)
+
+        self.assertEqual(submitted, [['user0', 'user1'], ['user0', 'user1']])
@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from app.chunk_executor import AdaptiveChunkSizer, ChunkResult, TokenBucket, submit_deletion_chunks
+
+class TestSubmitDeletionChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({'key': [f'user{i}' for i in range(10)]})
+
+    def test_sequential_chunks(self):
+        submit = MagicMock(return_value=True)
+
+        results = submit_deletion_chunks(self.df, submit, chunk_size=4, workers=1, rate=0)
+
+        self.assertEqual([(r.start, r.end) for r in results], [(0, 4), (4, 8), (8, 10)])
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(submit.call_count, 3)
+
+    def test_concurrent_chunks_collect_every_result(self):
+        def submit(chunk, result=None):
+            result.request_id = chunk['key'].iloc[0]
+            if chunk['key'].iloc[0] == 'user4':
+                raise Exception("API down")
+            return True
+
+        results = submit_deletion_chunks(self.df, submit, chunk_size=2, workers=3, rate=0)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual([r.request_id for r in results], ['user0', 'user2', 'user4', 'user6', 'user8'])
+        self.assertEqual([r.success for r in results], [True, True, False, True, True])
+        self.assertEqual(results[2].error, "API down")
+
+    def test_stop_on_failure_skips_remaining_chunks(self):
+        submit = MagicMock(side_effect=[True, False, True])
+
+        results = submit_deletion_chunks(self.df, submit, chunk_size=4, workers=1, rate=0, stop_on_failure=True)
+
+        self.assertEqual([r.success for r in results], [True, False, False])
+        self.assertEqual([r.skipped for r in results], [False, False, True])
+        self.assertEqual(submit.call_count, 2)
+
+    def test_failures_do_not_stop_other_chunks_by_default(self):
+        submit = MagicMock(side_effect=[True, False, True])
+
+        results = submit_deletion_chunks(self.df, submit, chunk_size=4, workers=1, rate=0)
+
+        self.assertEqual([r.success for r in results], [True, False, True])
+        self.assertEqual(submit.call_count, 3)
+
+    def test_rate_limit_is_applied(self):
+        submit = MagicMock(return_value=True)
+
+        with patch('app.chunk_executor.TokenBucket.acquire') as mock_acquire:
+            submit_deletion_chunks(self.df, submit, chunk_size=2, workers=2, rate=5)
+
+        self.assertEqual(mock_acquire.call_count, 5)
+
+    def test_adaptive_chunk_sizes(self):
+        df = pd.DataFrame({'key': [f'user{i}' for i in range(30)]})
+        sizer = AdaptiveChunkSizer(initial=4, minimum=2, maximum=8, step=2, target_latency=10)
+
+        def submit(chunk, result=None):
+            result.status_code = 429 if chunk['key'].iloc[0] == 'user10' else 202
+            return result.status_code == 202
+
+        results = submit_deletion_chunks(df, submit, chunk_size=sizer, workers=1, rate=0)
+
+        self.assertEqual([r.end - r.start for r in results], [4, 6, 8, 4, 6, 2])
+        self.assertEqual(results[-1].end, 30)
+
+
+class TestAdaptiveChunkSizer(unittest.TestCase):
+
+    def setUp(self):
+        self.sizer = AdaptiveChunkSizer(initial=800, minimum=50, maximum=1000, step=100, target_latency=5)
+
+    def test_grows_while_healthy_up_to_maximum(self):
+        for _ in range(5):
+            self.sizer.observe(ChunkResult(0, 800, success=True, status_code=202, elapsed=1.0))
+        self.assertEqual(self.sizer.next_size(), 1000)
+
+    def test_holds_when_slow(self):
+        self.sizer.observe(ChunkResult(0, 800, success=True, status_code=202, elapsed=6.0))
+        self.assertEqual(self.sizer.next_size(), 800)
+
+    def test_shrinks_on_throttling_server_errors_and_timeouts(self):
+        self.sizer.observe(ChunkResult(0, 800, status_code=429))
+        self.assertEqual(self.sizer.next_size(), 400)
+        self.sizer.observe(ChunkResult(0, 400, status_code=503))
+        self.assertEqual(self.sizer.next_size(), 200)
+        self.sizer.observe(ChunkResult(0, 200, error='Read timed out'))
+        self.assertEqual(self.sizer.next_size(), 100)
+        self.sizer.observe(ChunkResult(0, 100, status_code=429))
+        self.sizer.observe(ChunkResult(0, 50, status_code=429))
+        self.assertEqual(self.sizer.next_size(), 50)
+
+    def test_shrinks_when_success_needed_retries(self):
+        self.sizer.observe(ChunkResult(0, 800, success=True, status_code=202, retried=True, elapsed=1.0))
+        self.assertEqual(self.sizer.next_size(), 400)
+
+    def test_client_errors_do_not_change_size(self):
+        self.sizer.observe(ChunkResult(0, 800, status_code=400))
+        self.assertEqual(self.sizer.next_size(), 800)
+
+    def test_maximum_capped_at_api_limit(self):
+        sizer = AdaptiveChunkSizer(initial=5000, maximum=5000)
+        self.assertEqual(sizer.maximum, 1000)
+        self.assertEqual(sizer.next_size(), 1000)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_waits_when_empty(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        with patch('app.chunk_executor.time.sleep') as mock_sleep, \
+             patch('app.chunk_executor.time.monotonic', side_effect=[0.0, 0.0, 0.1]):
+            bucket._updated = 0.0
+            bucket.acquire()
+            bucket.acquire()
+
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.1)
@@ -0,0 +1,62 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+import pyarrow as pa
+from app.databricks_fetch import iter_arrow_batches, fetch_dataframe
+from app.sql_pool import databricks_sql_pool
+from app.utils import get_spids_count_by_gdprdate
+
+class FakeArrowCursor:
+
+    def __init__(self, table):
+        self.table = table
+        self.offset = 0
+
+    def fetchmany_arrow(self, size):
+        batch = self.table.slice(self.offset, size)
+        self.offset += batch.num_rows
+        return batch
+
+    def fetchall_arrow(self):
+        return self.fetchmany_arrow(self.table.num_rows)
+
+class TestDatabricksFetch(unittest.TestCase):
+
+    def setUp(self):
+        self.table = pa.table({'singl_profl_id': [f'user{i}' for i in range(5)], 'cnt': list(range(5))})
+
+    def test_iter_arrow_batches(self):
+        batches = list(iter_arrow_batches(FakeArrowCursor(self.table), batch_size=2))
+
+        self.assertEqual([batch.num_rows for batch in batches], [2, 2, 1])
+
+    def test_fetch_dataframe(self):
+        df = fetch_dataframe(FakeArrowCursor(self.table))
+
+        self.assertEqual(df['cnt'].tolist(), [0, 1, 2, 3, 4])
+
+class TestGetSpidsCountByGdprdate(unittest.TestCase):
+
+    def setUp(self):
+        databricks_sql_pool.close_all()
+        self.mock_sql_connect_patcher = patch('app.sql_pool.sql.connect')
+        self.mock_sql_connect = self.mock_sql_connect_patcher.start()
+
+    def tearDown(self):
+        self.mock_sql_connect_patcher.stop()
+        databricks_sql_pool.close_all()
+
+    def test_counts_by_date(self):
+        mock_cursor = self.mock_sql_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall_arrow.return_value = pa.table({
+            'gdprdate': [date(2023, 1, 2), date(2023, 1, 1)],
+            'deletion_flag': [False, True],
+            'cnt': [3, 4]
+        })
+
+        total_count, spids_by_date = get_spids_count_by_gdprdate()
+
+        self.assertEqual(total_count, 7)
+        self.assertEqual(spids_by_date[0].gdprdate, date(2023, 1, 2))
+        self.assertEqual(spids_by_date[0].gdprdate.strftime('%Y-%m-%d'), '2023-01-02')
+        self.assertEqual([row.cnt for row in spids_by_date], [3, 4])
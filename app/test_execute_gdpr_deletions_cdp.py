@@ -2,7 +2,12 @@ import os
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
-from app.utils import auto_execute_gdpr_deletions_cdp
+import pyarrow as pa
+from datetime import date
+from app.sql_pool import databricks_sql_pool
+from app.utils import auto_execute_gdpr_deletions_cdp, execute_gdpr_deletions_cdp
+from app.background_runs import RunProgress
+from app.run_coordinator import Shard
 
 class TestAutoExecuteGdprDeletionsCdp(unittest.TestCase):
 
@@ -20,7 +25,9 @@ class TestAutoExecuteGdprDeletionsCdp(unittest.TestCase):
         cls.env_patcher.stop()
 
     def setUp(self):
-        self.mock_sql_connect_patcher = patch('app.utils.sql.connect')
+        databricks_sql_pool.close_all()
+
+        self.mock_sql_connect_patcher = patch('app.sql_pool.sql.connect')
         self.mock_sql_connect = self.mock_sql_connect_patcher.start()
 
         self.mock_logging_patcher = patch('app.utils.logging')
@@ -43,31 +50,114 @@ class TestAutoExecuteGdprDeletionsCdp(unittest.TestCase):
         self.mock_logging.warning.assert_called_once_with("No delete_date provided. Exiting function.")
 
 
-    def test_no_records_to_delete(self):
+    def mock_tables(self, backlog, *user_deletions):
         mock_connection = MagicMock()
         self.mock_sql_connect.return_value = mock_connection
         mock_cursor = mock_connection.cursor.return_value.__enter__.return_value
-        mock_cursor.fetchall.return_value = []
+        mock_cursor.fetchall_arrow.side_effect = [
+            pa.table({'execution_date': pa.array([date.fromisoformat(d) for d in backlog], pa.date32()),
+                      'cnt': [len(spids) for spids in user_deletions]}),
+        ] + [pa.table({'singl_profl_id': pa.array(spids, pa.string())}) for spids in user_deletions]
+        return mock_cursor
+
+    def submitted_spids(self):
+        return [spid for call in self.mock_gdpr_deletions_api_call.call_args_list
+                for spid in call.args[0]['singl_profl_id']]
+
+    def test_no_records_to_delete(self):
+        self.mock_tables([])
 
         auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01")
         self.mock_logging.info.assert_any_call("No user deletions to process for 2023-01-01")
 
-    def test_more_than_1000_records(self):
-        mock_connection = MagicMock()
-        self.mock_sql_connect.return_value = mock_connection
-        mock_cursor = mock_connection.cursor.return_value.__enter__.return_value
-        mock_cursor.fetchall.return_value = [("user1",)] * 1001
+    def test_successful_execution(self):
+        self.mock_tables(["2023-01-01"], ["user1", "user2"])
+
+        self.mock_gdpr_deletions_api_call.return_value = True
 
         auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01")
-        self.mock_logging.info.assert_any_call("More than 1000 records (1001) found for 2023-01-01. Manual intervention required.")
+        self.mock_logging.info.assert_any_call("Successfully processed GDPR deletions for 2023-01-01")
 
-    def test_successful_execution(self):
+    def test_backlog_is_processed_oldest_date_first(self):
+        self.mock_tables(["2022-12-30", "2023-01-01"], ["old1", "old2"], ["new1"])
+        self.mock_gdpr_deletions_api_call.return_value = True
+
+        auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01", record_budget=0)
+
+        self.assertEqual(self.submitted_spids(), ["old1", "old2", "new1"])
+        self.mock_logging.info.assert_any_call("Successfully processed GDPR deletions for 2022-12-30")
+        self.mock_logging.info.assert_any_call("Successfully processed GDPR deletions for 2023-01-01")
+
+    def test_record_budget_carries_the_rest_over(self):
+        self.mock_tables(["2022-12-30", "2023-01-01"], [f"old{i}" for i in range(1500)], ["new1"])
+        self.mock_gdpr_deletions_api_call.return_value = True
+
+        auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01", record_budget=1200)
+
+        self.assertEqual(self.submitted_spids(), [f"old{i}" for i in range(1200)])
+        self.mock_logging.info.assert_any_call(
+            "Submitted 1200 of 1500 records for 2022-12-30; carrying 300 over to the next run.")
+
+    def test_exhausted_time_budget_submits_nothing(self):
+        self.mock_tables(["2023-01-01"], ["user1", "user2"])
+        self.mock_gdpr_deletions_api_call.return_value = True
+
+        # Patch the name in app.utils only, so the SQL pool keeps the real clock.
+        with patch('app.utils.time') as mock_time:
+            mock_time.monotonic.side_effect = [100.0, 200.0]
+            auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01", time_budget=60)
+
+        self.mock_gdpr_deletions_api_call.assert_not_called()
+        self.mock_logging.info.assert_any_call(
+            "Run budget used up; carrying the backlog from 2023-01-01 over to the next run.")
+        self.mock_logging.error.assert_not_called()
+
+    def test_failed_date_does_not_block_newer_dates(self):
+        self.mock_tables(["2022-12-30", "2023-01-01"], [f"old{i}" for i in range(1200)], ["new1"])
+        self.mock_gdpr_deletions_api_call.side_effect = lambda chunk, **kwargs: 'new1' in chunk['singl_profl_id'].tolist()
+
+        with patch.dict(os.environ, {'GDPR_CHUNK_WORKERS': '1', 'GDPR_ADAPTIVE_CHUNK_SIZE': 'false'}):
+            auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01", record_budget=0)
+
+        self.assertEqual(self.submitted_spids(), [f"old{i}" for i in range(800)] + ["new1"])
+        self.mock_logging.error.assert_any_call("Failed to process chunk 0-800 for 2022-12-30")
+        self.mock_logging.error.assert_any_call("GDPR deletions for 2022-12-30 failed; moving on to the next date.")
+        self.mock_logging.info.assert_any_call("Successfully processed GDPR deletions for 2023-01-01")
+
+    def test_shard_submits_only_its_spids(self):
+        spids = [f"user{i}" for i in range(100)]
+        self.mock_tables(["2023-01-01"], spids)
+        self.mock_gdpr_deletions_api_call.return_value = True
+        shard = Shard(1, 2)
+
+        auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01", shard=shard, load_daily_run=False)
+
+        expected = shard.select(pd.DataFrame({'singl_profl_id': spids}))['singl_profl_id'].tolist()
+        self.assertEqual(self.submitted_spids(), expected)
+        self.assertLess(len(expected), len(spids))
+        self.mock_profile_store_table_get_gdpr_deletions.assert_not_called()
+
+    @patch('app.utils.spids_count_cache')
+    def test_execution_invalidates_dashboard_cache(self, mock_spids_count_cache):
+        self.mock_tables(["2023-01-01"], ["user1"])
+
+        self.mock_gdpr_deletions_api_call.return_value = True
+
+        auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01")
+        mock_spids_count_cache.invalidate.assert_called_once()
+
+    def test_execution_reports_progress(self):
         mock_connection = MagicMock()
         self.mock_sql_connect.return_value = mock_connection
         mock_cursor = mock_connection.cursor.return_value.__enter__.return_value
-        mock_cursor.fetchall.return_value = [("user1",), ("user2",)]
+        mock_cursor.fetchall_arrow.return_value = pa.table({'singl_profl_id': [f"user{i}" for i in range(1000)]})
 
         self.mock_gdpr_deletions_api_call.return_value = True
 
-        auto_execute_gdpr_deletions_cdp(delete_date="2023-01-01")
-        self.mock_logging.info.assert_any_call("Successfully processed GDPR deletions for 2023-01-01")
+        progress = RunProgress("2023-01-01")
+        execute_gdpr_deletions_cdp(delete_date="2023-01-01", progress=progress)
+        status = progress.to_dict()
+        self.assertEqual(status['total_chunks'], 2)
+        self.assertEqual(status['total_records'], 1000)
+        self.assertEqual(status['chunks_done'], 2)
+        self.assertEqual(status['error_count'], 0)
@@ -24,7 +24,7 @@ class TestGdprDeletionsApiCall(unittest.TestCase):
         self.mock_generate_access_token = self.mock_generate_access_token_patcher.start()
         self.mock_generate_access_token.return_value = 'test_access_token'
 
-        self.mock_requests_patcher = patch('app.utils.requests.request')
+        self.mock_requests_patcher = patch('app.utils.platform_client.request')
         self.mock_requests = self.mock_requests_patcher.start()
 
         self.mock_logging_patcher = patch('app.utils.logging')
@@ -84,3 +84,31 @@ class TestGdprDeletionsApiCall(unittest.TestCase):
         self.assertFalse(result)
         self.mock_logging.error.assert_called_once_with("Deletion request failed. Status code: 400, Response: Bad Request")
 
+    def test_successful_api_call_with_write_buffer(self):
+        chunk = pd.DataFrame({
+            'key': ['user1'],
+            'action': ['delete'],
+            'namespace': ['SPID'],
+            'value': ['user1'],
+            'type': ['custom']
+        })
+
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        mock_response.json.return_value = {
+            'requestId': 'test_request_id',
+            'totalRecords': 1,
+            'jobs': [{'jobId': 'test_job_id', 'customer': {'user': {'key': 'user1'}}}]
+        }
+        self.mock_requests.return_value = mock_response
+        write_buffer = MagicMock()
+
+        result = gdpr_deletions_api_call(chunk, write_buffer=write_buffer)
+        self.assertTrue(result)
+        write_buffer.add.assert_called_once()
+        jobs_df, user_deletions_df = write_buffer.add.call_args.args
+        self.assertEqual(jobs_df['jobId'].tolist(), ['test_job_id'])
+        self.assertEqual(user_deletions_df['singl_profl_id'].tolist(), ['user1'])
+        self.mock_write_data_to_databricks_table.assert_not_called()
+        self.mock_merge_data_to_databricks_table.assert_not_called()
+
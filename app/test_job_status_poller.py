@@ -0,0 +1,100 @@
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+import pandas as pd
+import pyarrow as pa
+from app.job_status_poller import JobStatusPoller
+from app.sql_pool import databricks_sql_pool
+from app.query_registry import QueryRegistry
+from app.utils import apply_ddl, poll_gdpr_job_statuses
+
+def status_response(status, status_code=200):
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = {'jobId': 'job', 'status': status}
+    return response
+
+class TestJobStatusPoller(unittest.TestCase):
+
+    def setUp(self):
+        self.token = MagicMock(return_value='token')
+        self.poller = JobStatusPoller(self.token, url='https://privacy.test/jobs', workers=4)
+
+    @patch('app.job_status_poller.platform_client.request')
+    def test_poll_returns_changed_statuses_only(self, mock_request):
+        statuses = {'job1': 'complete', 'job2': 'processing', 'job3': 'error'}
+        mock_request.side_effect = lambda method, url, headers, timeout: status_response(statuses[url.rsplit('/', 1)[1]])
+
+        pending = pd.DataFrame({'jobId': ['job1', 'job2', 'job3'], 'status': [None, 'processing', 'processing']})
+        changes = self.poller.poll(pending)
+
+        self.assertEqual(changes[['jobId', 'status']].values.tolist(), [['job1', 'complete'], ['job3', 'error']])
+        self.assertEqual(mock_request.call_count, 3)
+        self.token.assert_called_once()
+        mock_request.assert_any_call('GET', 'https://privacy.test/jobs/job1', headers=self.poller._headers(),
+                                     timeout=self.poller.timeout)
+
+    @patch('app.job_status_poller.platform_client.request')
+    def test_failed_lookups_are_not_treated_as_changes(self, mock_request):
+        mock_request.side_effect = [status_response(None, status_code=500), Exception('timeout')]
+
+        pending = pd.DataFrame({'jobId': ['job1', 'job2'], 'status': [None, 'submitted']})
+        changes = self.poller.poll(pending)
+
+        self.assertTrue(changes.empty)
+
+    def test_no_pending_jobs(self):
+        changes = self.poller.poll(pd.DataFrame({'jobId': [], 'status': []}))
+        self.assertTrue(changes.empty)
+        self.token.assert_not_called()
+
+
+class TestPollGdprJobStatuses(unittest.TestCase):
+
+    def setUp(self):
+        databricks_sql_pool.close_all()
+        self.mock_sql_connect_patcher = patch('app.sql_pool.sql.connect')
+        self.mock_sql_connect = self.mock_sql_connect_patcher.start()
+        self.mock_cursor = self.mock_sql_connect.return_value.cursor.return_value.__enter__.return_value
+
+    def tearDown(self):
+        self.mock_sql_connect_patcher.stop()
+
+    @patch('app.utils.merge_data_to_databricks_table', return_value=True)
+    @patch('app.utils.JobStatusPoller')
+    @patch.dict(os.environ, {'GDPR_JOB_POLL_MAX_JOBS': '100'})
+    def test_changes_are_merged_in_one_batch(self, mock_poller_class, mock_merge):
+        self.mock_cursor.fetchall_arrow.return_value = pa.table({'jobId': ['job1', 'job2'], 'status': [None, 'processing']})
+        changes = pd.DataFrame({'jobId': ['job1'], 'status': ['complete'], 'status_updated_at': [pd.Timestamp.now()]})
+        mock_poller_class.return_value.poll.return_value = changes
+
+        self.assertEqual(poll_gdpr_job_statuses(), 1)
+
+        query, params = self.mock_cursor.execute.call_args[0]
+        self.assertIn("NOT IN ('complete', 'error')", query)
+        self.assertIn('LIMIT :limit', query)
+        self.assertEqual(params, {'limit': 100})
+        mock_merge.assert_called_once_with(changes, 'gdpr_deletion_jobs', 'jobId', update_columns=('status', 'status_updated_at'))
+
+    @patch('app.utils.merge_data_to_databricks_table')
+    @patch('app.utils.JobStatusPoller')
+    def test_nothing_pending(self, mock_poller_class, mock_merge):
+        self.mock_cursor.fetchall_arrow.return_value = pa.table({'jobId': pa.array([], pa.string()), 'status': pa.array([], pa.string())})
+
+        self.assertEqual(poll_gdpr_job_statuses(), 0)
+        mock_poller_class.assert_not_called()
+        mock_merge.assert_not_called()
+
+    def test_apply_ddl_adds_the_status_columns(self):
+        apply_ddl('gdpr_deletion_jobs_add_status')
+
+        statement = self.mock_cursor.execute.call_args.args[0]
+        self.assertTrue(statement.startswith('ALTER TABLE custanwo.customer_transformation.gdpr_deletion_jobs ADD COLUMNS'))
+        self.assertNotIn('gdpr_deletion_jobs_add_status', QueryRegistry().load())
+
+    def test_apply_unknown_ddl(self):
+        with self.assertRaises(ValueError):
+            apply_ddl('../sql_queries/gdpr_user_deletions')
+        self.mock_cursor.execute.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
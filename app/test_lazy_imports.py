@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import unittest
+import app.utils
+import app.sql_pool
+import app.spark_session
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_heavy_stacks_not_loaded_on_import(self):
+        probe = ("import sys, app.utils; "
+                 "print(','.join(m for m in ('pyspark', 'delta', 'databricks.connect', 'psycopg2') if m in sys.modules))")
+        output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(output.stdout.strip(), '')
+
+    def test_lazy_attributes_resolve(self):
+        from databricks import sql
+        from databricks.connect import DatabricksSession
+        self.assertIs(app.sql_pool.sql, sql)
+        self.assertIs(app.spark_session.DatabricksSession, DatabricksSession)
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            app.utils.not_a_module
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+from app.metrics import PipelineMetrics
+
+class TestPipelineMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = PipelineMetrics(buckets=(0.1, 1, 10))
+
+    def test_render_histogram_and_counters(self):
+        self.metrics.observe('privacy_post', 0.05, rows=800)
+        self.metrics.observe('privacy_post', 2.0, rows=800, error=True)
+
+        lines = self.metrics.render().splitlines()
+
+        self.assertIn('# TYPE gdpr_stage_duration_seconds histogram', lines)
+        self.assertIn('gdpr_stage_duration_seconds_bucket{stage="privacy_post",le="0.1"} 1', lines)
+        self.assertIn('gdpr_stage_duration_seconds_bucket{stage="privacy_post",le="1"} 1', lines)
+        self.assertIn('gdpr_stage_duration_seconds_bucket{stage="privacy_post",le="10"} 2', lines)
+        self.assertIn('gdpr_stage_duration_seconds_bucket{stage="privacy_post",le="+Inf"} 2', lines)
+        self.assertIn('gdpr_stage_duration_seconds_sum{stage="privacy_post"} 2.05', lines)
+        self.assertIn('gdpr_stage_duration_seconds_count{stage="privacy_post"} 2', lines)
+        self.assertIn('gdpr_stage_rows_total{stage="privacy_post"} 1600', lines)
+        self.assertIn('gdpr_stage_errors_total{stage="privacy_post"} 1', lines)
+
+    def test_timed_counts_exceptions_as_errors(self):
+        with patch('app.metrics.time.perf_counter', side_effect=[1.0, 1.5]):
+            with self.assertRaises(ValueError):
+                with self.metrics.timed('delta_write', rows=10):
+                    raise ValueError('boom')
+
+        lines = self.metrics.render().splitlines()
+        self.assertIn('gdpr_stage_duration_seconds_sum{stage="delta_write"} 0.5', lines)
+        self.assertIn('gdpr_stage_errors_total{stage="delta_write"} 1', lines)
+
+    def test_timed_rows_and_error_can_be_set_in_block(self):
+        with self.metrics.timed('databricks_query') as timing:
+            timing.rows = 42
+            timing.error = True
+
+        lines = self.metrics.render().splitlines()
+        self.assertIn('gdpr_stage_rows_total{stage="databricks_query"} 42', lines)
+        self.assertIn('gdpr_stage_errors_total{stage="databricks_query"} 1', lines)
+
+    def test_timed_iter_times_each_step(self):
+        batches = list(self.metrics.timed_iter('databricks_fetch', iter([[1, 2], [3]])))
+
+        self.assertEqual(batches, [[1, 2], [3]])
+        lines = self.metrics.render().splitlines()
+        self.assertIn('gdpr_stage_rows_total{stage="databricks_fetch"} 3', lines)
+        self.assertIn('gdpr_stage_duration_seconds_count{stage="databricks_fetch"} 3', lines)
+
+    def test_reset(self):
+        self.metrics.observe('token_fetch', 0.2)
+        self.metrics.reset()
+        self.assertNotIn('token_fetch', self.metrics.render())
+
+if __name__ == '__main__':
+    unittest.main()
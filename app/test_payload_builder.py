@@ -0,0 +1,66 @@
+import json
+import unittest
+import pandas as pd
+from app.payload_builder import build_users, build_users_from_chunk, build_privacy_payload, COMPANY_CONTEXTS, INCLUDE
+
+def make_chunk(spids):
+    df = pd.DataFrame({0: spids})
+    df['key'] = df[0]
+    df['action'] = 'delete'
+    df['namespace'] = 'SPID'
+    df['value'] = df[0]
+    df['type'] = 'custom'
+    return df
+
+def legacy_users(chunk):
+    grouped_users = chunk.groupby('key').agg({
+        'action': lambda x: list(x),
+        'namespace': lambda x: list(x),
+        'value': lambda x: list(x),
+        'type': lambda x: list(x)
+    }).reset_index()
+    return [
+        {
+            "key": row['key'],
+            "action": row['action'],
+            "userIDs": [
+                {"namespace": ns, "value": val, "type": typ}
+                for ns, val, typ in zip(row['namespace'], row['value'], row['type'])
+            ]
+        }
+        for _, row in grouped_users.iterrows()
+    ]
+
+class TestPayloadBuilder(unittest.TestCase):
+
+    def test_fast_path_matches_legacy_grouping(self):
+        chunk = make_chunk(['user3', 'user1', 'user2'])
+
+        self.assertEqual(build_users_from_chunk(chunk), legacy_users(chunk))
+
+    def test_grouped_path_matches_legacy_grouping(self):
+        chunk = pd.DataFrame({
+            'key': ['user1', 'user2', 'user1'],
+            'action': ['delete', 'delete', 'delete'],
+            'namespace': ['SPID', 'SPID', 'ECID'],
+            'value': ['user1', 'user2', 'ecid1'],
+            'type': ['custom', 'custom', 'standard']
+        })
+
+        users = build_users_from_chunk(chunk)
+        self.assertEqual(users, legacy_users(chunk))
+        self.assertEqual(len(users[0]['userIDs']), 2)
+
+    def test_payload_structure(self):
+        payload = json.loads(build_privacy_payload(build_users(['user1'])))
+
+        self.assertEqual(list(payload), ['companyContexts', 'users', 'include', 'regulation'])
+        self.assertEqual(payload['companyContexts'], COMPANY_CONTEXTS)
+        self.assertEqual(payload['include'], INCLUDE)
+        self.assertEqual(payload['regulation'], 'gdpr')
+        self.assertEqual(payload['users'], [
+            {"key": "user1", "action": ["delete"], "userIDs": [{"namespace": "SPID", "value": "user1", "type": "custom"}]}
+        ])
+
+    def test_empty_chunk(self):
+        self.assertEqual(build_users_from_chunk(make_chunk([])), [])
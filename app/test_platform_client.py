@@ -0,0 +1,83 @@
+import gzip
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from app.platform_client import PlatformHttpClient, retry_after_seconds
+
+def response(status_code, headers=None):
+    return MagicMock(status_code=status_code, headers=headers or {})
+
+class TestPlatformHttpClient(unittest.TestCase):
+
+    def setUp(self):
+        self.client = PlatformHttpClient(retries=2, backoff=1, max_retry_after=30, compress_min_bytes=10)
+        self.session_request_patcher = patch.object(requests.Session, 'request')
+        self.session_request = self.session_request_patcher.start()
+        self.sleep_patcher = patch('app.platform_client.time.sleep')
+        self.sleep = self.sleep_patcher.start()
+
+    def tearDown(self):
+        self.session_request_patcher.stop()
+        self.sleep_patcher.stop()
+        self.client.close()
+
+    def test_session_is_reused(self):
+        self.assertIs(self.client.session, self.client.session)
+
+    def test_requests_have_a_timeout(self):
+        self.session_request.return_value = response(200)
+        self.client.request('GET', 'https://platform.test/jobs')
+        self.assertEqual(self.session_request.call_args.kwargs['timeout'], (self.client.connect_timeout, self.client.read_timeout))
+
+    def test_retries_honour_retry_after(self):
+        self.session_request.side_effect = [response(429, {'Retry-After': '7'}), response(503), response(202)]
+        on_retry = MagicMock()
+
+        result = self.client.request('POST', 'https://platform.test/jobs', data='{}', on_retry=on_retry)
+
+        self.assertEqual(result.status_code, 202)
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [7.0, 2.0])
+        self.assertEqual([call.args for call in on_retry.call_args_list], [(429, 7.0), (503, 2.0)])
+
+    def test_gives_up_after_retries(self):
+        self.session_request.return_value = response(500)
+        result = self.client.request('GET', 'https://platform.test/jobs')
+        self.assertEqual(result.status_code, 500)
+        self.assertEqual(self.session_request.call_count, 3)
+
+    def test_read_timeout_on_post_is_not_retried(self):
+        self.session_request.side_effect = requests.exceptions.ReadTimeout('slow')
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.client.request('POST', 'https://platform.test/jobs', data='{}')
+        self.session_request.assert_called_once()
+
+    def test_connection_errors_are_retried(self):
+        self.session_request.side_effect = [requests.exceptions.ConnectionError('reset'), response(202)]
+        self.assertEqual(self.client.request('POST', 'https://platform.test/jobs', data='{}').status_code, 202)
+
+    def test_compressed_body(self):
+        self.session_request.return_value = response(202)
+        body = '{"users": []}' * 10
+
+        self.client.request('POST', 'https://platform.test/jobs', headers={'Content-Type': 'application/json'},
+                            data=body, compress=True)
+
+        kwargs = self.session_request.call_args.kwargs
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(kwargs['data']).decode(), body)
+
+    def test_unsupported_compression_falls_back_to_plain_body(self):
+        self.session_request.side_effect = [response(415), response(202), response(202)]
+        body = '{"users": []}' * 10
+
+        self.client.request('POST', 'https://platform.test/jobs', data=body, compress=True)
+        self.client.request('POST', 'https://platform.test/jobs', data=body, compress=True)
+
+        self.assertEqual([call.kwargs['data'] for call in self.session_request.call_args_list[1:]], [body, body])
+
+    def test_retry_after_http_date(self):
+        self.assertEqual(retry_after_seconds(response(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})), 0.0)
+        self.assertIsNone(retry_after_seconds(response(429)))
+
+if __name__ == '__main__':
+    unittest.main()
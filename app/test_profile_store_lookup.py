@@ -0,0 +1,101 @@
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+from app.profile_store_lookup import ProfileStoreLookup, iter_query_batches
+
+class TestProfileStoreLookup(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.env_patcher = patch.dict(os.environ, {'PROFILE_SNAPSHOT_DATASET': 'test_dataset'})
+        cls.env_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.env_patcher.stop()
+
+    def setUp(self):
+        self.connections = []
+
+    def connect(self):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = lambda query, params: setattr(
+            cursor, 'rows', [(spid,) for spid in params['spids'] if not spid.endswith('x')])
+        def fetchmany(size):
+            rows, cursor.rows = cursor.rows[:size], cursor.rows[size:]
+            return rows
+        cursor.fetchmany.side_effect = fetchmany
+        self.connections.append(connection)
+        return connection
+
+    def test_query_is_parameterized(self):
+        with ProfileStoreLookup(self.connect, batch_size=10, workers=1) as lookup:
+            lookup.lookup(['user1', 'user2'])
+
+        cursor = self.connections[0].cursor.return_value.__enter__.return_value
+        query, params = cursor.execute.call_args.args
+        self.assertIn('FROM test_dataset', query)
+        self.assertIn('IN %(spids)s', query)
+        self.assertNotIn('user1', query)
+        self.assertEqual(params, {'spids': ('user1', 'user2')})
+
+    def test_batches_are_merged(self):
+        spids = [f'user{i}' for i in range(7)] + ['user1x', 'user2x']
+
+        with ProfileStoreLookup(self.connect, batch_size=2, workers=1) as lookup:
+            found = lookup.lookup(spids)
+
+        self.assertEqual(found, [f'user{i}' for i in range(7)])
+        cursor = self.connections[0].cursor.return_value.__enter__.return_value
+        self.assertEqual(cursor.execute.call_count, 5)
+        self.assertEqual(len(self.connections), 1)
+
+    def test_duplicate_spids_are_looked_up_once(self):
+        with ProfileStoreLookup(self.connect, batch_size=10, workers=1) as lookup:
+            found = lookup.lookup(['user1', 'user1', 'user2'])
+
+        self.assertEqual(found, ['user1', 'user2'])
+
+    def test_parallel_batches_use_bounded_connections(self):
+        spids = [f'user{i}' for i in range(50)]
+
+        with ProfileStoreLookup(self.connect, batch_size=5, workers=3) as lookup:
+            found = lookup.lookup(spids)
+
+        self.assertEqual(found, spids)
+        self.assertLessEqual(len(self.connections), 3)
+        for connection in self.connections:
+            connection.close.assert_called_once()
+
+    def test_failed_connection_is_discarded(self):
+        with ProfileStoreLookup(self.connect, batch_size=10, workers=1) as lookup:
+            lookup.lookup(['user1'])
+            failing = self.connections[0]
+            failing.cursor.return_value.__enter__.return_value.execute.side_effect = Exception("connection lost")
+            with self.assertRaises(Exception):
+                lookup.lookup(['user2'])
+            found = lookup.lookup(['user3'])
+
+        self.assertEqual(found, ['user3'])
+        self.assertEqual(len(self.connections), 2)
+        failing.close.assert_called_once()
+
+    def test_iter_query_batches_server_side(self):
+        connection = self.connect()
+        cursor = connection.cursor.return_value.__enter__.return_value
+
+        batches = list(iter_query_batches(connection, 'SELECT 1', {'spids': ('a', 'b', 'c')}, itersize=2, server_side=True))
+
+        self.assertEqual(batches, [[('a',), ('b',)], [('c',)]])
+        self.assertTrue(connection.cursor.call_args.kwargs['name'].startswith('gdpr_'))
+        self.assertEqual(cursor.itersize, 2)
+
+    def test_iter_query_batches_client_side(self):
+        connection = self.connect()
+
+        batches = list(iter_query_batches(connection, 'SELECT 1', {'spids': ('a',)}, itersize=2, server_side=False))
+
+        self.assertEqual(batches, [[('a',)]])
+        connection.cursor.assert_called_once_with(name=None)
+
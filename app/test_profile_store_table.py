@@ -3,7 +3,9 @@ import os
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
-from app.utils import profile_store_table_get_gdpr_deletions
+import pyarrow as pa
+from app.sql_pool import databricks_sql_pool
+from app.utils import profile_store_table_get_gdpr_deletions, iter_customer_table_daily_run_batches
 
 class TestProfileStoreTableGetGdprDeletions(unittest.TestCase):
 
@@ -26,10 +28,12 @@ class TestProfileStoreTableGetGdprDeletions(unittest.TestCase):
         cls.env_patcher.stop()
 
     def setUp(self):
-        self.mock_sql_connect_patcher = patch('app.utils.sql.connect')
+        databricks_sql_pool.close_all()
+
+        self.mock_sql_connect_patcher = patch('app.sql_pool.sql.connect')
         self.mock_sql_connect = self.mock_sql_connect_patcher.start()
 
-        self.mock_psycopg2_connect_patcher = patch('app.utils.psycopg2.connect')
+        self.mock_psycopg2_connect_patcher = patch('psycopg2.connect')
         self.mock_psycopg2_connect = self.mock_psycopg2_connect_patcher.start()
 
         self.mock_generate_access_token_patcher = patch('app.utils.generate_access_token')
@@ -69,3 +73,40 @@ class TestProfileStoreTableGetGdprDeletions(unittest.TestCase):
 
         self.mock_logging.error.assert_called_once_with("No SINGLEPROFILEID_LIST returned from customer_table_daily_run_cdd_tables.")
 
+    def test_iter_customer_table_daily_run_batches(self):
+        mock_cursor = self.mock_sql_connect.return_value.cursor.return_value.__enter__.return_value
+        table = pa.table({
+            'singl_profl_id': [f'user{i}' for i in range(3)],
+            'wallet_id': [f'wallet{i}' for i in range(3)],
+            'query_execution_date': [date(2023, 1, 1)] * 3,
+            'extra_column': [1, 2, 3]
+        })
+        mock_cursor.fetchmany_arrow.side_effect = [table.slice(0, 2), table.slice(2), table.slice(3)]
+
+        batches = list(iter_customer_table_daily_run_batches(batch_size=2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(list(batches[0].columns), ['singl_profl_id', 'wallet_id', 'query_execution_date'])
+        self.assertEqual(batches[1]['singl_profl_id'].tolist(), ['user2'])
+        mock_cursor.fetchmany_arrow.assert_called_with(2)
+        self.assertEqual(batches[0]['query_execution_date'].tolist(), [date(2023, 1, 1)] * 2)
+
+    @patch('app.utils.iter_customer_table_daily_run_batches')
+    def test_streaming_processes_each_batch(self, mock_iter_batches):
+        mock_iter_batches.return_value = iter([
+            pd.DataFrame({'singl_profl_id': ['user1', 'user2'], 'wallet_id': ['w1', 'w2'], 'query_execution_date': [date(2023, 1, 1)] * 2}),
+            pd.DataFrame({'singl_profl_id': ['user3'], 'wallet_id': ['w3'], 'query_execution_date': [date(2023, 1, 1)]}),
+        ])
+        mock_prod_cursor = self.mock_psycopg2_connect.return_value.cursor.return_value.__enter__.return_value
+        mock_prod_cursor.fetchmany.side_effect = [[('user2',)], [], [('user3',)], []]
+
+        profile_store_table_get_gdpr_deletions(streaming=True, batch_size=2)
+
+        mock_iter_batches.assert_called_once_with(2)
+        self.mock_psycopg2_connect.assert_called_once()
+        self.mock_psycopg2_connect.return_value.close.assert_called_once()
+        self.assertEqual(self.mock_write_data_to_databricks_table.call_count, 4)
+        user_deletions = [call.args[0] for call in self.mock_write_data_to_databricks_table.call_args_list if call.args[1] == 'gdpr_user_deletions']
+        self.assertEqual([df['singl_profl_id'].tolist() for df in user_deletions], [['user2'], ['user3']])
+        self.assertEqual(user_deletions[0]['wallet_id'].tolist(), ['w2'])
+
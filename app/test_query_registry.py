@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from app.query_registry import QueryRegistry, queries
+
+class TestQueryRegistry(unittest.TestCase):
+
+    def make_registry(self, **templates):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for name, text in templates.items():
+            Path(directory.name, f'{name}.sql').write_text(text)
+        return QueryRegistry(directory.name)
+
+    def test_packaged_queries_load_independent_of_working_directory(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as elsewhere:
+            os.chdir(elsewhere)
+            try:
+                registry = QueryRegistry()
+                names = registry.names()
+            finally:
+                os.chdir(cwd)
+
+        self.assertIn('gdpr_user_deletions_date', names)
+        self.assertEqual(registry['gdpr_user_deletions_date'].parameters, ('delete_date',))
+        self.assertEqual(registry['profile_store_table'].paramstyle, 'pyformat')
+        self.assertEqual(registry['profile_store_table'].parameters, ('spids',))
+
+    def test_bind_named_parameters(self):
+        query, params = queries['gdpr_user_deletions_date'].bind(delete_date='2024-01-01')
+
+        self.assertIn('execution_date = :delete_date', query)
+        self.assertEqual(params, {'delete_date': '2024-01-01'})
+
+    def test_bind_without_parameters(self):
+        query, params = queries['gdpr_user_deletions'].bind()
+        self.assertIsNone(params)
+
+    def test_bind_rejects_missing_or_unexpected_parameters(self):
+        with self.assertRaises(ValueError):
+            queries['gdpr_user_deletions_date'].bind()
+        with self.assertRaises(ValueError):
+            queries['gdpr_user_deletions_date'].bind(delete_date='2024-01-01', extra=1)
+
+    @patch.dict(os.environ, {'PROFILE_SNAPSHOT_DATASET': 'profile_snapshot'})
+    def test_identifiers_come_from_environment(self):
+        self.assertIn('FROM profile_snapshot WHERE', queries['profile_store_table'].sql())
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_missing_identifier(self):
+        with self.assertRaises(EnvironmentError):
+            queries['profile_store_table'].sql()
+
+    def test_mixed_parameter_styles_rejected(self):
+        registry = self.make_registry(bad="SELECT * FROM t WHERE a = :a AND b = %(b)s")
+        with self.assertRaises(ValueError):
+            registry.load()
+
+    def test_format_placeholders_rejected(self):
+        registry = self.make_registry(bad="SELECT * FROM t WHERE a = '{delete_date}'")
+        with self.assertRaises(ValueError):
+            registry.load()
+
+    def test_unknown_query(self):
+        registry = self.make_registry(one="SELECT 1")
+        with self.assertRaises(KeyError):
+            registry['two']
+
+if __name__ == '__main__':
+    unittest.main()
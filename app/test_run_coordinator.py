@@ -0,0 +1,165 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+import pandas as pd
+from app.models import db, RunLease
+from app.run_coordinator import LeaseLock, RunCoordinator, Shard, time_slot, utcnow
+from app.testing import create_test_app
+
+class TestLeaseLock(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_only_one_owner_at_a_time(self):
+        first = LeaseLock('daily_gdpr_run:2023-01-01', owner='node-a')
+        second = LeaseLock('daily_gdpr_run:2023-01-01', owner='node-b')
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertTrue(first.acquire())
+
+    def test_expired_lease_can_be_taken_over(self):
+        first = LeaseLock('daily_gdpr_run:2023-01-01', owner='node-a')
+        second = LeaseLock('daily_gdpr_run:2023-01-01', owner='node-b')
+        first.acquire()
+        db.session.query(RunLease).update({'expires_at': utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.renew())
+
+    def test_released_lease_is_free_unless_completed(self):
+        first = LeaseLock('daily_gdpr_run:2023-01-01', owner='node-a')
+        second = LeaseLock('daily_gdpr_run:2023-01-01', owner='node-b')
+        first.acquire()
+        first.release()
+        self.assertTrue(second.acquire())
+
+        second.release(completed=True)
+        self.assertTrue(first.completed())
+        self.assertFalse(first.acquire())
+
+    def test_heartbeat_renews_the_lease(self):
+        lock = LeaseLock('daily_gdpr_run:2023-01-01', owner='node-a', ttl=0.3)
+        lock.acquire()
+        lock.start_heartbeat()
+        try:
+            expires_at = db.session.query(RunLease.expires_at).scalar()
+            renewed_at = expires_at
+            for _ in range(50):
+                db.session.rollback()
+                renewed_at = db.session.query(RunLease.expires_at).scalar()
+                if renewed_at > expires_at:
+                    break
+                time.sleep(0.05)
+            self.assertGreater(renewed_at, expires_at)
+        finally:
+            lock.stop_heartbeat()
+
+class TestRunCoordinator(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_single_process_runs_every_shard(self):
+        coordinator = RunCoordinator(shard_count=2, poll_interval=0.01, wait_timeout=1)
+        work = MagicMock()
+
+        self.assertEqual(coordinator.run_shards('daily_gdpr_run', '2023-01-01', work), 2)
+        self.assertEqual([call.args[0] for call in work.call_args_list], [Shard(0, 2), Shard(1, 2)])
+
+    def test_shard_held_by_another_process_is_left_to_it(self):
+        LeaseLock('daily_gdpr_run:2023-01-01:shard-1-of-2', owner='node-a').acquire()
+        coordinator = RunCoordinator(shard_count=2, poll_interval=0.01, wait_timeout=0.05)
+        work = MagicMock()
+
+        self.assertEqual(coordinator.run_shards('daily_gdpr_run', '2023-01-01', work), 1)
+        work.assert_called_once_with(Shard(1, 2))
+
+    def test_shard_of_a_dead_process_is_taken_over(self):
+        LeaseLock('daily_gdpr_run:2023-01-01:shard-1-of-2', owner='node-a').acquire()
+        db.session.query(RunLease).update({'expires_at': utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        coordinator = RunCoordinator(shard_count=2, poll_interval=0.01, wait_timeout=1)
+        work = MagicMock()
+
+        self.assertEqual(coordinator.run_shards('daily_gdpr_run', '2023-01-01', work), 2)
+
+    def test_completed_run_is_not_run_again(self):
+        coordinator = RunCoordinator(shard_count=1)
+        work = MagicMock()
+        coordinator.run_shards('daily_gdpr_run', '2023-01-01', work)
+
+        self.assertEqual(coordinator.run_shards('daily_gdpr_run', '2023-01-01', work), 0)
+        work.assert_called_once_with(Shard(0, 1))
+
+    def test_failed_shard_can_be_run_again(self):
+        coordinator = RunCoordinator(shard_count=1)
+        with self.assertRaises(RuntimeError):
+            coordinator.run_shards('daily_gdpr_run', '2023-01-01', MagicMock(side_effect=RuntimeError('boom')))
+        work = MagicMock()
+
+        self.assertEqual(coordinator.run_shards('daily_gdpr_run', '2023-01-01', work), 1)
+        work.assert_called_once_with(Shard(0, 1))
+
+    def test_once_runs_the_step_a_single_time(self):
+        coordinator = RunCoordinator(poll_interval=0.01, wait_timeout=1)
+        step = MagicMock()
+
+        self.assertTrue(coordinator.once('daily_gdpr_load', '2023-01-01', step))
+        self.assertFalse(coordinator.once('daily_gdpr_load', '2023-01-01', step))
+        step.assert_called_once()
+
+    def test_once_times_out_while_another_process_holds_the_step(self):
+        LeaseLock('daily_gdpr_load:2023-01-01', owner='node-a').acquire()
+        coordinator = RunCoordinator(poll_interval=0.01, wait_timeout=0.05)
+        step = MagicMock()
+
+        with self.assertRaises(TimeoutError):
+            coordinator.once('daily_gdpr_load', '2023-01-01', step)
+        step.assert_not_called()
+
+    def test_once_without_wait_skips_a_step_held_elsewhere(self):
+        LeaseLock('gdpr_job_status_poll:2023-01-01T10:30:00', owner='node-a').acquire()
+        coordinator = RunCoordinator(poll_interval=10, wait_timeout=10)
+        step = MagicMock()
+
+        self.assertFalse(coordinator.once('gdpr_job_status_poll', '2023-01-01T10:30:00', step, wait=False))
+        self.assertTrue(coordinator.once('gdpr_job_status_poll', '2023-01-01T11:00:00', step, wait=False))
+        step.assert_called_once()
+
+    def test_time_slot(self):
+        self.assertEqual(time_slot(30, datetime(2023, 1, 1, 10, 47, 12)), datetime(2023, 1, 1, 10, 30))
+        self.assertEqual(time_slot(30, datetime(2023, 1, 1, 11, 0)), datetime(2023, 1, 1, 11, 0))
+
+class TestShard(unittest.TestCase):
+
+    def test_shards_partition_the_spids(self):
+        df = pd.DataFrame({'singl_profl_id': [f'spid-{i}' for i in range(1000)]})
+        shards = [Shard(index, 3).select(df)['singl_profl_id'].tolist() for index in range(3)]
+
+        self.assertEqual(sorted(sum(shards, [])), sorted(df['singl_profl_id']))
+        self.assertTrue(all(200 < len(shard) < 470 for shard in shards))
+
+    def test_single_shard_keeps_everything(self):
+        df = pd.DataFrame({'singl_profl_id': ['a', 'b']})
+        self.assertIs(Shard(0, 1).select(df), df)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from datetime import date, datetime
+from app.models import db, DeletionRunLedger
+from app.chunk_executor import ChunkResult
+from app.run_ledger import RunLedger, summarize_results
+from app.testing import create_test_app
+
+class TestSummarizeResults(unittest.TestCase):
+
+    def test_counts_records_by_outcome(self):
+        results = [
+            ChunkResult(start=0, end=800, success=True, request_id='request-1'),
+            ChunkResult(start=800, end=1000, success=False, request_id='request-2'),
+            ChunkResult(start=1000, end=1500, success=False),
+            ChunkResult(start=1500, end=1600, skipped=True),
+        ]
+        self.assertEqual(summarize_results(results), {'submitted': 1000, 'failed': 500, 'skipped': 100})
+
+class TestRunLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.ledger = RunLedger(record_budget=1000, time_budget=600)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_start_outside_app_context_returns_none(self):
+        self.app_context.pop()
+        try:
+            self.assertIsNone(RunLedger.start())
+        finally:
+            self.app_context.push()
+
+    def test_records_a_completed_date(self):
+        status = self.ledger.record('2023-01-01', 500, {'submitted': 500, 'failed': 0, 'skipped': 0}, datetime.now())
+
+        self.assertEqual(status, 'completed')
+        row = db.session.query(DeletionRunLedger).one()
+        self.assertEqual(row.run_id, self.ledger.run_id)
+        self.assertEqual(row.delete_date, date(2023, 1, 1))
+        self.assertEqual(row.record_budget, 1000)
+        self.assertEqual(row.records_carried_over, 0)
+
+    def test_records_carry_over_as_partial(self):
+        status = self.ledger.record(date(2023, 1, 1), 1500, {'submitted': 1000, 'failed': 0, 'skipped': 0}, datetime.now())
+
+        self.assertEqual(status, 'partial')
+        self.assertEqual(db.session.query(DeletionRunLedger).one().records_carried_over, 500)
+
+    def test_failed_records_mark_the_date_failed(self):
+        status = self.ledger.record(date(2023, 1, 1), 1500, {'submitted': 800, 'failed': 700, 'skipped': 0}, datetime.now())
+
+        self.assertEqual(status, 'failed')
+        row = db.session.query(DeletionRunLedger).one()
+        self.assertEqual((row.records_failed, row.records_carried_over), (700, 700))
+
+if __name__ == '__main__':
+    unittest.main()
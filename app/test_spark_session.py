@@ -0,0 +1,68 @@
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+from app.spark_session import SparkSessionManager
+
+class TestSparkSessionManager(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.env_patcher = patch.dict(os.environ, {
+            'DATABRICKS_SERVER_HOSTNAME': 'test_hostname',
+            'DATABRICKS_TOKEN': 'test_token',
+            'DATABRICKS_CLUSTER_ID': 'test_cluster_id'
+        })
+        cls.env_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.env_patcher.stop()
+
+    def setUp(self):
+        self.mock_spark_session_patcher = patch('app.spark_session.DatabricksSession.builder')
+        self.mock_spark_session_builder = self.mock_spark_session_patcher.start()
+        self.mock_spark_session = MagicMock()
+        self.mock_spark_session_builder.sdkConfig.return_value.getOrCreate.return_value = self.mock_spark_session
+
+        self.manager = SparkSessionManager(health_check_interval=60)
+
+    def tearDown(self):
+        self.mock_spark_session_patcher.stop()
+
+    def test_session_outside_run_is_stopped(self):
+        with self.manager.session() as spark:
+            self.assertIs(spark, self.mock_spark_session)
+
+        self.mock_spark_session.stop.assert_called_once()
+        self.assertEqual(self.manager.stats['acquisitions'], 1)
+
+    def test_session_is_reused_within_run(self):
+        with self.manager.run():
+            for _ in range(3):
+                with self.manager.session() as spark:
+                    self.assertIs(spark, self.mock_spark_session)
+            self.mock_spark_session.stop.assert_not_called()
+
+        self.mock_spark_session.stop.assert_called_once()
+        self.assertEqual(self.manager.stats['acquisitions'], 1)
+
+    def test_nested_runs_keep_session_open(self):
+        with self.manager.run():
+            with self.manager.run():
+                self.manager.get()
+            self.mock_spark_session.stop.assert_not_called()
+        self.mock_spark_session.stop.assert_called_once()
+
+    def test_reconnects_when_health_check_fails(self):
+        dead_session = MagicMock()
+        dead_session.sql.side_effect = Exception("Cluster restarted")
+        self.mock_spark_session_builder.sdkConfig.return_value.getOrCreate.side_effect = [dead_session, self.mock_spark_session]
+        self.manager.health_check_interval = 0
+
+        with self.manager.run():
+            self.assertIs(self.manager.get(), dead_session)
+            self.assertIs(self.manager.get(), self.mock_spark_session)
+
+        dead_session.stop.assert_called_once()
+        self.assertEqual(self.manager.stats['reconnects'], 1)
+        self.assertEqual(self.manager.stats['acquisitions'], 2)
@@ -0,0 +1,43 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+import pandas as pd
+import pyarrow as pa
+from app.spid_join import rss_bytes, unique_spids, user_deletion_rows
+
+class TestSpidJoin(unittest.TestCase):
+
+    def setUp(self):
+        self.daily_run = pa.table({
+            'singl_profl_id': ['user1', 'user2', 'user3', 'user2'],
+            'wallet_id': ['w1', 'w2', 'w3', 'w2b'],
+            'query_execution_date': pa.array([date(2023, 1, 1)] * 4, pa.date32()),
+        })
+
+    def test_keeps_daily_run_rows_found_in_the_profile_store(self):
+        user_deletion = user_deletion_rows(['user2', 'user3', 'user9'], self.daily_run, date(2023, 1, 2))
+
+        self.assertEqual(list(user_deletion.columns), ['singl_profl_id', 'execution_date', 'wallet_id', 'deletion_date', 'deletion_flag'])
+        self.assertEqual(user_deletion['singl_profl_id'].tolist(), ['user2', 'user3', 'user2'])
+        self.assertEqual(user_deletion['wallet_id'].tolist(), ['w2', 'w3', 'w2b'])
+        self.assertEqual(user_deletion['deletion_date'].tolist(), [date(2023, 1, 2)] * 3)
+        self.assertFalse(user_deletion['deletion_flag'].any())
+        self.assertEqual(user_deletion['singl_profl_id'].dtype, pd.StringDtype('pyarrow'))
+
+    def test_accepts_pandas_daily_run(self):
+        user_deletion = user_deletion_rows(['user1'], self.daily_run.to_pandas(), date(2023, 1, 2))
+        self.assertEqual(user_deletion['wallet_id'].tolist(), ['w1'])
+
+    def test_no_matches(self):
+        user_deletion = user_deletion_rows([], self.daily_run, date(2023, 1, 2))
+        self.assertTrue(user_deletion.empty)
+
+    def test_unique_spids(self):
+        self.assertEqual(unique_spids(self.daily_run), ['user1', 'user2', 'user3'])
+
+    @patch('app.spid_join.open', side_effect=OSError)
+    def test_rss_falls_back_to_peak_without_proc(self, mock_open):
+        self.assertGreater(rss_bytes(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+from app.sql_pool import DatabricksSqlPool
+
+class TestDatabricksSqlPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.env_patcher = patch.dict(os.environ, {
+            'DATABRICKS_SERVER_HOSTNAME': 'test_hostname',
+            'DATABRICKS_TOKEN': 'test_token',
+            'DATABRICKS_HTTP_PATH': 'test_http_path'
+        })
+        cls.env_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.env_patcher.stop()
+
+    def setUp(self):
+        self.mock_sql_connect_patcher = patch('app.sql_pool.sql.connect')
+        self.mock_sql_connect = self.mock_sql_connect_patcher.start()
+        self.mock_sql_connect.side_effect = lambda **kwargs: MagicMock()
+
+        self.pool = DatabricksSqlPool(max_size=2, idle_timeout=300, acquire_timeout=0.2, ping_after=60)
+
+    def tearDown(self):
+        self.mock_sql_connect_patcher.stop()
+
+    def test_connection_is_reused(self):
+        with self.pool.connection() as first:
+            pass
+        with self.pool.connection() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.mock_sql_connect.assert_called_once_with(
+            server_hostname='test_hostname', http_path='test_http_path', access_token='test_token')
+        stats = self.pool.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['open'], 1)
+
+    def test_connection_discarded_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.pool.connection() as connection:
+                raise ValueError("query failed")
+
+        connection.close.assert_called_once()
+        self.assertEqual(self.pool.stats()['open'], 0)
+
+    def test_closed_connection_is_replaced(self):
+        with self.pool.connection() as first:
+            first.open = False
+        with self.pool.connection() as second:
+            pass
+
+        self.assertIsNot(first, second)
+        first.close.assert_called_once()
+        self.assertEqual(self.pool.stats()['open'], 1)
+
+    def test_idle_connection_is_evicted(self):
+        with patch('app.sql_pool.time.monotonic', return_value=1000):
+            with self.pool.connection() as first:
+                pass
+        with patch('app.sql_pool.time.monotonic', return_value=1000 + 301):
+            with self.pool.connection() as second:
+                pass
+
+        self.assertIsNot(first, second)
+        first.close.assert_called_once()
+        self.assertEqual(self.pool.stats()['evictions'], 1)
+
+    def test_connection_pinged_after_idle(self):
+        with patch('app.sql_pool.time.monotonic', return_value=1000):
+            with self.pool.connection() as first:
+                pass
+        with patch('app.sql_pool.time.monotonic', return_value=1000 + 120):
+            with self.pool.connection() as second:
+                pass
+
+        self.assertIs(first, second)
+        first.cursor.return_value.__enter__.return_value.execute.assert_called_once_with("SELECT 1")
+
+    def test_pool_is_bounded(self):
+        with self.pool.connection(), self.pool.connection():
+            with self.assertRaises(TimeoutError):
+                with self.pool.connection():
+                    pass
+        self.assertEqual(self.mock_sql_connect.call_count, 2)
+
+    def test_waiting_caller_gets_released_connection(self):
+        results = []
+        with self.pool.connection() as first, self.pool.connection():
+            def borrow():
+                with self.pool.connection() as connection:
+                    results.append(connection)
+            waiter = threading.Thread(target=borrow)
+            waiter.start()
+        waiter.join()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(self.mock_sql_connect.call_count, 2)
@@ -0,0 +1,149 @@
+import os
+import json
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch, MagicMock
+import numpy as np
+import pandas as pd
+from app.sql_writer import SqlWarehouseWriter, WriteBackends, column_type, quote_identifier, to_parameter
+from app.utils import merge_data_to_databricks_table, write_data_to_databricks_table
+
+class TestSqlWarehouseWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = MagicMock()
+        self.cursor = self.pool.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        self.writer = SqlWarehouseWriter(pool=self.pool, max_payload_bytes=1024)
+
+    def test_write_sends_one_insert_with_the_rows_as_one_parameter(self):
+        dataframe = pd.DataFrame({'singl_profl_id': ['a', 'b', None], 'deletion_flag': [False, True, False]})
+
+        self.assertTrue(self.writer.write(dataframe, 'catalog.schema.table'))
+
+        statement, params = self.cursor.execute.call_args.args
+        self.cursor.execute.assert_called_once()
+        self.assertEqual(statement,
+                         "INSERT INTO `catalog`.`schema`.`table` (`singl_profl_id`, `deletion_flag`) "
+                         "SELECT inline(from_json(:rows, 'ARRAY<STRUCT<`singl_profl_id`: STRING, `deletion_flag`: BOOLEAN>>'))")
+        self.assertEqual(json.loads(params['rows']), [
+            {'singl_profl_id': 'a', 'deletion_flag': False},
+            {'singl_profl_id': 'b', 'deletion_flag': True},
+            {'singl_profl_id': None, 'deletion_flag': False},
+        ])
+
+    def test_write_is_never_split_across_statements(self):
+        dataframe = pd.DataFrame({'singl_profl_id': [f'spid-{i}' for i in range(100)]})
+
+        self.assertFalse(self.writer.fits(dataframe))
+        self.assertFalse(self.writer.write(dataframe, 'table'))
+        self.cursor.execute.assert_not_called()
+
+    def test_merge_deduplicates_source_rows(self):
+        dataframe = pd.DataFrame({
+            'singl_profl_id': ['a', 'a'],
+            'deletion_flag': [True, True],
+            'deletion_date': [date(2023, 1, 1), date(2023, 1, 2)],
+        })
+
+        self.assertTrue(self.writer.merge(dataframe, 'schema.table', 'singl_profl_id', ('deletion_flag', 'deletion_date')))
+
+        statement, params = self.cursor.execute.call_args.args
+        self.assertEqual(statement,
+                         "MERGE INTO `schema`.`table` AS tgt USING (SELECT inline(from_json(:rows, "
+                         "'ARRAY<STRUCT<`singl_profl_id`: STRING, `deletion_flag`: BOOLEAN, `deletion_date`: DATE>>'))) AS src "
+                         "ON tgt.`singl_profl_id` = src.`singl_profl_id` WHEN MATCHED THEN UPDATE SET "
+                         "tgt.`deletion_flag` = src.`deletion_flag`, tgt.`deletion_date` = src.`deletion_date`")
+        self.assertEqual(json.loads(params['rows']), [{'singl_profl_id': 'a', 'deletion_flag': True, 'deletion_date': '2023-01-02'}])
+
+    def test_column_types(self):
+        dataframe = pd.DataFrame({
+            'count': [1, 2], 'ratio': [0.5, np.nan], 'flag': [None, True],
+            'at': pd.to_datetime(['2023-01-01 10:00', None]), 'spid': pd.array(['a', 'b'], dtype='string[pyarrow]'),
+        })
+        self.assertEqual([column_type(dataframe[column]) for column in dataframe.columns],
+                         ['BIGINT', 'DOUBLE', 'BOOLEAN', 'TIMESTAMP', 'STRING'])
+
+    def test_failed_statement_returns_false(self):
+        self.cursor.execute.side_effect = Exception('warehouse unavailable')
+        self.assertFalse(self.writer.write(pd.DataFrame({'id': [1]}), 'table'))
+
+    def test_nested_values_are_rejected(self):
+        self.assertFalse(self.writer.fits(pd.DataFrame({'customer': [{'user': {'key': 'a'}}]})))
+        self.assertFalse(self.writer.write(pd.DataFrame({'customer': [{'user': {'key': 'a'}}]}), 'table'))
+        self.cursor.execute.assert_not_called()
+
+    def test_to_parameter(self):
+        self.assertEqual(to_parameter(np.int64(3)), 3)
+        self.assertIsInstance(to_parameter(np.int64(3)), int)
+        self.assertIsNone(to_parameter(np.nan))
+        self.assertIsNone(to_parameter(pd.NaT))
+
+    def test_quote_identifier_rejects_injection(self):
+        with self.assertRaises(ValueError):
+            quote_identifier('table`; DROP TABLE x')
+
+class TestWriteBackends(unittest.TestCase):
+
+    def setUp(self):
+        config = tempfile.NamedTemporaryFile('w', suffix='.yml', delete=False)
+        config.write("small_table: sql\njobs:\n  write: spark\n  merge: sql\n")
+        config.close()
+        self.addCleanup(os.unlink, config.name)
+        self.backends = WriteBackends(config.name, default='spark')
+
+    def test_backend_per_table_and_operation(self):
+        self.assertEqual(self.backends.backend('small_table', 'write'), 'sql')
+        self.assertEqual(self.backends.backend('jobs', 'write'), 'spark')
+        self.assertEqual(self.backends.backend('jobs', 'merge'), 'sql')
+        self.assertEqual(self.backends.backend('other_table', 'merge'), 'spark')
+
+    @patch('app.utils.write_backends')
+    @patch('app.utils.sql_writer', SqlWarehouseWriter(pool=MagicMock(), max_payload_bytes=100))
+    @patch('app.utils.spark_sessions')
+    def test_writes_too_big_for_one_statement_use_spark(self, mock_spark_sessions, mock_write_backends):
+        mock_write_backends.backend.return_value = 'sql'
+        dataframe = pd.DataFrame({'singl_profl_id': list('abc'), 'deletion_flag': [True] * 3, 'deletion_date': [date(2023, 1, 1)] * 3})
+
+        with patch('app.utils.sql_writer.write') as mock_write, patch('app.utils.sql_writer.merge') as mock_merge:
+            write_data_to_databricks_table(dataframe, 'gdpr_user_deletions')
+            merge_data_to_databricks_table(dataframe, 'gdpr_user_deletions', 'singl_profl_id')
+
+        mock_write.assert_not_called()
+        mock_merge.assert_not_called()
+        self.assertEqual(mock_spark_sessions.session.call_count, 2)
+
+    @patch('app.utils.write_backends')
+    @patch('app.utils.sql_writer')
+    @patch('app.spark_session.DatabricksSession.builder')
+    def test_sql_tables_skip_the_spark_session(self, mock_builder, mock_sql_writer, mock_write_backends):
+        mock_write_backends.backend.return_value = 'sql'
+        mock_sql_writer.fits.return_value = True
+        dataframe = pd.DataFrame({'singl_profl_id': ['a'], 'deletion_flag': [True], 'deletion_date': [date(2023, 1, 1)]})
+
+        write_data_to_databricks_table(dataframe, 'gdpr_user_deletions')
+        merge_data_to_databricks_table(dataframe, 'gdpr_user_deletions', 'singl_profl_id')
+
+        mock_sql_writer.write.assert_called_once_with(dataframe, 'custanwo.customer_transformation.gdpr_user_deletions')
+        mock_sql_writer.merge.assert_called_once_with(dataframe, 'custanwo.customer_transformation.gdpr_user_deletions',
+                                                      'singl_profl_id', ('deletion_flag', 'deletion_date'))
+        mock_builder.sdkConfig.assert_not_called()
+
+    @patch('app.spark_session.DatabricksSession.builder')
+    def test_chunk_sized_merge_goes_through_sql(self, mock_builder):
+        pool = MagicMock()
+        cursor = pool.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        dataframe = pd.DataFrame({'singl_profl_id': [f'spid-{i:08d}' for i in range(800)],
+                                  'deletion_flag': True, 'deletion_date': date(2023, 1, 1)})
+
+        with patch('app.utils.sql_writer', SqlWarehouseWriter(pool=pool)):
+            self.assertTrue(merge_data_to_databricks_table(dataframe, 'gdpr_user_deletions', 'singl_profl_id'))
+
+        statement, params = cursor.execute.call_args.args
+        cursor.execute.assert_called_once()
+        self.assertTrue(statement.startswith('MERGE INTO `custanwo`.`customer_transformation`.`gdpr_user_deletions`'))
+        self.assertEqual(len(json.loads(params['rows'])), 800)
+        mock_builder.sdkConfig.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+import numpy as np
+from app.models import db, DeletionChunk, DeletionJob
+from app.checkpoints import ensure_checkpoint_tables
+from app.submitted_index import SubmittedSpidIndex
+from app.testing import create_test_app
+
+class TestSubmittedSpidIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        ensure_checkpoint_tables()
+        self.index = SubmittedSpidIndex(confirm_batch_size=2)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_jobs(self, request_id, spids, delete_date=date(2023, 1, 1)):
+        db.session.add(DeletionChunk(delete_date=delete_date, chunk_start=0, chunk_end=len(spids), spids='[]',
+                                     request_id=request_id, status='accepted'))
+        for spid in spids:
+            db.session.add(DeletionJob(user_key=spid, job_id=f'job-{spid}', request_id=request_id))
+        db.session.commit()
+
+    def test_submitted_returns_request_ids(self):
+        self.add_jobs('request-1', ['user1', 'user2'])
+        self.add_jobs('request-2', ['user3'])
+
+        submitted = self.index.submitted(['user0', 'user1', 'user2', 'user3', 'user4'], date(2023, 1, 1))
+
+        self.assertEqual(submitted, {'user1': 'request-1', 'user2': 'request-1', 'user3': 'request-2'})
+
+    def test_new_jobs_are_picked_up_after_first_load(self):
+        self.add_jobs('request-1', ['user1'])
+        self.assertEqual(self.index.submitted(['user1', 'user2'], date(2023, 1, 1)), {'user1': 'request-1'})
+
+        self.add_jobs('request-2', ['user2'])
+        self.assertEqual(self.index.submitted(['user1', 'user2'], date(2023, 1, 1)), {'user1': 'request-1', 'user2': 'request-2'})
+
+    def test_hash_collisions_are_not_treated_as_submitted(self):
+        self.add_jobs('request-1', ['user1'])
+
+        with patch('app.submitted_index.hash_spids', side_effect=lambda spids: np.zeros(len(list(spids)), dtype=np.uint64)):
+            submitted = self.index.submitted(['user1', 'user2', 'user3'], date(2023, 1, 1))
+
+        self.assertEqual(submitted, {'user1': 'request-1'})
+
+    def test_jobs_of_other_dates_are_not_submitted(self):
+        self.add_jobs('request-1', ['user1'], delete_date=date(2022, 12, 31))
+        self.add_jobs('request-2', ['user2'])
+
+        self.assertEqual(self.index.submitted(['user1', 'user2'], '2023-01-01'), {'user2': 'request-2'})
+        self.assertEqual(self.index.submitted(['user1', 'user2'], date(2022, 12, 31)), {'user1': 'request-1'})
+
+    def test_empty_table(self):
+        self.assertEqual(self.index.submitted(['user1'], date(2023, 1, 1)), {})
+
+if __name__ == '__main__':
+    unittest.main()
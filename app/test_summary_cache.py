@@ -0,0 +1,95 @@
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+from app.models import db
+from app.summary_cache import SharedGeneration, StaleWhileRevalidateCache
+from app.testing import create_test_app
+
+class TestStaleWhileRevalidateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.loader = MagicMock(side_effect=lambda: f'value{self.loader.call_count}')
+        self.cache = StaleWhileRevalidateCache(self.loader, ttl=60, stale_ttl=300)
+
+    def test_fresh_value_is_cached(self):
+        with patch('app.summary_cache.time.monotonic', return_value=1000):
+            self.assertEqual(self.cache.get(), 'value1')
+        with patch('app.summary_cache.time.monotonic', return_value=1059):
+            self.assertEqual(self.cache.get(), 'value1')
+        self.loader.assert_called_once()
+
+    def test_stale_value_served_while_refreshing(self):
+        refreshed = threading.Event()
+        self.loader.side_effect = lambda: (refreshed.set() if self.loader.call_count > 1 else None) or f'value{self.loader.call_count}'
+
+        with patch('app.summary_cache.time.monotonic', return_value=1000):
+            self.cache.get()
+        with patch('app.summary_cache.time.monotonic', return_value=1100):
+            self.assertEqual(self.cache.get(), 'value1')
+            self.assertTrue(refreshed.wait(1))
+        for thread in threading.enumerate():
+            if thread.name.endswith('-refresh'):
+                thread.join(1)
+        with patch('app.summary_cache.time.monotonic', return_value=1101):
+            self.assertEqual(self.cache.get(), 'value2')
+
+    def test_expired_value_is_reloaded(self):
+        with patch('app.summary_cache.time.monotonic', return_value=1000):
+            self.cache.get()
+        with patch('app.summary_cache.time.monotonic', return_value=1000 + 361):
+            self.assertEqual(self.cache.get(), 'value2')
+
+    def test_invalidate_forces_reload(self):
+        self.cache.get()
+        self.cache.invalidate()
+
+        self.assertEqual(self.cache.get(), 'value2')
+
+    def test_failed_load_is_not_cached(self):
+        self.loader.side_effect = [None, 'value']
+
+        self.assertIsNone(self.cache.get())
+        self.assertEqual(self.cache.get(), 'value')
+
+    def test_load_started_before_invalidate_is_discarded(self):
+        def load():
+            self.cache.invalidate()
+            return 'old'
+        self.loader.side_effect = lambda: load() if self.loader.call_count == 1 else 'new'
+
+        self.assertEqual(self.cache.get(), 'old')
+        self.assertEqual(self.cache.get(), 'new')
+
+class TestSharedGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_invalidate_in_one_process_reaches_the_others(self):
+        loads = {'this': MagicMock(side_effect=['this1', 'this2']), 'other': MagicMock(side_effect=['other1', 'other2'])}
+        this = StaleWhileRevalidateCache(loads['this'], ttl=60, stale_ttl=300, shared=SharedGeneration('summary'))
+        other = StaleWhileRevalidateCache(loads['other'], ttl=60, stale_ttl=300, shared=SharedGeneration('summary'))
+        self.assertEqual((this.get(), other.get()), ('this1', 'other1'))
+        self.assertEqual(other.get(), 'other1')
+
+        this.invalidate()
+
+        self.assertEqual(other.get(), 'other2')
+        self.assertEqual(other.get(), 'other2')
+        self.assertEqual(this.get(), 'this2')
+
+    def test_generation_without_app_context(self):
+        self.app_context.pop()
+        try:
+            generation = SharedGeneration('summary')
+            generation.bump()
+            self.assertIsNone(generation.current())
+        finally:
+            self.app_context.push()
@@ -0,0 +1,60 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from app.token_cache import AccessTokenCache
+
+class TestAccessTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = AccessTokenCache(refresh_margin=60)
+
+    def test_returns_cached_token_until_refresh(self):
+        fetch = MagicMock(return_value={'access_token': 'token1', 'expires_in': 3600})
+
+        self.assertEqual(self.cache.get('client', 'scope', fetch), 'token1')
+        self.assertEqual(self.cache.get('client', 'scope', fetch), 'token1')
+        fetch.assert_called_once()
+
+    def test_refreshes_token_inside_margin(self):
+        fetch = MagicMock(side_effect=[
+            {'access_token': 'token1', 'expires_in': 3600},
+            {'access_token': 'token2', 'expires_in': 3600},
+        ])
+
+        with patch('app.token_cache.time.monotonic', return_value=1000):
+            self.assertEqual(self.cache.get('client', 'scope', fetch), 'token1')
+        with patch('app.token_cache.time.monotonic', return_value=1000 + 3600 - 30):
+            self.assertEqual(self.cache.get('client', 'scope', fetch), 'token2')
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_tokens_are_keyed_by_client_and_scope(self):
+        fetch = MagicMock(side_effect=lambda: {'access_token': f'token{fetch.call_count}', 'expires_in': 3600})
+
+        self.assertEqual(self.cache.get('client1', 'scope', fetch), 'token1')
+        self.assertEqual(self.cache.get('client2', 'scope', fetch), 'token2')
+        self.assertEqual(self.cache.get('client1', 'other_scope', fetch), 'token3')
+
+    def test_invalidate_forces_refresh(self):
+        fetch = MagicMock(return_value={'access_token': 'token1', 'expires_in': 3600})
+
+        self.cache.get('client', 'scope', fetch)
+        self.cache.invalidate('client', 'scope')
+        self.cache.get('client', 'scope', fetch)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_concurrent_callers_refresh_once(self):
+        def slow_fetch():
+            time.sleep(0.05)
+            return {'access_token': 'token1', 'expires_in': 3600}
+        fetch = MagicMock(side_effect=slow_fetch)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get('client', 'scope', fetch))) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['token1'] * 10)
+        fetch.assert_called_once()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from app.write_buffer import DeltaWriteBuffer
+
+def chunk_frames(spids):
+    jobs_df = pd.DataFrame({'jobId': [f'job-{spid}' for spid in spids]})
+    user_deletions_df = pd.DataFrame({'deletion_flag': True, 'singl_profl_id': spids, 'deletion_date': None})
+    return jobs_df, user_deletions_df
+
+class TestDeltaWriteBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.write = MagicMock(return_value=True)
+        self.merge = MagicMock(return_value=True)
+
+    def test_flushes_once_at_end_of_run(self):
+        with DeltaWriteBuffer(self.write, self.merge, max_rows=100, max_seconds=300) as buffer:
+            buffer.add(*chunk_frames(['user1', 'user2']))
+            buffer.add(*chunk_frames(['user3']))
+            self.write.assert_not_called()
+
+        self.write.assert_called_once()
+        jobs_df, table_name = self.write.call_args.args
+        self.assertEqual(table_name, 'gdpr_deletion_jobs')
+        self.assertEqual(jobs_df['jobId'].tolist(), ['job-user1', 'job-user2', 'job-user3'])
+        self.merge.assert_called_once()
+        user_deletions_df, table_name, match_column = self.merge.call_args.args
+        self.assertEqual((table_name, match_column), ('gdpr_user_deletions', 'singl_profl_id'))
+        self.assertEqual(user_deletions_df['singl_profl_id'].tolist(), ['user1', 'user2', 'user3'])
+
+    def test_flushes_at_row_threshold(self):
+        with DeltaWriteBuffer(self.write, self.merge, max_rows=2, max_seconds=300) as buffer:
+            buffer.add(*chunk_frames(['user1']))
+            self.merge.assert_not_called()
+            buffer.add(*chunk_frames(['user2']))
+            self.merge.assert_called_once()
+            buffer.add(*chunk_frames(['user3']))
+
+        self.assertEqual(self.merge.call_count, 2)
+
+    def test_flushes_at_time_threshold(self):
+        with patch('app.write_buffer.time.monotonic', return_value=1000):
+            buffer = DeltaWriteBuffer(self.write, self.merge, max_rows=100, max_seconds=60)
+            buffer.add(*chunk_frames(['user1']))
+        with patch('app.write_buffer.time.monotonic', return_value=1061):
+            buffer.add(*chunk_frames(['user2']))
+
+        self.merge.assert_called_once()
+
+    def test_flushes_when_run_fails(self):
+        with self.assertRaises(RuntimeError):
+            with DeltaWriteBuffer(self.write, self.merge, max_rows=100, max_seconds=300) as buffer:
+                buffer.add(*chunk_frames(['user1']))
+                raise RuntimeError("run failed")
+
+        self.merge.assert_called_once()
+
+    def test_failed_merge_is_retried_on_next_flush(self):
+        self.merge.side_effect = [False, True]
+
+        with patch('app.write_buffer.logging') as mock_logging:
+            with DeltaWriteBuffer(self.write, self.merge, max_rows=1, max_seconds=300) as buffer:
+                buffer.add(*chunk_frames(['user1']))
+                buffer.add(*chunk_frames(['user2']))
+
+        self.assertEqual(self.merge.call_args.args[0]['singl_profl_id'].tolist(), ['user1', 'user2'])
+        self.write.assert_called()
+        mock_logging.error.assert_not_called()
+
+    def test_unwritten_deletions_are_logged(self):
+        self.merge.side_effect = Exception("Delta unavailable")
+
+        with patch('app.write_buffer.logging') as mock_logging:
+            with DeltaWriteBuffer(self.write, self.merge, max_rows=100, max_seconds=300) as buffer:
+                buffer.add(*chunk_frames(['user1']))
+
+        mock_logging.error.assert_any_call("1 acknowledged deletions could not be written to gdpr_user_deletions: ['user1']")
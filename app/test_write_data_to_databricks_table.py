@@ -20,7 +20,7 @@ class TestWriteDataToDatabricksTable(unittest.TestCase):
         cls.env_patcher.stop()
 
     def setUp(self):
-        self.mock_spark_session_patcher = patch('app.utils.DatabricksSession.builder')
+        self.mock_spark_session_patcher = patch('app.spark_session.DatabricksSession.builder')
         self.mock_spark_session_builder = self.mock_spark_session_patcher.start()
         self.mock_spark_session = MagicMock()
         self.mock_spark_session_builder.sdkConfig.return_value.getOrCreate.return_value = self.mock_spark_session
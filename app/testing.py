@@ -0,0 +1,10 @@
+from flask import Flask
+from app.models import db
+
+
+def create_test_app():
+    """Flask app on an in-memory SQLite database for tests of the app-database tables."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
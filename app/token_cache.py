@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+import logging
+
+
+class AccessTokenCache:
+    """Process-wide cache of IMS access tokens keyed by (client_id, scope)."""
+
+    def __init__(self, refresh_margin=None):
+        if refresh_margin is None:
+            refresh_margin = float(os.environ.get('IMS_TOKEN_REFRESH_MARGIN', 300))
+        self.refresh_margin = refresh_margin
+        self._tokens = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _fresh_token(self, key):
+        entry = self._tokens.get(key)
+        if entry and time.monotonic() < entry['refresh_at']:
+            return entry['access_token']
+        return None
+
+    def get(self, client_id, scope, fetch):
+        """Return a cached token, calling fetch() for a new IMS response when it is missing or due for refresh."""
+        key = (client_id, scope)
+        token = self._fresh_token(key)
+        if token:
+            return token
+
+        # Only one caller per key refreshes; the rest wait and pick up its token.
+        with self._key_lock(key):
+            token = self._fresh_token(key)
+            if token:
+                return token
+
+            response_data = fetch()
+            access_token = response_data['access_token']
+            expires_in = float(response_data.get('expires_in', 0))
+            refresh_at = time.monotonic() + max(expires_in - self.refresh_margin, 0)
+            self._tokens[key] = {'access_token': access_token, 'refresh_at': refresh_at}
+            logging.info(f"Fetched new IMS access token for client {client_id}, expires in {expires_in} seconds.")
+            return access_token
+
+    def invalidate(self, client_id, scope):
+        with self._lock:
+            self._tokens.pop((client_id, scope), None)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+access_token_cache = AccessTokenCache()
@@ -2,75 +2,89 @@ import os
 import requests
 import yaml
 import json
-import psycopg2
-from databricks import sql
 import pandas as pd
+import pyarrow as pa
 from datetime import datetime, date
+from flask import has_app_context
 from app.models import *
 from sqlalchemy import func, and_
 from sqlalchemy.orm import aliased
 import logging
 import time
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from psycopg2 import extras
-from databricks.connect import DatabricksSession
-from databricks.sdk.core import Config as DatabricksConfig
-from delta.tables import DeltaTable
-
-
-
-def merge_data_to_databricks_table(dataframe, table_name, match_column):
-    config = DatabricksConfig(
-        host=f'https://{os.environ.get("DATABRICKS_SERVER_HOSTNAME")}',
-        token=os.environ.get("DATABRICKS_TOKEN"),
-        cluster_id=os.environ.get('DATABRICKS_CLUSTER_ID') 
-    )
-    spark = DatabricksSession.builder.sdkConfig(config).getOrCreate()
-    
-    spark_df = spark.createDataFrame(dataframe)
-    full_table_name = f'custanwo.customer_transformation.{table_name}'
-    
-    logging.info(f"Merging data into table: {full_table_name}")
-    
-    try:
-        # Load Delta Table
-        delta_table = DeltaTable.forName(spark, full_table_name)
+import math
+from functools import partial
+from pathlib import Path
+from app.token_cache import access_token_cache
+from app.platform_client import platform_client
+from app.spark_session import spark_sessions
+from app.sql_pool import databricks_sql_pool
+from app.chunk_executor import AdaptiveChunkSizer, submit_deletion_chunks
+from app.payload_builder import build_users_from_chunk, build_privacy_payload
+from app.profile_store_lookup import ProfileStoreLookup
+from app.databricks_fetch import fetch_dataframe, iter_arrow_batches
+from app.spid_join import log_memory, unique_spids, user_deletion_rows
+from app.summary_cache import SharedGeneration, StaleWhileRevalidateCache
+from app.write_buffer import DeltaWriteBuffer
+from app.checkpoints import CheckpointStore
+from app.submitted_index import submitted_spids
+from app.job_status_poller import JobStatusPoller
+from app.metrics import pipeline_metrics
+from app.query_registry import queries
+from app.sql_writer import SQL, sql_writer, write_backends
+from app.run_ledger import RunLedger, run_status, summarize_results, FAILED, PARTIAL
+
+DDL_DIRECTORY = Path(__file__).resolve().parent / 'ddl'
+
+
+def merge_data_to_databricks_table(dataframe, table_name, match_column, update_columns=('deletion_flag', 'deletion_date')):
+    if write_backends.backend(table_name, 'merge') == SQL and sql_writer.fits(dataframe[[match_column, *update_columns]]):
+        return sql_writer.merge(dataframe, f'custanwo.customer_transformation.{table_name}', match_column, update_columns)
+
+    from delta.tables import DeltaTable
+
+    with spark_sessions.session() as spark, pipeline_metrics.timed('delta_merge', rows=len(dataframe)) as timing:
+        spark_df = spark.createDataFrame(dataframe)
+        full_table_name = f'custanwo.customer_transformation.{table_name}'
         
-        # Perform Merge Operation
-        merge_result = delta_table.alias("tgt").merge(
-            spark_df.alias("src"),
-            f"tgt.{match_column} = src.{match_column}"  # Matching condition
-        ).whenMatchedUpdate(set={
-            "deletion_flag": "src.deletion_flag",
-            'deletion_date': 'src.deletion_date' # Update deletion_flag
-        }).execute()
-                
-        logging.info(f"Data successfully merged into table '{full_table_name}'.")
-    
-    except Exception as e:
-        logging.error(f"Error merging data into table '{full_table_name}': {str(e)}")
-    
-    spark.stop()
+        logging.info(f"Merging data into table: {full_table_name}")
+        
+        try:
+            # Load Delta Table
+            delta_table = DeltaTable.forName(spark, full_table_name)
+            
+            # Perform Merge Operation
+            merge_result = delta_table.alias("tgt").merge(
+                spark_df.alias("src"),
+                f"tgt.{match_column} = src.{match_column}"  # Matching condition
+            ).whenMatchedUpdate(set={
+                column: f"src.{column}" for column in update_columns
+            }).execute()
+                    
+            logging.info(f"Data successfully merged into table '{full_table_name}'.")
+            return True
+        
+        except Exception as e:
+            logging.error(f"Error merging data into table '{full_table_name}': {str(e)}")
+            timing.error = True
+            return False
         
 
 def write_data_to_databricks_table(dataframe, table_name):
-    config = DatabricksConfig(
-        host=f'https://{os.environ.get("DATABRICKS_SERVER_HOSTNAME")}',
-        token=os.environ.get("DATABRICKS_TOKEN"),
-        cluster_id=os.environ.get('DATABRICKS_CLUSTER_ID') 
-        )
-    spark = DatabricksSession.builder.sdkConfig(config).getOrCreate()
-    
-    spark_df = spark.createDataFrame(dataframe)
-    table_name = f'custanwo.customer_transformation.{table_name}'
-    print(table_name)
-    try:
-        spark_df.write.format('delta').mode('append').saveAsTable(table_name)
-        logging.info(f"Data successfully written to table '{table_name}'.")
-    except Exception as e:
-        logging.error(f"Error writing data to table '{table_name}': {str(e)}")
-    spark.stop()
+    if write_backends.backend(table_name, 'write') == SQL and sql_writer.fits(dataframe):
+        return sql_writer.write(dataframe, f'custanwo.customer_transformation.{table_name}')
+
+    with spark_sessions.session() as spark, pipeline_metrics.timed('delta_write', rows=len(dataframe)) as timing:
+        spark_df = spark.createDataFrame(dataframe)
+        table_name = f'custanwo.customer_transformation.{table_name}'
+        print(table_name)
+        try:
+            spark_df.write.format('delta').mode('append').saveAsTable(table_name)
+            logging.info(f"Data successfully written to table '{table_name}'.")
+            return True
+        except Exception as e:
+            logging.error(f"Error writing data to table '{table_name}': {str(e)}")
+            timing.error = True
+            return False
         
 
 def validate_env_vars():
@@ -79,201 +93,160 @@ def validate_env_vars():
     if missing_vars:
         raise EnvironmentError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-def generate_access_token():
+def request_ims_access_token(client_id, client_secret, scope):
     validate_env_vars()
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    client_secret = os.environ['CLIENT_SECRET']
-    client_id = os.environ['API_KEY']
-    scope = os.environ['SCOPES']
     payload = {"client_id": client_id, "scope": scope, "client_secret": client_secret,
                'grant_type': 'client_credentials'}
-    
-    # Retry mechanism
-    session = requests.Session()
-    retry = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-    session.mount('https://', HTTPAdapter(max_retries=retry))
-    
+
     try:
-        response = session.post('https://ims-na1.adobelogin.com/ims/token/v3', headers=headers, data=payload)
-        response.raise_for_status()
-        return response.json()['access_token']
+        with pipeline_metrics.timed('token_fetch'):
+            response = platform_client.request('POST', 'https://ims-na1.adobelogin.com/ims/token/v3', headers=headers, data=payload)
+            response.raise_for_status()
+        return response.json()
     except requests.exceptions.RequestException as e:
         logging.error(f"Error generating access token: {e}")
         raise
 
+def generate_access_token():
+    client_id = os.environ.get('API_KEY')
+    scope = os.environ.get('SCOPES')
+    return access_token_cache.get(
+        client_id, scope,
+        lambda: request_ims_access_token(client_id, os.environ.get('CLIENT_SECRET'), scope)
+    )
+
 def generate_access_token_cdp_gdpr_execution():
-    validate_env_vars()
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    client_secret = os.environ['GDPR_CLIENT_SECRET']
-    client_id = os.environ['GDRP_API_KEY']
-    scope = os.environ['SCOPES']
-    payload = {"client_id": client_id, "scope": scope, "client_secret": client_secret,
-               'grant_type': 'client_credentials'}
+    client_id = os.environ.get('GDRP_API_KEY')
+    scope = os.environ.get('SCOPES')
+    return access_token_cache.get(
+        client_id, scope,
+        lambda: request_ims_access_token(client_id, os.environ.get('GDPR_CLIENT_SECRET'), scope)
+    )
 
+DAILY_RUN_COLUMNS = ['singl_profl_id', 'wallet_id', 'query_execution_date']
 
-    session = requests.Session()
-    retry = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-    session.mount('https://', HTTPAdapter(max_retries=retry))
+def iter_customer_table_daily_run_arrow_batches(batch_size=None):
+    """Yield the day's cust_gdpr_table rows as pyarrow Tables of at most batch_size rows."""
+    query, params = queries['cust_gdpr_table'].bind()
+    logging.info(f"Executing query: {query}")
 
-    try:
-        response = session.post('https://ims-na1.adobelogin.com/ims/token/v3', headers=headers, data=payload)
-        response.raise_for_status()
-        return response.json()['access_token']
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error generating access token: {e}")
-        raise
+    with databricks_sql_pool.connection() as connection, connection.cursor() as cursor:
+        with pipeline_metrics.timed('databricks_query'):
+            cursor.execute(query, params)
+
+        chunk_count = 0
+        batches = (table.select(DAILY_RUN_COLUMNS) for table in iter_arrow_batches(cursor, batch_size))
+        for batch in pipeline_metrics.timed_iter('databricks_fetch', batches):
+            chunk_count += 1
+            logging.info(f"Processed chunk {chunk_count} with {batch.num_rows} records.")
+            yield batch
+
+def iter_customer_table_daily_run_batches(batch_size=1000):
+    """Yield the day's cust_gdpr_table rows as DataFrames of at most batch_size rows."""
+    for batch in iter_customer_table_daily_run_arrow_batches(batch_size):
+        yield batch.to_pandas()
 
 def customer_table_daily_run_cdd_tables():
+    """Return (row count, daily run) with the daily run kept as one Arrow table."""
     start_time = time.time()
     
     try:
-        connection = sql.connect(
-            server_hostname=os.environ.get("DATABRICKS_SERVER_HOSTNAME"),
-            http_path=os.environ.get("DATABRICKS_HTTP_PATH"),
-            access_token=os.environ.get("DATABRICKS_TOKEN")
-        )
-        with open('./app/sql_queries/cust_gdpr_table.sql', 'r') as file:
-            query = file.read()
-            logging.info(f"Executing query: {query}")
-        
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-        
-            daily_gdpr_run_objects = []
-            chunk_count = 0
-            while True:
-                result = cursor.fetchmany(1000)
-                if not result:
-                    break
-                chunk_count += 1
-                daily_gdpr_run_objects.extend([
-                    {'singl_profl_id': row['singl_profl_id'], 'wallet_id': row['wallet_id'], 'query_execution_date': row['query_execution_date']}
-                    for row in result
-                ])
-                
-
-                logging.info(f"Processed chunk {chunk_count} with {len(result)} records.")
-        
+        batches = list(iter_customer_table_daily_run_arrow_batches())
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         return None
 
-    finally:
-        if 'connection' in locals() and connection:
-            connection.close()
-
     end_time = time.time()
     logging.info(f"Time taken: {end_time - start_time} seconds")
     
-    df_daily_gdpr_run = pd.DataFrame(daily_gdpr_run_objects)    
-    return ', '.join([f"'{obj['singl_profl_id']}'" for obj in daily_gdpr_run_objects]), df_daily_gdpr_run
+    if not batches:
+        return 0, pa.table({column: [] for column in DAILY_RUN_COLUMNS})
+    daily_run = pa.concat_tables(batches)
+    log_memory(f"Loaded {daily_run.num_rows} daily run rows ({daily_run.nbytes / 1024 / 1024:.1f} MB in Arrow)")
+    return daily_run.num_rows, daily_run
+
+def connect_profile_store():
+    import psycopg2
+
+    return psycopg2.connect(
+        user=os.environ.get('IMS_ORG'),
+        password=generate_access_token(),
+        host=os.environ.get('HOST'),
+        port=os.environ.get('PORT'),
+        database=os.environ.get('PRODDB')
+    )
+
+def write_profile_store_results(profile_spids, daily_run_data_frame):
+    execution_date = datetime.today().date()
+    df_profile_table = pd.DataFrame({'singl_profl_id': profile_spids})
+    df_profile_table['execution_date'] = execution_date
+    user_deletion = user_deletion_rows(profile_spids, daily_run_data_frame, execution_date)
+    
+    write_data_to_databricks_table(df_profile_table, 'gdpr_profile_export_snapshot')
+    write_data_to_databricks_table(user_deletion, 'gdpr_user_deletions')
+    spids_count_cache.invalidate()
+
+def profile_store_table_get_gdpr_deletions(streaming=None, batch_size=None):
+    if streaming is None:
+        streaming = os.environ.get('GDPR_DAILY_RUN_STREAMING', 'false').lower() == 'true'
+    if streaming:
+        return profile_store_table_stream_gdpr_deletions(batch_size)
 
-def profile_store_table_get_gdpr_deletions():
     result = customer_table_daily_run_cdd_tables()
     if result is None:
         logging.error("Failed to retrieve data from customer_table_daily_run_cdd_tables.")
         return
-    single_profile_list, daily_run_data_frame = result
+    spid_count, daily_run = result
     
-    if not single_profile_list:
+    if not spid_count:
         logging.error("No SINGLEPROFILEID_LIST returned from customer_table_daily_run_cdd_tables.")
         return
     
-    with open('./app/sql_queries/profile_store_table.sql', 'r') as file:
-        query_template = file.read()      
-    query = query_template.format(PROFILE_SNAPSHOT_DATASET=os.getenv('PROFILE_SNAPSHOT_DATASET'), SINGLEPROFILEID_LIST=single_profile_list)   
-    prod_connection = None
-     
     try:
-        prod_connection = psycopg2.connect(
-            user=os.environ.get('IMS_ORG'),
-            password=generate_access_token(),
-            host=os.environ.get('HOST'),
-            port=os.environ.get('PORT'),
-            database=os.environ.get('PRODDB')
-        )
-        with prod_connection.cursor(cursor_factory=extras.DictCursor) as prod_cursor:
-            prod_cursor.execute(query)
-            profile_table_objects = []
-            chunk_count = 0
-            while True:
-                result = prod_cursor.fetchmany(1000)
-                if not result:
-                    break
-                chunk_count += 1
-
-                profile_table_objects.extend([
-                    {'singl_profl_id': row['singl_profl_id']}
-                    for row in result
-                ])
-                logging.info(f"Processed chunk {chunk_count} with {len(result)} records.")
+        with ProfileStoreLookup(connect_profile_store) as lookup:
+            profile_spids = lookup.lookup(unique_spids(daily_run))
+        log_memory(f"Found {len(profile_spids)} of {spid_count} SPIDs in the profile store")
                                 
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         return None
-   
-    finally:
-        if 'prod_connection' in locals() and prod_connection:
-            prod_connection.close()
             
-    df_profile_table = pd.DataFrame([obj['singl_profl_id'] for obj in profile_table_objects])
-    df_profile_table.rename(columns={0: 'singl_profl_id'}, inplace=True)
-    df_profile_table['execution_date'] = datetime.today().date()
-    user_deletion = df_profile_table.merge(daily_run_data_frame, on='singl_profl_id', how='inner')
-    user_deletion.drop(columns=['query_execution_date'], inplace=True)
-    user_deletion['deletion_date'] = datetime.today().date()
-    user_deletion['deletion_flag'] = False
-    
-    write_data_to_databricks_table(df_profile_table, 'gdpr_profile_export_snapshot')
-    write_data_to_databricks_table(user_deletion, 'gdpr_user_deletions')
-    
-    
-        
-def gdpr_deletions_api_call(chunk):
-    try : 
-    
-        company_context_data = [
-            {"namespace": "imsOrgID", "value": "B9CB1CFE53309CAD0A490D45@AdobeOrg"}
-        ]
-
-        include_data = ["profileService", "aepDataLake", "identity"]
-
-        df_company_contexts = pd.DataFrame(company_context_data)
-        df_include = pd.DataFrame(include_data, columns=["include"])
-
-        grouped_users = chunk.groupby('key').agg({
-            'action': lambda x: list(x),
-            'namespace': lambda x: list(x),
-            'value': lambda x: list(x),
-            'type': lambda x: list(x)
-        }).reset_index()
-
-        users = []
-        for _, row in grouped_users.iterrows():
-            user = {
-                "key": row['key'],
-                "action": row['action'],
-                "userIDs": [
-                    {"namespace": ns, "value": val, "type": typ}
-                    for ns, val, typ in zip(row['namespace'], row['value'], row['type'])
-                ]
-            }
-            users.append(user)
-            
-        company_contexts = df_company_contexts.to_dict(orient='records')
+    write_profile_store_results(profile_spids, daily_run)
+
+def profile_store_table_stream_gdpr_deletions(batch_size=None):
+    """Run the profile-store lookup, join and writes one cust_gdpr_table batch at a time.
 
-        include = df_include['include'].tolist()
+    Only the current batch is held in memory, so peak usage follows batch_size
+    rather than the size of the day's table.
+    """
+    batch_size = batch_size or int(os.environ.get('GDPR_DAILY_RUN_BATCH_SIZE', 1000))
+    start_time = time.time()
+    batch_count = 0
+
+    try:
+        with ProfileStoreLookup(connect_profile_store) as lookup:
+            for daily_run_batch in iter_customer_table_daily_run_batches(batch_size):
+                batch_count += 1
+                profile_spids = lookup.lookup(daily_run_batch['singl_profl_id'])
+                write_profile_store_results(profile_spids, daily_run_batch)
 
-        regulation = "gdpr"
+    except Exception as e:
+        logging.error(f"An error occurred: {e}")
+        return None
 
-        final_json = {
-            "companyContexts": company_contexts,
-            "users": users,
-            "include": include,
-            "regulation": regulation
+    if not batch_count:
+        logging.error("No SINGLEPROFILEID_LIST returned from customer_table_daily_run_cdd_tables.")
+        return
+    logging.info(f"Streamed {batch_count} batches in {time.time() - start_time} seconds")
+    
         
-        }
-        payload = json.dumps(final_json)
+def gdpr_deletions_api_call(chunk, result=None, write_buffer=None):
+    try : 
+    
+        with pipeline_metrics.timed('payload_build', rows=len(chunk)):
+            users = build_users_from_chunk(chunk)
+            payload = build_privacy_payload(users)
         access_token = generate_access_token_cdp_gdpr_execution()
         url = os.getenv('PRIVACY_END_POINT')
         headers = {
@@ -284,12 +257,27 @@ def gdpr_deletions_api_call(chunk):
     'x-gw-ims-org-id': os.environ.get('IMS_ORG')
                     }
         
-        response = requests.request("POST", url, headers=headers, data=payload)
+        def on_retry(status_code, delay):
+            # Retried 429s and 5xx still tell the adaptive chunk sizer to back off.
+            if result is not None:
+                result.retried = True
+
+        with pipeline_metrics.timed('privacy_post', rows=len(users)) as timing:
+            response = platform_client.request(
+                "POST", url, headers=headers, data=payload, on_retry=on_retry,
+                compress=os.environ.get('PRIVACY_API_GZIP', 'false').lower() == 'true'
+            )
+            timing.error = response.status_code != 202
+        if result is not None:
+            result.status_code = response.status_code
         
         if response.status_code == 202:
             
             response_data = response.json()
             request_id = response_data['requestId']
+            if result is not None:
+                result.request_id = request_id
+                result.jobs = response_data['jobs']
             total_records = response_data['totalRecords']
             jobs = response_data['jobs']
 
@@ -306,20 +294,23 @@ def gdpr_deletions_api_call(chunk):
             # Create a DataFrame from the jobs data
             jobs_df = pd.DataFrame(jobs)
             jobs_df['execution_date'] = datetime.today().date()
-                        
-            write_data_to_databricks_table(jobs_df, 'gdpr_deletion_jobs')
-
             
-            user_deletions_df = pd.DataFrame(users)
-            user_deletions_df['deletion_flag'] = True
-            user_deletions_df['singl_profl_id'] = user_deletions_df['key']
-            user_deletions_df['deletion_date'] = datetime.today().date()
-            user_deletions_df = user_deletions_df[['deletion_flag', 'singl_profl_id','deletion_date']]
+            user_deletions_df = pd.DataFrame({
+                'deletion_flag': True,
+                'singl_profl_id': [user['key'] for user in users],
+                'deletion_date': datetime.today().date()
+            })
             
-            merge_data_to_databricks_table(user_deletions_df, 'gdpr_user_deletions', 'singl_profl_id')
+            if write_buffer is not None:
+                write_buffer.add(jobs_df, user_deletions_df)
+            else:
+                write_data_to_databricks_table(jobs_df, 'gdpr_deletion_jobs')
+                merge_data_to_databricks_table(user_deletions_df, 'gdpr_user_deletions', 'singl_profl_id')
             
             return True
         else:
+            if response.status_code == 401:
+                access_token_cache.invalidate(os.environ.get('GDRP_API_KEY'), os.environ.get('SCOPES'))
             logging.error(f"Deletion request failed. Status code: {response.status_code}, Response: {response.text}")
             return False
 
@@ -329,7 +320,106 @@ def gdpr_deletions_api_call(chunk):
         return False
     
     
-def execute_gdpr_deletions_cdp(delete_date=None, flash=None):
+def skip_submitted_spids(df, delete_date):
+    """Drop the SPIDs the privacy service has already accepted a job for on delete_date.
+
+    Their rows in gdpr_user_deletions are flagged, as the run that submitted
+    them may have stopped before its own Delta merge.
+    """
+    already_submitted = submitted_spids.submitted(df['singl_profl_id'], delete_date)
+    if already_submitted:
+        request_ids = sorted(set(already_submitted.values()))
+        logging.info(f"Resuming {delete_date}: skipping {len(already_submitted)} SPIDs already accepted "
+                     f"in {len(request_ids)} requests: {request_ids[:10]}")
+        merge_data_to_databricks_table(pd.DataFrame({
+            'deletion_flag': True,
+            'singl_profl_id': list(already_submitted),
+            'deletion_date': datetime.today().date()
+        }), 'gdpr_user_deletions', 'singl_profl_id')
+        df = df[~df['singl_profl_id'].isin(already_submitted.keys())].reset_index(drop=True)
+    return df
+
+
+def submit_user_deletions(df, delete_date, stop_on_failure=False, resume=None, chunk_size=None, progress=None,
+                          deadline=None):
+    """Submit a date's SPIDs to the privacy service in chunks and checkpoint each chunk.
+
+    With resume (GDPR_RESUME_RUNS, on by default) SPIDs the privacy service has
+    already accepted a job for on this date are left out, so a rerun only
+    submits the rest.
+    Without a fixed chunk_size the size adapts to the API's responses unless
+    GDPR_ADAPTIVE_CHUNK_SIZE is false, in which case GDPR_CHUNK_SIZE is used.
+    progress, if given, is told the totals up front and about every finished chunk.
+    No chunk is started after deadline (a time.monotonic() value); those come back skipped.
+    """
+    if chunk_size is None:
+        if os.environ.get('GDPR_ADAPTIVE_CHUNK_SIZE', 'true').lower() == 'true':
+            chunk_size = AdaptiveChunkSizer()
+        else:
+            chunk_size = int(os.environ.get('GDPR_CHUNK_SIZE', 800))
+    if resume is None:
+        resume = os.environ.get('GDPR_RESUME_RUNS', 'true').lower() == 'true'
+    checkpoints = CheckpointStore.for_date(delete_date)
+    if checkpoints and resume:
+        df = skip_submitted_spids(df, delete_date)
+
+    # Prepare data for API call
+    df = df.assign(
+        key=df['singl_profl_id'],
+        action='delete',
+        namespace='SPID',
+        value=df['singl_profl_id'],
+        type='custom'
+    )
+
+    def on_result(chunk, result):
+        if progress:
+            progress.chunk_done(result)
+        if checkpoints:
+            checkpoints.record(chunk, result)
+
+    if progress:
+        expected_size = chunk_size.next_size() if isinstance(chunk_size, AdaptiveChunkSizer) else chunk_size
+        progress.start(total_chunks=math.ceil(len(df) / expected_size), total_records=len(df))
+
+    # Process deletions in chunks
+    with DeltaWriteBuffer(write_data_to_databricks_table, merge_data_to_databricks_table) as write_buffer:
+        results = submit_deletion_chunks(
+            df, partial(gdpr_deletions_api_call, write_buffer=write_buffer),
+            chunk_size=chunk_size, stop_on_failure=stop_on_failure,
+            on_result=on_result, deadline=deadline
+        )
+    spids_count_cache.invalidate()
+    return results
+
+
+def load_user_deletions(delete_date, query_name='gdpr_user_deletions_date'):
+    query, params = queries[query_name].bind(delete_date=str(delete_date))
+    logging.info(f"Executing query: {query} with {params}")
+
+    with databricks_sql_pool.connection() as connection, connection.cursor() as cursor, \
+            pipeline_metrics.timed('databricks_query') as timing:
+        cursor.execute(query, params)
+        user_deletions = fetch_dataframe(cursor)
+        timing.rows = len(user_deletions)
+    return user_deletions
+
+
+def gdpr_deletion_backlog(until):
+    """Return the dates up to until that still have unflagged deletions, oldest first, with their counts."""
+    query, params = queries['gdpr_user_deletions_backlog'].bind(delete_date=str(until))
+    logging.info(f"Executing query: {query} with {params}")
+
+    with databricks_sql_pool.connection() as connection, connection.cursor() as cursor, \
+            pipeline_metrics.timed('databricks_query') as timing:
+        cursor.execute(query, params)
+        backlog = fetch_dataframe(cursor)
+        timing.rows = len(backlog)
+    return backlog
+
+
+@spark_sessions.run()
+def execute_gdpr_deletions_cdp(delete_date=None, flash=None, resume=None, progress=None):
     if not delete_date:
         logging.warning("No delete_date provided. Exiting function.")
         if flash:
@@ -337,33 +427,16 @@ def execute_gdpr_deletions_cdp(delete_date=None, flash=None):
         return
     
     try:
-        
-        connection = sql.connect(
-            server_hostname=os.environ.get("DATABRICKS_SERVER_HOSTNAME"),
-            http_path=os.environ.get("DATABRICKS_HTTP_PATH"),
-            access_token=os.environ.get("DATABRICKS_TOKEN")
-        )
-        with open('./app/sql_queries/gdpr_user_deletions_date.sql', 'r') as file:
-            query_template = file.read()
-            query = query_template.format(delete_date=delete_date)
-            logging.info(f"Executing query: {query}")
-            
-        
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-            user_deletions_list = cursor.fetchall()
-        
+        user_deletions = load_user_deletions(delete_date)
     except Exception as e:
         logging.error(f"An error occurred: {e}")
+        if progress:
+            progress.add_error(f"Could not load user deletions for {delete_date}: {e}")
         return None
 
-    finally:
-        if 'connection' in locals() and connection:
-            connection.close()
-
     try:
         
-        df = pd.DataFrame(user_deletions_list)
+        df = user_deletions
 
         if df.empty:
             logging.info(f"No user deletions to process for {delete_date}")
@@ -371,20 +444,15 @@ def execute_gdpr_deletions_cdp(delete_date=None, flash=None):
                 flash(f"No user deletions to process for {delete_date}.", "info")
             return
 
-        # Prepare data for API call
-        df['key'] = df[0]
-        df['action'] = 'delete'
-        df['namespace'] = 'SPID'
-        df['value'] = df[0]
-        df['type'] = 'custom'
-
+        results = submit_user_deletions(df, delete_date, resume=resume, progress=progress)
+        failed = [result for result in results if not result.success]
+        for result in failed:
+            logging.error(f"Failed to process chunk {result.start}-{result.end} for {delete_date}")
 
-        # Process deletions in chunks
-        chunk_size = 800
-        for start in range(0, len(df), chunk_size):
-            end = min(start + chunk_size, len(df))
-            chunk = df.iloc[start:end]
-            gdpr_deletions_api_call(chunk)
+        if failed:
+            if flash:
+                flash(f"{len(failed)} of {len(results)} chunks failed while processing GDPR deletions for {delete_date}.", "warning")
+            return
 
         logging.info(f"Successfully processed GDPR deletions for {delete_date}")
         if flash:
@@ -398,106 +466,166 @@ def execute_gdpr_deletions_cdp(delete_date=None, flash=None):
 
 
 
-def auto_execute_gdpr_deletions_cdp(delete_date=None):
-    profile_store_table_get_gdpr_deletions()
-    
+@spark_sessions.run()
+def auto_execute_gdpr_deletions_cdp(delete_date=None, stop_on_failure=True, resume=None, record_budget=None,
+                                    time_budget=None, shard=None, load_daily_run=True):
+    """Nightly run: load the daily run, then work through every date up to delete_date that
+    still has unflagged deletions, oldest first.
+
+    A run submits at most record_budget records (GDPR_AUTO_RECORD_BUDGET, 0 for no limit)
+    and starts no chunk after time_budget seconds (GDPR_AUTO_TIME_BUDGET_MINUTES); the rest
+    is carried over to the next run. Each date worked on gets a deletion_run_ledger row.
+    stop_on_failure stops a date at its first failed chunk; the run then moves on to the
+    next date, so a date that keeps failing does not hold up the newer ones.
+    With a shard, only the SPIDs of that shard are submitted and the budgets apply to it.
+    load_daily_run=False skips the daily run load when the caller has already done it.
+    """
+    if load_daily_run:
+        profile_store_table_get_gdpr_deletions()
+
     if not delete_date:
         logging.warning("No delete_date provided. Exiting function.")
         return
+    if record_budget is None:
+        record_budget = int(os.environ.get('GDPR_AUTO_RECORD_BUDGET', 10000))
+    if time_budget is None:
+        time_budget = float(os.environ.get('GDPR_AUTO_TIME_BUDGET_MINUTES', 180)) * 60
+    if resume is None:
+        resume = os.environ.get('GDPR_RESUME_RUNS', 'true').lower() == 'true'
+    remaining = record_budget if record_budget > 0 else None
+    deadline = time.monotonic() + time_budget if time_budget > 0 else None
+
     try:
-        
-        connection = sql.connect(
-            server_hostname=os.environ.get("DATABRICKS_SERVER_HOSTNAME"),
-            http_path=os.environ.get("DATABRICKS_HTTP_PATH"),
-            access_token=os.environ.get("DATABRICKS_TOKEN")
-        )
-        with open('./app/sql_queries/gdpr_user_deletions_date.sql', 'r') as file:
-            query_template = file.read()
-            query = query_template.format(delete_date=delete_date)
-            logging.info(f"Executing query: {query}")
-            
-        
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-            user_deletions_list = cursor.fetchall()
-        
+        backlog = gdpr_deletion_backlog(delete_date)
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         return None
 
-    finally:
-        if 'connection' in locals() and connection:
-            connection.close()
-        
-        # Check the number of records due for deletion
-        record_count = len(user_deletions_list)
-        if record_count >= 1000:
-            logging.info(f"More than 1000 records ({record_count}) found for {delete_date}. Manual intervention required.")
-            return
-
-        logging.info(f"Fewer than 1000 records ({record_count}) found for {delete_date}. Proceeding with automatic deletion.")
+    if backlog.empty:
+        logging.info(f"No user deletions to process for {delete_date}")
+        return
 
+    logging.info(f"{int(backlog['cnt'].sum())} records on {len(backlog)} dates are due for deletion; "
+                 f"record budget {remaining or 'unlimited'}, time budget {time_budget or 'unlimited'}s.")
+    ledger = RunLedger.start(record_budget, time_budget, shard=str(shard) if shard else None)
     try:
-        df = pd.DataFrame(user_deletions_list)
+        for execution_date in backlog['execution_date']:
+            if remaining == 0 or (deadline is not None and time.monotonic() >= deadline):
+                logging.info(f"Run budget used up; carrying the backlog from {execution_date} over to the next run.")
+                break
+
+            started_at = datetime.now()
+            try:
+                pending = load_user_deletions(execution_date, 'gdpr_user_deletions_pending')
+            except Exception as e:
+                logging.error(f"An error occurred: {e}")
+                return None
+            if shard is not None:
+                pending = shard.select(pending)
+            if resume and has_app_context() and not pending.empty:
+                pending = skip_submitted_spids(pending, execution_date)
+            if pending.empty:
+                logging.info(f"No user deletions to process for {execution_date}")
+                continue
+
+            batch = pending if remaining is None else pending.iloc[:remaining]
+            results = submit_user_deletions(batch, execution_date, stop_on_failure=stop_on_failure, resume=False,
+                                            deadline=deadline)
+            summary = summarize_results(results)
+            if remaining is not None:
+                remaining -= len(batch) - summary['skipped']
+            if ledger:
+                ledger.record(execution_date, len(pending), summary, started_at)
+
+            for result in results:
+                if result.success:
+                    continue
+                if result.skipped:
+                    logging.warning(f"Skipped chunk {result.start}-{result.end} for {execution_date}")
+                else:
+                    logging.error(f"Failed to process chunk {result.start}-{result.end} for {execution_date}")
+
+            status = run_status(len(pending), summary)
+            if status == FAILED:
+                logging.error(f"GDPR deletions for {execution_date} failed; moving on to the next date.")
+                continue
+            if status == PARTIAL:
+                logging.info(f"Submitted {summary['submitted']} of {len(pending)} records for {execution_date}; "
+                             f"carrying {len(pending) - summary['submitted']} over to the next run.")
+                break
+
+            logging.info(f"Successfully processed GDPR deletions for {execution_date}")
 
-        if df.empty:
-            logging.info(f"No user deletions to process for {delete_date}")
-            return
+    except Exception as e:
+        logging.error(f"Error in auto_execute_gdpr_deletions_cdp: {e}", exc_info=True)
+        raise
 
-        # Prepare data for API call
-        df['key'] = df[0]
-        df['action'] = 'delete'
-        df['namespace'] = 'SPID'
-        df['value'] = df[0]
-        df['type'] = 'custom'
 
+def apply_ddl(name):
+    """Run the one-off DDL statement in ddl/<name>.sql against the SQL warehouse."""
+    path = DDL_DIRECTORY / f'{name}.sql'
+    if not name.isidentifier() or not path.is_file():
+        raise ValueError(f"No DDL statement named '{name}' in {DDL_DIRECTORY}.")
+    statement = path.read_text().strip()
+    logging.info(f"Applying {name}: {statement}")
+    with databricks_sql_pool.connection() as connection, connection.cursor() as cursor:
+        cursor.execute(statement)
 
-        # Process deletions in chunks
-        chunk_size = 800
-        for start in range(0, len(df), chunk_size):
-            end = min(start + chunk_size, len(df))
-            chunk = df.iloc[start:end]
-            success = gdpr_deletions_api_call(chunk)  #
 
-            if not success:
-                logging.error(f"Failed to process chunk {start}-{end} for {delete_date}")
-                return
+def poll_gdpr_job_statuses(limit=None):
+    """Refresh the status of privacy jobs that have not finished yet.
 
-        logging.info(f"Successfully processed GDPR deletions for {delete_date}")
-  
-    except Exception as e:
-        logging.error(f"Error in execute_gdpr_deletions_cdp: {e}", exc_info=True)
-        raise
+    Only non-terminal jobs are read, at most limit (GDPR_JOB_POLL_MAX_JOBS) per
+    cycle, and all changes are written back with a single MERGE.
+    """
+    limit = limit or int(os.environ.get('GDPR_JOB_POLL_MAX_JOBS', 5000))
+    query, params = queries['gdpr_deletion_jobs_pending'].bind(limit=limit)
 
+    with databricks_sql_pool.connection() as connection, connection.cursor() as cursor, \
+            pipeline_metrics.timed('databricks_query') as timing:
+        cursor.execute(query, params)
+        pending = fetch_dataframe(cursor)
+        timing.rows = len(pending)
+
+    if pending.empty:
+        logging.info("No pending privacy jobs to poll.")
+        return 0
+
+    changes = JobStatusPoller(generate_access_token_cdp_gdpr_execution).poll(pending)
+    if changes.empty:
+        return 0
+    if not merge_data_to_databricks_table(changes, 'gdpr_deletion_jobs', 'jobId', update_columns=('status', 'status_updated_at')):
+        return 0
+    logging.info(f"Updated the status of {len(changes)} privacy jobs.")
+    return len(changes)
 
 
-       
 def get_spids_count_by_gdprdate():
     start_time = time.time()
     
     try:
-        connection = sql.connect(
-            server_hostname=os.environ.get("DATABRICKS_SERVER_HOSTNAME"),
-            http_path=os.environ.get("DATABRICKS_HTTP_PATH"),
-            access_token=os.environ.get("DATABRICKS_TOKEN")
-        )
-        with open('./app/sql_queries/gdpr_user_deletions.sql', 'r') as file:
-            query = file.read()
-            logging.info(f"Executing query: {query}")
+        query, params = queries['gdpr_user_deletions'].bind()
+        logging.info(f"Executing query: {query}")
         
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-            spids_by_date = cursor.fetchall()
+        with databricks_sql_pool.connection() as connection, connection.cursor() as cursor, \
+                pipeline_metrics.timed('databricks_query') as timing:
+            cursor.execute(query, params)
+            spids_by_date = list(fetch_dataframe(cursor).itertuples(index=False))
+            timing.rows = len(spids_by_date)
         
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         return None
 
-    finally:
-        if 'connection' in locals() and connection:
-            connection.close()
-
     end_time = time.time()
     logging.info(f"Time taken: {end_time - start_time} seconds")
-    total_count = sum(row['cnt'] for row in spids_by_date)
+    logging.debug(f"Databricks SQL pool stats: {databricks_sql_pool.stats()}")
+    total_count = sum(int(row.cnt) for row in spids_by_date)
     return total_count, spids_by_date
+
+spids_count_cache = StaleWhileRevalidateCache(lambda: get_spids_count_by_gdprdate(), name='spids count summary',
+                                              shared=SharedGeneration('spids_count_summary'))
+
+def get_cached_spids_count_by_gdprdate():
+    return spids_count_cache.get()
+
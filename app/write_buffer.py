@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+import logging
+import pandas as pd
+
+
+class DeltaWriteBuffer:
+    """Collects job rows and deletion-flag updates across the chunks of a run.
+
+    Rows are written as one append to gdpr_deletion_jobs and one MERGE into
+    gdpr_user_deletions when the buffer reaches max_rows or max_seconds, and
+    always when the run exits, including when it exits with an error.
+    """
+
+    def __init__(self, write, merge, max_rows=None, max_seconds=None):
+        self.write = write
+        self.merge = merge
+        self.max_rows = max_rows or int(os.environ.get('GDPR_WRITE_BUFFER_MAX_ROWS', 10000))
+        self.max_seconds = max_seconds or float(os.environ.get('GDPR_WRITE_BUFFER_MAX_SECONDS', 300))
+        self._jobs = []
+        self._deletions = []
+        self._rows = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        with self._lock:
+            spids = [spid for df in self._deletions for spid in df['singl_profl_id']]
+            job_rows = sum(len(df) for df in self._jobs)
+        if spids:
+            logging.error(f"{len(spids)} acknowledged deletions could not be written to gdpr_user_deletions: {spids}")
+        if job_rows:
+            logging.error(f"{job_rows} job rows could not be written to gdpr_deletion_jobs.")
+
+    def add(self, jobs_df, user_deletions_df):
+        with self._lock:
+            self._jobs.append(jobs_df)
+            self._deletions.append(user_deletions_df)
+            self._rows += len(user_deletions_df)
+            due = self._rows >= self.max_rows or time.monotonic() - self._started >= self.max_seconds
+        if due:
+            self.flush()
+
+    def _call(self, writer, *args):
+        try:
+            return writer(*args)
+        except Exception as e:
+            logging.error(f"Error flushing write buffer to '{args[1]}': {e}")
+            return False
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                jobs, self._jobs = self._jobs, []
+                deletions, self._deletions = self._deletions, []
+                self._rows = 0
+                self._started = time.monotonic()
+
+            # Anything that fails to write goes back into the buffer for the next flush.
+            if jobs:
+                jobs_df = pd.concat(jobs, ignore_index=True)
+                logging.info(f"Flushing {len(jobs_df)} rows to gdpr_deletion_jobs.")
+                if not self._call(self.write, jobs_df, 'gdpr_deletion_jobs'):
+                    with self._lock:
+                        self._jobs.insert(0, jobs_df)
+            if deletions:
+                user_deletions_df = pd.concat(deletions, ignore_index=True)
+                logging.info(f"Flushing {len(user_deletions_df)} deletion flags to gdpr_user_deletions.")
+                if not self._call(self.merge, user_deletions_df, 'gdpr_user_deletions', 'singl_profl_id'):
+                    with self._lock:
+                        self._deletions.insert(0, user_deletions_df)
+                        self._rows += len(user_deletions_df)
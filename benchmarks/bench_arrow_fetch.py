@@ -0,0 +1,91 @@
+"""Compare the Arrow fetch path with the row-object path for Databricks SQL results.
+
+Each measurement runs in a fresh process so peak RSS is not shared between paths.
+Run from the repository root with: python -m benchmarks.bench_arrow_fetch
+"""
+import multiprocessing
+import resource
+import time
+from datetime import date
+import pyarrow as pa
+import pandas as pd
+from databricks.sql.types import Row
+from app.databricks_fetch import iter_arrow_batches
+
+COLUMNS = ['singl_profl_id', 'wallet_id', 'query_execution_date']
+
+
+class FakeRowCursor:
+    """Hands out Row objects the way the connector's fetchmany() does."""
+
+    def __init__(self, table):
+        self.table = table
+        self.offset = 0
+        self.row_type = Row(*COLUMNS)
+
+    def fetchmany(self, size):
+        batch = self.table.slice(self.offset, size)
+        self.offset += batch.num_rows
+        return [self.row_type(*values) for values in zip(*(batch.column(c).to_pylist() for c in COLUMNS))]
+
+
+class FakeArrowCursor:
+
+    def __init__(self, table):
+        self.table = table
+        self.offset = 0
+
+    def fetchmany_arrow(self, size):
+        batch = self.table.slice(self.offset, size)
+        self.offset += batch.num_rows
+        return batch
+
+
+def make_table(rows):
+    return pa.table({
+        'singl_profl_id': [f'spid-{i:010d}' for i in range(rows)],
+        'wallet_id': [f'wallet-{i:010d}' for i in range(rows)],
+        'query_execution_date': pa.array([date(2024, 1, 1)] * rows, pa.date32()),
+    })
+
+
+def row_path(cursor):
+    objects = []
+    while True:
+        result = cursor.fetchmany(1000)
+        if not result:
+            break
+        objects.extend([{column: row[column] for column in COLUMNS} for row in result])
+    return pd.DataFrame(objects)
+
+
+def arrow_path(cursor):
+    return pa.concat_tables(iter_arrow_batches(cursor, 10000)).to_pandas()
+
+
+def measure(path, rows, queue):
+    table = make_table(rows)
+    cursor = FakeRowCursor(table) if path == 'rows' else FakeArrowCursor(table)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    df = row_path(cursor) if path == 'rows' else arrow_path(cursor)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert len(df) == rows
+    queue.put((elapsed, (peak - baseline) / 1024))
+
+
+def main():
+    context = multiprocessing.get_context('spawn')
+    for rows in (100_000, 1_000_000):
+        for path in ('rows', 'arrow'):
+            queue = context.Queue()
+            process = context.Process(target=measure, args=(path, rows, queue))
+            process.start()
+            elapsed, extra_peak_mb = queue.get()
+            process.join()
+            print(f"{rows:>9} rows  {path:>5}  {rows / elapsed:12,.0f} rows/s  +{extra_peak_mb:8.1f} MB peak RSS")
+
+
+if __name__ == '__main__':
+    main()
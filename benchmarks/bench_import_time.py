@@ -0,0 +1,60 @@
+"""Measure cold-start import time and memory of the app modules.
+
+Every sample imports the target in a fresh interpreter, the way a new gunicorn
+worker or flask CLI call does. The "eager" rows also import the Spark, Delta and
+Postgres stacks up front, which is what app.utils used to cost on import.
+Run from the repository root with: python -m benchmarks.bench_import_time [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ('pyspark', 'delta', 'databricks.connect', 'databricks.sdk', 'databricks.sql', 'psycopg2')
+
+TARGETS = {
+    'app.utils': 'import app.utils',
+    'app.app': 'import app.app',
+    'app.utils (eager)': 'import app.utils, delta.tables, databricks.connect, databricks.sql, psycopg2',
+}
+
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+'''
+
+
+def sample(statement):
+    env = dict(os.environ, SECRET_KEY=os.environ.get('SECRET_KEY', 'benchmark'))
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    options = parser.parse_args()
+
+    print(f"{'target':<20}{'median s':>10}{'min s':>8}{'RSS MB':>9}  heavy modules loaded")
+    for name, statement in TARGETS.items():
+        samples = [sample(statement) for _ in range(options.runs)]
+        seconds = [s['seconds'] for s in samples]
+        rss = statistics.median(s['max_rss_mb'] for s in samples)
+        heavy = ', '.join(samples[0]['heavy']) or '-'
+        print(f"{name:<20}{statistics.median(seconds):>10.3f}{min(seconds):>8.3f}{rss:>9.1f}  {heavy}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Compare the privacy payload builder with the previous groupby/iterrows path.
+
+Run from the repository root with: python -m benchmarks.bench_payload_builder
+"""
+import json
+import timeit
+import pandas as pd
+from app.payload_builder import build_users_from_chunk, build_privacy_payload
+
+
+def make_chunk(size):
+    df = pd.DataFrame([f'spid-{i:08d}' for i in range(size)])
+    df['key'] = df[0]
+    df['action'] = 'delete'
+    df['namespace'] = 'SPID'
+    df['value'] = df[0]
+    df['type'] = 'custom'
+    return df
+
+
+def legacy_payload(chunk):
+    df_company_contexts = pd.DataFrame([{"namespace": "imsOrgID", "value": "B9CB1CFE53309CAD0A490D45@AdobeOrg"}])
+    df_include = pd.DataFrame(["profileService", "aepDataLake", "identity"], columns=["include"])
+    grouped_users = chunk.groupby('key').agg({
+        'action': lambda x: list(x),
+        'namespace': lambda x: list(x),
+        'value': lambda x: list(x),
+        'type': lambda x: list(x)
+    }).reset_index()
+    users = []
+    for _, row in grouped_users.iterrows():
+        users.append({
+            "key": row['key'],
+            "action": row['action'],
+            "userIDs": [
+                {"namespace": ns, "value": val, "type": typ}
+                for ns, val, typ in zip(row['namespace'], row['value'], row['type'])
+            ]
+        })
+    return json.dumps({
+        "companyContexts": df_company_contexts.to_dict(orient='records'),
+        "users": users,
+        "include": df_include['include'].tolist(),
+        "regulation": "gdpr"
+    })
+
+
+def builder_payload(chunk):
+    return build_privacy_payload(build_users_from_chunk(chunk))
+
+
+def main():
+    for size in (800, 10_000):
+        chunk = make_chunk(size)
+        assert json.loads(legacy_payload(chunk)) == json.loads(builder_payload(chunk))
+        repeat = 20 if size <= 800 else 3
+        legacy = min(timeit.repeat(lambda: legacy_payload(chunk), number=1, repeat=repeat))
+        builder = min(timeit.repeat(lambda: builder_payload(chunk), number=1, repeat=repeat))
+        print(f"{size:>6} rows  legacy {legacy * 1000:8.2f} ms  builder {builder * 1000:8.2f} ms  speedup {legacy / builder:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
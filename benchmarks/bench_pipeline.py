@@ -0,0 +1,128 @@
+"""Run the nightly GDPR pipeline end to end against local fakes.
+
+The daily-run lookup, profile store writes, privacy submissions, Delta writes
+and checkpoints all run for real; Databricks SQL, the Query Service, IMS, the
+Privacy Service and Delta tables are replaced by the stand-ins in
+pipeline_fakes. Each load runs in a fresh process so peak RSS is per load.
+
+Run from the repository root with: python -m benchmarks.bench_pipeline
+  --sizes 1000 10000 100000 1000000 --latency 0.02 --throttle-rate 0.01
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import time
+from datetime import date
+from unittest.mock import patch
+
+ENVIRONMENT = {
+    'SECRET_KEY': 'benchmark',
+    'PRIVACY_END_POINT': 'https://privacy.local/jobs',
+    'PROFILE_SNAPSHOT_DATASET': 'profile_snapshot',
+    'DATABRICKS_SERVER_HOSTNAME': 'databricks.local',
+    'DATABRICKS_HTTP_PATH': '/sql',
+    'DATABRICKS_TOKEN': 'benchmark',
+}
+
+
+def run_pipeline(options, spids, queue):
+    logging.disable(logging.INFO)
+    os.environ.update(ENVIRONMENT)
+    if options.workers:
+        os.environ['GDPR_CHUNK_WORKERS'] = str(options.workers)
+    os.environ['GDPR_DAILY_RUN_STREAMING'] = str(options.streaming).lower()
+    os.environ['PRIVACY_API_GZIP'] = str(options.gzip).lower()
+
+    from flask import Flask
+    from app import utils
+    from app.models import db
+    from app.metrics import pipeline_metrics
+    from benchmarks.pipeline_fakes import (FakeDatabricksConnection, FakePrivacyEndpoint, FakeQueryServiceConnection,
+                                           InMemoryDeltaStore, make_daily_run)
+
+    run_date = date.today()
+    store = InMemoryDeltaStore()
+    daily_run = make_daily_run(spids, run_date)
+    profiles = set(daily_run.column('singl_profl_id').to_pylist()[:int(spids * options.profile_ratio)])
+    endpoint = FakePrivacyEndpoint(options.latency, options.latency_per_user, options.throttle_rate)
+
+    def write(dataframe, table_name):
+        with pipeline_metrics.timed('delta_write', rows=len(dataframe)):
+            return store.write(dataframe, table_name)
+
+    def merge(dataframe, table_name, match_column, **kwargs):
+        with pipeline_metrics.timed('delta_merge', rows=len(dataframe)):
+            return store.merge(dataframe, table_name, match_column, **kwargs)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+
+    with app.app_context(), \
+            patch('app.sql_pool.sql.connect', side_effect=lambda *args, **kwargs: FakeDatabricksConnection(daily_run, store)), \
+            patch('app.utils.connect_profile_store', side_effect=lambda: FakeQueryServiceConnection(profiles)), \
+            patch('app.utils.request_ims_access_token', return_value={'access_token': 'benchmark', 'expires_in': 86400}), \
+            patch('app.platform_client.requests.Session.request', endpoint), \
+            patch('app.utils.write_data_to_databricks_table', write), \
+            patch('app.utils.merge_data_to_databricks_table', merge):
+        pipeline_metrics.reset()
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        utils.auto_execute_gdpr_deletions_cdp(run_date, record_budget=options.record_budget,
+                                              time_budget=options.time_budget)
+        elapsed = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    deletions = store.tables.get('gdpr_user_deletions')
+    flagged = 0 if deletions is None else int(deletions['deletion_flag'].sum())
+    queue.put({
+        'elapsed': elapsed,
+        'extra_peak_mb': (peak - baseline) / 1024,
+        'flagged': flagged,
+        'requests': endpoint.requests,
+        'throttled': endpoint.throttled,
+        'stages': pipeline_metrics.snapshot(),
+    })
+
+
+def report(spids, result):
+    print(f"\n{spids:,} SPIDs: {result['elapsed']:.2f}s, {spids / result['elapsed']:,.0f} SPIDs/s, "
+          f"{result['flagged']:,} flagged for deletion, {result['requests']} privacy requests "
+          f"({result['throttled']} throttled), +{result['extra_peak_mb']:.1f} MB peak RSS")
+    print(f"  {'stage':<22}{'calls':>8}{'seconds':>10}{'rows':>12}{'rows/s':>12}{'errors':>8}")
+    for stage, stats in sorted(result['stages'].items(), key=lambda item: -item[1]['seconds']):
+        rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+        print(f"  {stage:<22}{stats['count']:>8}{stats['seconds']:>10.2f}{stats['rows']:>12,}{rate:>12,.0f}{stats['errors']:>8}")
+    # Checkpointing, resume filtering and DataFrame handling between stages.
+    other = result['elapsed'] - sum(stats['seconds'] for stats in result['stages'].values())
+    print(f"  {'other':<22}{'':>8}{other:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds per privacy request')
+    parser.add_argument('--latency-per-user', type=float, default=0.0, help='extra seconds per user in a request')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of privacy requests answered with 429')
+    parser.add_argument('--profile-ratio', type=float, default=0.9, help='fraction of SPIDs found in the profile store')
+    parser.add_argument('--workers', type=int, default=None, help='GDPR_CHUNK_WORKERS for the submission')
+    parser.add_argument('--streaming', action='store_true', help='use the batch-at-a-time daily run')
+    parser.add_argument('--gzip', action='store_true', help='send gzipped privacy request bodies')
+    parser.add_argument('--record-budget', type=int, default=0, help='GDPR_AUTO_RECORD_BUDGET, 0 for no limit')
+    parser.add_argument('--time-budget', type=float, default=0, help='time budget in seconds, 0 for no limit')
+    options = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    for spids in options.sizes:
+        queue = context.Queue()
+        process = context.Process(target=run_pipeline, args=(options, spids, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        report(spids, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Compare the daily-run SPID join: object-dtype pandas merge against Arrow hash-set membership.
+
+Each sample runs in a fresh process. Peak RSS counts from before the daily run
+is loaded, since the old path held it as object-dtype pandas and the new one
+holds it in Arrow. The pandas rows reproduce the join write_profile_store_results
+used to do.
+Run from the repository root with: python -m benchmarks.bench_spid_join [--sizes 100000 1000000]
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+from datetime import date
+
+
+def pandas_merge(profile_spids, daily_run):
+    import pandas as pd
+
+    df_profile_table = pd.DataFrame({'singl_profl_id': profile_spids})
+    df_profile_table['execution_date'] = date.today()
+    user_deletion = df_profile_table.merge(daily_run, on='singl_profl_id', how='inner')
+    user_deletion.drop(columns=['query_execution_date'], inplace=True)
+    user_deletion['deletion_date'] = date.today()
+    user_deletion['deletion_flag'] = False
+    return user_deletion
+
+
+def arrow_join(profile_spids, daily_run):
+    from app.spid_join import user_deletion_rows
+
+    return user_deletion_rows(profile_spids, daily_run, date.today())
+
+
+def run_join(method, spids, queue):
+    import pandas
+    import pyarrow
+    import app.spid_join
+    from benchmarks.pipeline_fakes import make_daily_run
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    daily_run = make_daily_run(spids, date.today())
+    profile_spids = list(dict.fromkeys(daily_run.column('singl_profl_id').to_pylist()[:int(spids * 0.9)]))
+    if method == 'pandas merge':
+        daily_run = daily_run.to_pandas()
+    start = time.perf_counter()
+    rows = len({'pandas merge': pandas_merge, 'arrow join': arrow_join}[method](profile_spids, daily_run))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({'seconds': elapsed, 'extra_peak_mb': (peak - baseline) / 1024, 'rows': rows})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    options = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'SPIDs':>10}  {'method':<14}{'seconds':>9}{'+peak MB':>10}{'rows':>11}")
+    for spids in options.sizes:
+        for method in ('pandas merge', 'arrow join'):
+            queue = context.Queue()
+            process = context.Process(target=run_join, args=(method, spids, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            print(f"{spids:>10,}  {method:<14}{result['seconds']:>9.2f}{result['extra_peak_mb']:>10.1f}{result['rows']:>11,}")
+
+
+if __name__ == '__main__':
+    main()
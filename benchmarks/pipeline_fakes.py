@@ -0,0 +1,202 @@
+"""In-process stand-ins for the services the GDPR pipeline talks to.
+
+Used by bench_pipeline to run the whole pipeline offline.
+"""
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import date
+import pandas as pd
+import pyarrow as pa
+
+
+class InMemoryDeltaStore:
+    """Replaces write_data_to_databricks_table and merge_data_to_databricks_table."""
+
+    def __init__(self):
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def write(self, dataframe, table_name):
+        with self._lock:
+            existing = self.tables.get(table_name)
+            self.tables[table_name] = dataframe.copy() if existing is None else pd.concat([existing, dataframe], ignore_index=True)
+        return True
+
+    def merge(self, dataframe, table_name, match_column, update_columns=('deletion_flag', 'deletion_date')):
+        with self._lock:
+            table = self.tables.get(table_name)
+            if table is None:
+                return True
+            source = dataframe.drop_duplicates(match_column).set_index(match_column)
+            matched = table[match_column].isin(source.index)
+            for column in update_columns:
+                table.loc[matched, column] = table.loc[matched, match_column].map(source[column])
+        return True
+
+    def rows(self, table_name):
+        with self._lock:
+            table = self.tables.get(table_name)
+            return 0 if table is None else len(table)
+
+
+class FakeDatabricksCursor:
+    """Serves the daily-run, backlog and per-date queries from generated data and the Delta store."""
+
+    def __init__(self, daily_run, store):
+        self.daily_run = daily_run
+        self.store = store
+        self.result = None
+        self.offset = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def execute(self, query, parameters=None):
+        self.offset = 0
+        if 'cust_gdpr_table' in query:
+            self.result = self.daily_run
+            return
+        if 'gdpr_user_deletions' in query and parameters and 'delete_date' in parameters:
+            table = self.store.tables.get('gdpr_user_deletions')
+            delete_date = date.fromisoformat(parameters['delete_date'])
+            if table is not None and 'deletion_flag = false' in query:
+                table = table[~table['deletion_flag'].astype(bool)]
+            if 'GROUP BY execution_date' in query:
+                counts = {} if table is None else table.loc[
+                    table['execution_date'] <= delete_date].groupby('execution_date').size().sort_index()
+                self.result = pa.table({'execution_date': pa.array(list(getattr(counts, 'index', [])), pa.date32()),
+                                        'cnt': pa.array(list(getattr(counts, 'values', [])), pa.int64())})
+                return
+            spids = [] if table is None else table.loc[
+                table['execution_date'] == delete_date, 'singl_profl_id'].tolist()
+            self.result = pa.table({'singl_profl_id': pa.array(spids, pa.string())})
+            return
+        self.result = pa.table({'result': [1]})
+
+    def fetchall(self):
+        return self.result.to_pylist()
+
+    def fetchall_arrow(self):
+        table = self.result.slice(self.offset)
+        self.offset = self.result.num_rows
+        return table
+
+    def fetchmany_arrow(self, size):
+        table = self.result.slice(self.offset, size)
+        self.offset += table.num_rows
+        return table
+
+    def close(self):
+        pass
+
+
+class FakeDatabricksConnection:
+
+    def __init__(self, daily_run, store):
+        self.daily_run = daily_run
+        self.store = store
+
+    def cursor(self):
+        return FakeDatabricksCursor(self.daily_run, self.store)
+
+    def close(self):
+        pass
+
+
+class FakeQueryServiceCursor:
+    """Answers the profile snapshot IN-list query from a set of known SPIDs."""
+
+    def __init__(self, profiles):
+        self.profiles = profiles
+        self.itersize = 2000
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, query, params=None):
+        self.rows = [(spid,) for spid in params['spids'] if spid in self.profiles]
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+class FakeQueryServiceConnection:
+
+    def __init__(self, profiles):
+        self.profiles = profiles
+
+    def cursor(self, name=None):
+        return FakeQueryServiceCursor(self.profiles)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+        self.text = json.dumps(body)
+        self.headers = {'Retry-After': '0'} if status_code == 429 else {}
+
+    def json(self):
+        return self._body
+
+
+class FakePrivacyEndpoint:
+    """Stands in for requests.Session.request against the Privacy Service jobs endpoint.
+
+    Each call sleeps for latency seconds plus latency_per_user per user, and
+    answers 429 with probability throttle_rate.
+    """
+
+    def __init__(self, latency=0.02, latency_per_user=0.0, throttle_rate=0.0, seed=0):
+        self.latency = latency
+        self.latency_per_user = latency_per_user
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, headers=None, data=None, **kwargs):
+        if headers and headers.get('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        users = json.loads(data)['users']
+        time.sleep(self.latency + self.latency_per_user * len(users))
+        with self._lock:
+            self.requests += 1
+            throttled = self.random.random() < self.throttle_rate
+            self.throttled += throttled
+            request_number = self.requests
+        if throttled:
+            return FakeResponse(429, {'error_code': '429', 'message': 'Too many requests'})
+        return FakeResponse(202, {
+            'requestId': f'request-{request_number}',
+            'totalRecords': len(users),
+            'jobs': [{'jobId': f'job-{request_number}-{i}', 'customer': {'user': {'key': user['key'], 'action': user['action']}}}
+                     for i, user in enumerate(users)],
+        })
+
+
+def make_daily_run(spids, run_date):
+    return pa.table({
+        'singl_profl_id': [f'spid-{i:010d}' for i in range(spids)],
+        'wallet_id': [f'wallet-{i:010d}' for i in range(spids)],
+        'query_execution_date': pa.array([run_date] * spids, pa.date32()),
+    })